@@ -1,3 +1,4 @@
+import random
 import requests
 import time
 
@@ -5,12 +6,16 @@ url = "http://127.0.0.1:5000/predict/schuler"
 
 print("--- DÉBUT DE L'ATTAQUE PAR EXTRACTION DE MODÈLE ---")
 
-for i in range(1, 11): # On tente 10 requêtes rapides
-    response = requests.get(url)
+# Extraction : on balaie le domaine d'entrée de la presse pour reconstruire
+# la frontière de décision du modèle (une entrée différente à chaque requête)
+for i in range(1, 31): # On tente 30 requêtes rapides
+    entrees = {"force": random.uniform(0, 2500), "cadence": random.uniform(0, 60),
+               "temperature": random.uniform(20, 90)}
+    response = requests.get(url, params=entrees)
     if response.status_code == 200:
         print(f"Requête {i}: Succès (Donnée extraite)")
     elif response.status_code == 429:
         print(f"Requête {i}: BLOQUÉE PAR LE RATE LIMITER (HTTP 429)")
     else:
         print(f"Requête {i}: Erreur {response.status_code}")
-    time.sleep(0.5) # Attaque rapide
+    time.sleep(0.2) # Attaque rapide
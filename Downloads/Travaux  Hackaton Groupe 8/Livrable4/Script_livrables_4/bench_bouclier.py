@@ -0,0 +1,51 @@
+import argparse
+import time
+import numpy as np
+from registre_modeles import BouclierCompile, entrainer
+
+# Débit du bouclier Isolation Forest selon la taille des micro-lots.
+# Le coût fixe d'un appel sklearn (validation, boucle sur les 100 arbres)
+# est payé une fois par lot au lieu d'une fois par lecture. Colonne
+# « compilé » : même forêt réduite à un searchsorted (registre_modeles.py).
+TAILLES = [1, 32, 256, 4096]
+
+bouclier = entrainer(np.random.uniform(40, 60, 100))
+compile_ = BouclierCompile.depuis_foret(bouclier)
+
+
+def noter(valeurs, modele=bouclier):
+    return modele.decision_function(np.asarray(valeurs).reshape(-1, 1)) >= 0
+
+
+def mesurer(valeurs, taille, duree, modele=bouclier):
+    notees, debut = 0, time.perf_counter()
+    while time.perf_counter() - debut < duree:
+        for i in range(0, len(valeurs), taille):
+            noter(valeurs[i:i + taille], modele)
+            notees += min(taille, len(valeurs) - i)
+            if time.perf_counter() - debut >= duree:
+                break
+    return notees / (time.perf_counter() - debut)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du bouclier S1 par taille de lot")
+    parser.add_argument("--tailles", default=",".join(map(str, TAILLES)))
+    parser.add_argument("--duree", type=float, default=2, help="secondes par palier")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    valeurs = np.r_[rng.uniform(40, 60, 7800), rng.uniform(80, 120, 392)]
+    rng.shuffle(valeurs)
+
+    # Mêmes verdicts que l'ancien predict() lecture par lecture
+    reference = np.array([bouclier.predict([[v]])[0] == 1 for v in valeurs[:500]])
+    assert (noter(valeurs[:500]) == reference).all(), "verdicts différents de predict()"
+    assert (noter(valeurs, compile_) == noter(valeurs)).all(), "verdicts compilés différents"
+
+    print("--- BANC BOUCLIER S1 (IsolationForest) ---")
+    print(f"{'lot':>6} {'sklearn /s':>12} {'µs/lecture':>11} {'compilé /s':>12} {'µs/lecture':>11}")
+    for taille in [int(t) for t in args.tailles.split(",")]:
+        debit = mesurer(valeurs, taille, args.duree)
+        rapide = mesurer(valeurs, taille, args.duree, compile_)
+        print(f"{taille:>6} {debit:>12.0f} {1e6 / debit:>11.1f} {rapide:>12.0f} {1e6 / rapide:>11.2f}")
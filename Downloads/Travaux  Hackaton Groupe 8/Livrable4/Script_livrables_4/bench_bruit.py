@@ -0,0 +1,44 @@
+import argparse
+import time
+import numpy as np
+from diffprivlib.mechanisms import Gaussian, Laplace
+from bruit_differentiel import MecanismeVectoriel
+
+# Bruit différentiel sur --valeurs sorties de modèle :
+#   diffprivlib / appel   un mécanisme créé par valeur (ancien defense_inference_s5)
+#   diffprivlib réutilisé un mécanisme, randomise() valeur par valeur
+#   vectoriel             MecanismeVectoriel.bruiter() sur le tableau entier
+# Vérifie aussi que les deux bruits ont le même écart-type (même calibrage).
+PARAMETRES = {"gaussien": (Gaussian, dict(epsilon=0.1, delta=0.01, sensitivity=0.05)),
+              "laplace": (Laplace, dict(epsilon=1.0, delta=0.0, sensitivity=1.0))}
+
+
+def chronometrer(fonction):
+    debut = time.perf_counter()
+    sortie = fonction()
+    return time.perf_counter() - debut, sortie
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du bruit différentiel vectoriel S5")
+    parser.add_argument("--valeurs", type=int, default=1_000_000)
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args()
+    valeurs = np.random.default_rng(args.graine).uniform(0, 1, args.valeurs)
+
+    print(f"--- BANC BRUIT DIFFÉRENTIEL S5 : {args.valeurs} valeurs ---")
+    print(f"{'mécanisme':>9} {'chemin':>22} {'durée s':>9} {'ns/valeur':>10} {'gain':>7} {'écart-type':>11}")
+    for nom, (classe, p) in PARAMETRES.items():
+        vectoriel = MecanismeVectoriel(nom, epsilon=p["epsilon"], delta=p["delta"],
+                                       sensibilite=p["sensitivity"], graine=args.graine)
+        mecanisme = classe(**p)
+        chemins = (("diffprivlib / appel", lambda: [classe(**p).randomise(v) for v in valeurs.tolist()]),
+                   ("diffprivlib réutilisé", lambda: [mecanisme.randomise(v) for v in valeurs.tolist()]),
+                   ("vectoriel", lambda: vectoriel.bruiter(valeurs)))
+        reference = None
+        for chemin, fonction in chemins:
+            duree, sortie = chronometrer(fonction)
+            reference = reference or duree
+            ecart = np.std(np.asarray(sortie) - valeurs)
+            print(f"{nom:>9} {chemin:>22} {duree:>9.3f} {duree / args.valeurs * 1e9:>10.0f} "
+                  f"{reference / duree:>6.0f}x {ecart:>11.4f}")
@@ -0,0 +1,128 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from budget_confidentialite import ComptableBudget, BudgetEpuise, composer
+from defense_inference_s5 import cadence_reelle, dp_mechanism, obtenir_cadence_securisee
+
+# Comptable de budget S5 :
+#   - moyennage : un espion repose --essais fois la même question sur la
+#     cadence ; sans comptable chaque réponse est un nouveau tirage et la
+#     moyenne converge vers la valeur réelle, avec le comptable il reçoit
+#     toujours la même réponse
+#   - composition : réponses permises par client selon ε par réponse
+#   - coût : µs par requête (cache, réponse fraîche, refus) avec --clients
+#     clients connus, comparé au seul tirage du bruit ; taille de la base
+#   - workers : --workers processus forkés interrogent pour le même client
+#     la même base ; le total accordé ne dépasse pas le budget d'un client
+ESPION = "10.6.6.6"
+
+
+def worker(fichier, n, resultats):
+    budget = ComptableBudget(fichier=fichier)
+    budget.declarer("cadence:KUKA-KR210", 0.1, 0.0)
+    accordees = 0
+    for i in range(n):
+        try:
+            budget.repondre(ESPION, "cadence:KUKA-KR210", (os.getpid(), i), lambda: 0.0)
+            accordees += 1
+        except BudgetEpuise:
+            pass
+    resultats.put(accordees)
+
+
+def plus_grand(dans_budget, haut=65535):
+    """Plus grand k ≤ haut vérifiant dans_budget (monotone)."""
+    bas = 0
+    while bas < haut:
+        milieu = (bas + haut + 1) // 2
+        bas, haut = (milieu, haut) if dans_budget(milieu) else (bas, milieu - 1)
+    return bas
+
+
+def cout(appel, n):
+    debut = time.perf_counter()
+    for i in range(n):
+        appel(i)
+    return (time.perf_counter() - debut) / n * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du comptable de budget de confidentialité S5")
+    parser.add_argument("--essais", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"--- BANC BUDGET DE CONFIDENTIALITÉ S5 : {dp_mechanism} ---")
+    sans = np.array([obtenir_cadence_securisee(cadence_reelle) for _ in range(args.essais)])
+    budget = ComptableBudget(fichier=None)
+    budget.declarer("cadence", dp_mechanism.epsilon, dp_mechanism.delta)
+    avec = np.array([budget.repondre(ESPION, "cadence", "2026-01-05", lambda: obtenir_cadence_securisee(cadence_reelle))
+                     for _ in range(args.essais)])
+    print(f"moyennage de {args.essais} réponses à la même question (valeur réelle {cadence_reelle:.1%}) :")
+    print(f"  sans comptable : {sans.mean():.1%} (erreur {abs(sans.mean() - cadence_reelle):.1%})")
+    print(f"  avec comptable : {avec.mean():.1%} (erreur {abs(avec.mean() - cadence_reelle):.1%}, "
+          f"{len(np.unique(avec))} réponse distincte, dépense {budget.depense(ESPION, 'cadence')})")
+
+    print(f"réponses permises par client (ε={budget.epsilon_max}, δ={budget.delta_max}, δ'={budget.delta_prime}) :")
+    print(f"{'ε / réponse':>12} {'δ / réponse':>12} {'simple':>8} {'avancée':>8} {'comptable':>10}")
+    for epsilon, delta in ((0.1, 0.01), (0.1, 0.0), (0.05, 1e-4), (0.01, 0.0), (0.001, 0.0)):
+        simple = int(min(budget.epsilon_max / epsilon, budget.delta_max / delta if delta else np.inf) + 1e-9)
+        avancee = plus_grand(lambda k: all(np.less_equal(composer(k, epsilon, delta, budget.delta_prime),
+                                                         (budget.epsilon_max, budget.delta_max))))
+        print(f"{epsilon:>12} {delta:>12} {simple:>8} {avancee:>8} {budget.permises(epsilon, delta):>10}")
+
+    dossier = tempfile.mkdtemp(prefix="budget_")
+    try:
+        budget = ComptableBudget(fichier=os.path.join(dossier, "budgets.db"))
+        for machine in ("KUKA-KR210", "CNC-FANUC", "PRESSE-SCH"):
+            budget.declarer(f"cadence:{machine}", 0.001, 0.0)
+        clients = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(args.clients)]
+        for c in clients:
+            budget.repondre(c, "cadence:PRESSE-SCH", c, lambda: 0.0)
+        n = min(args.clients, 50_000)
+        bruit = cout(lambda i: obtenir_cadence_securisee(cadence_reelle), n)
+        cache = cout(lambda i: budget.repondre(clients[-1 - i % 1000], "cadence:PRESSE-SCH", clients[-1 - i % 1000],
+                                               lambda: 0.0), n)
+        fraiche = cout(lambda i: budget.repondre(clients[i], "cadence:CNC-FANUC", i,
+                                                 lambda: obtenir_cadence_securisee(cadence_reelle)), n)
+        budget.declarer("cadence:KUKA-KR210", 0.1, 0.0)          # 12 réponses permises
+        for i in range(20):
+            try:
+                budget.repondre(ESPION, "cadence:KUKA-KR210", -1 - i, lambda: 0.0)
+            except BudgetEpuise:
+                pass
+
+        def refus(i):
+            try:
+                budget.repondre(ESPION, "cadence:KUKA-KR210", i, lambda: 0.0)
+            except BudgetEpuise:
+                pass
+        refuse = cout(refus, n)
+        s = budget.stats()
+        print(f"coût par requête avec {s['clients']} clients × {s['grandeurs']} grandeurs :")
+        print(f"  tirage du bruit seul {bruit:.1f} µs | réponse en cache {cache:.1f} µs | "
+              f"réponse fraîche (bruit compris) {fraiche:.1f} µs | refus {refuse:.1f} µs")
+        octets = sum(os.path.getsize(budget.fichier + suffixe) for suffixe in ("", "-wal")
+                     if os.path.exists(budget.fichier + suffixe))
+        print(f"  base {octets / 1e6:.1f} Mo sur disque | {s['en_memoire']} compteurs en mémoire "
+              f"(LRU, {budget.clients_max} au plus)")
+
+        fichier = os.path.join(dossier, "workers.db")
+        permises = ComptableBudget(fichier=fichier).charger().declarer("cadence:KUKA-KR210", 0.1, 0.0)
+        contexte = multiprocessing.get_context("fork")
+        resultats = contexte.Queue()
+        processus = [contexte.Process(target=worker, args=(fichier, 50, resultats)) for _ in range(args.workers)]
+        for p in processus:
+            p.start()
+        accordees = [resultats.get() for _ in processus]
+        for p in processus:
+            p.join()
+        print(f"{args.workers} workers, même client, même base : {sum(accordees)} réponses fraîches "
+              f"accordées ({' + '.join(map(str, accordees))}) pour {permises} permises")
+    finally:
+        shutil.rmtree(dossier)
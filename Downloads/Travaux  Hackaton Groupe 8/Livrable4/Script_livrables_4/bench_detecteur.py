@@ -0,0 +1,187 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from detecteur_flux import DetecteurFlux
+from registre_modeles import DEFAUT, RegistreModeles, entrainer
+
+# Qualité et coût du bouclier S1 sur un rejeu étiqueté :
+#   foret  Isolation Forest (compilé) du capteur sur chaque lecture
+#   flux   détecteur en flux seul (detecteur_flux.py)
+#   mixte  flux, Isolation Forest en second étage pour les cas limites
+# Rejeu synthétique : chaque capteur a son niveau, son bruit et une
+# dérive lente légitime ; les injections (étiquette 1) sont des pics,
+# des rafales décalées de 3 à 5 σ, des valeurs hors plage et des rampes.
+# --rejeu fichier.csv "capteur;ts;valeur;etiquette" pour un rejeu externe.
+# Démarrage à froid : détecteur vierge, seul le modèle par défaut (40-60 °C)
+# au registre, l'attaque arrive avant toute lecture saine (500 °C sur le
+# capteur "inconnu", 9999 sur 100 capteurs neufs), puis des lectures
+# saines, puis de nouveau l'attaque une fois le capteur chauffé.
+LOT = 256
+ATTAQUES = ("pic", "rafale", "hors_plage", "rampe")
+
+
+def generer(capteurs, lectures, apprentissage, rng, derive=3.0):
+    """
+    (capteurs, ts, valeurs, types) triés par ts + historique sain par capteur.
+    `derive` : dérive linéaire légitime sur tout le rejeu, en σ du bruit.
+    """
+    lignes, sains = [], {}
+    for i in range(capteurs):
+        nom = f"C{i:04d}"
+        niveau, bruit = rng.uniform(10, 100), rng.uniform(0.2, 3)
+        t = np.arange(lectures, dtype=np.float64) + rng.uniform(0, 1)
+        tendance = (derive * bruit * t / lectures
+                    + 2 * bruit * np.sin(2 * np.pi * t / rng.uniform(2000, 10000)))
+        v = niveau + tendance + rng.normal(0, bruit, lectures)
+        type_ = np.zeros(lectures, dtype=np.int8)            # 0 = saine, 1.. = ATTAQUES
+        sains[nom] = v[:apprentissage].copy()
+        debut = apprentissage
+        while True:
+            debut += int(rng.integers(200, 800))
+            if debut + 60 >= lectures:
+                break
+            attaque = int(rng.integers(len(ATTAQUES)))
+            signe = rng.choice([-1, 1])
+            if ATTAQUES[attaque] == "pic":
+                v[debut] += signe * rng.uniform(6, 15) * bruit
+                fin = debut + 1
+            elif ATTAQUES[attaque] == "rafale":
+                fin = debut + 20
+                v[debut:fin] += signe * rng.uniform(3, 5) * bruit
+            elif ATTAQUES[attaque] == "hors_plage":
+                v[debut] = niveau * rng.uniform(2, 4)
+                fin = debut + 1
+            else:
+                fin = debut + 50
+                v[debut:fin] += signe * np.linspace(0.5, 6, 50) * bruit
+            type_[debut:fin] = attaque + 1
+        lignes.append((np.full(lectures, nom), t, v, type_))
+    noms, ts, valeurs, types = (np.concatenate(c) for c in zip(*lignes))
+    ordre = np.argsort(ts, kind="stable")
+    return noms[ordre], ts[ordre], valeurs[ordre], types[ordre], sains
+
+
+def froid(rng):
+    """Rejeu étiqueté du démarrage à froid : (capteurs, valeurs, étiquettes)."""
+    lignes = [("inconnu", 500.0, 1)] * 40
+    lignes += [(f"N{i:03d}", 9999.0, 1) for i in range(100)]
+    lignes += [("inconnu", v, 0) for v in rng.uniform(40, 60, 400)]
+    lignes += [("inconnu", 500.0, 1)] * 20
+    noms, valeurs, etiquettes = zip(*lignes)
+    return np.array(noms), np.array(valeurs), np.array(etiquettes, dtype=np.int8)
+
+
+def charger(chemin):
+    noms, ts, valeurs, etiquettes = [], [], [], []
+    with open(chemin, encoding="utf-8") as f:
+        for ligne in f:
+            c, t, v, e = ligne.strip().split(";")
+            noms.append(c); ts.append(float(t)); valeurs.append(float(v)); etiquettes.append(int(e))
+    return np.array(noms), np.array(ts), np.array(valeurs), np.array(etiquettes, dtype=np.int8)
+
+
+def rejouer(noter, noms, valeurs):
+    verdicts = np.empty(len(valeurs), dtype=bool)
+    debut = time.perf_counter()
+    for i in range(0, len(valeurs), LOT):
+        verdicts[i:i + LOT] = noter(list(noms[i:i + LOT]), valeurs[i:i + LOT])
+    return verdicts, time.perf_counter() - debut
+
+
+def qualite(alertes, etiquettes):
+    vp = int((alertes & (etiquettes > 0)).sum())
+    fp = int((alertes & (etiquettes == 0)).sum())
+    fn = int((~alertes & (etiquettes > 0)).sum())
+    precision = vp / max(vp + fp, 1)
+    rappel = vp / max(vp + fn, 1)
+    return precision, rappel, 2 * precision * rappel / max(precision + rappel, 1e-9), fp / max((etiquettes == 0).sum(), 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du bouclier S1 sur rejeu étiqueté")
+    parser.add_argument("--capteurs", type=int, default=60)
+    parser.add_argument("--lectures", type=int, default=5000, help="par capteur")
+    parser.add_argument("--apprentissage", type=int, default=1000, help="lectures saines d'entraînement")
+    parser.add_argument("--rejeu", help="CSV capteur;ts;valeur;etiquette (au lieu du rejeu synthétique)")
+    parser.add_argument("--sauver", help="écrire le rejeu synthétique dans ce CSV")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.rejeu:
+        noms, ts, valeurs, types = charger(args.rejeu)
+        # Historique sain : les premières lectures saines de chaque capteur
+        sains = {}
+        for nom in np.unique(noms):
+            masque = (noms == nom) & (types == 0)
+            sains[nom] = valeurs[masque][:args.apprentissage]
+        etiquettes = types
+    else:
+        noms, ts, valeurs, types, sains = generer(args.capteurs, args.lectures, args.apprentissage, rng)
+        etiquettes = types
+        if args.sauver:
+            with open(args.sauver, "w", encoding="utf-8") as f:
+                for c, t, v, e in zip(noms, ts, valeurs, (types > 0).astype(int)):
+                    f.write(f"{c};{t:.3f};{v:.4f};{e}\n")
+
+    # Les lectures d'apprentissage ne sont pas jugées
+    rang = np.zeros(len(noms), dtype=np.int64)
+    vus = {}
+    for j, nom in enumerate(noms):
+        rang[j] = vus.get(nom, 0)
+        vus[nom] = rang[j] + 1
+    test = rang >= args.apprentissage
+
+    dossier = tempfile.mkdtemp(prefix="bouclier_")
+    try:
+        registre = RegistreModeles(dossier, capacite=len(sains))
+        for nom, historique in sains.items():
+            registre.enregistrer(str(nom), entrainer(historique))
+
+        def flux(second_etage):
+            detecteur = DetecteurFlux()
+            for nom, historique in sains.items():        # chauffe sur l'historique sain
+                detecteur.apprendre(detecteur.indices([nom] * len(historique)), historique)
+            return detecteur, (lambda c, v: detecteur.noter(c, v, second_etage))
+
+        print(f"--- BANC DÉTECTEUR S1 : {len(sains)} capteurs, {test.sum()} lectures jugées, "
+              f"{(etiquettes[test] > 0).sum()} injectées ---")
+        entete = f"{'mode':>6} {'précision':>10} {'rappel':>7} {'F1':>6} {'faux pos.':>10} {'µs/lecture':>11} {'2e étage':>9}"
+        if not args.rejeu:
+            entete += "".join(f" {a:>10}" for a in ATTAQUES)
+        print(entete)
+        modes = [("foret", None, registre.noter)]
+        for nom_mode, second in (("flux", None), ("mixte", registre.noter)):
+            detecteur, noter = flux(second)
+            modes.append((nom_mode, detecteur, noter))
+        for nom_mode, detecteur, noter in modes:
+            verdicts, duree = rejouer(noter, noms[test], valeurs[test])
+            alertes = ~verdicts
+            precision, rappel, f1, taux_fp = qualite(alertes, etiquettes[test])
+            part = detecteur.compteurs["second_etage"] / test.sum() if detecteur else 1.0
+            ligne = (f"{nom_mode:>6} {precision:>10.3f} {rappel:>7.3f} {f1:>6.3f} {taux_fp:>10.4f} "
+                     f"{duree / test.sum() * 1e6:>11.2f} {part:>9.1%}")
+            if not args.rejeu:
+                for k in range(len(ATTAQUES)):
+                    masque = etiquettes[test] == k + 1
+                    ligne += f" {alertes[masque].mean() if masque.any() else 0:>10.3f}"
+            print(ligne)
+
+        defaut = RegistreModeles(os.path.join(dossier, "froid"))
+        defaut.enregistrer(DEFAUT, entrainer(rng.uniform(40, 60, 100)))
+        noms_froid, valeurs_froid, etiquettes_froid = froid(rng)
+        sans_avis = lambda c, v: np.full(len(v), np.nan)     # plateforme : défaut seul → pas d'avis
+        print("démarrage à froid, attaque d'abord (modèle par défaut seul) :")
+        print(f"{'mode':>6} {'attaques rejetées':>18} {'saines acceptées':>17} {'apprises':>9}")
+        for nom_mode, second in (("foret", None), ("flux", None), ("mixte", sans_avis)):
+            detecteur = DetecteurFlux()
+            noter = (defaut.noter if nom_mode == "foret"
+                     else lambda c, v: detecteur.noter(c, v, second, chauffe=defaut.noter))
+            verdicts, _ = rejouer(noter, noms_froid, valeurs_froid)
+            apprises = detecteur.n[detecteur.index["inconnu"]] if "inconnu" in detecteur.index else "-"
+            print(f"{nom_mode:>6} {(~verdicts[etiquettes_froid > 0]).mean():>18.1%} "
+                  f"{verdicts[etiquettes_froid == 0].mean():>17.1%} {apprises:>9}")
+    finally:
+        shutil.rmtree(dossier)
@@ -0,0 +1,99 @@
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from detecteur_extraction import DetecteurExtraction
+
+# Détecteur d'extraction S2 face à des clients simulés sur /predict/schuler :
+#   légitimes  tableau de bord (même point de fonctionnement, 1 requête/s),
+#              analyste (quelques points), rejeu d'historique (nuage réel
+#              des points de fonctionnement, gros volume)
+#   extraction uniforme, grille alignée sur les cases (8³), grilles fines
+#              non alignées (12³, 20³, ordre lexicographique), balayage
+#              répété (chaque point reposé deux fois), lente (1 requête/min :
+#              jamais bloquée par "5 per minute"), répartie (64 adresses
+#              d'un /24, 8 requêtes chacune), locale (petite boule autour
+#              d'un point réel)
+# Pour chaque client : signalé ou non, requêtes avant signalement, et part
+# des requêtes qu'aurait refusées l'ancienne limite fixe "5 per minute".
+# Puis un tableau de bord voisin de l'extraction répartie (même /24) : le
+# verdict du /24 ne doit limiter que les adresses qui balaient le domaine.
+DOMAINE = {"force": (0, 2500), "cadence": (0, 60), "temperature": (20, 90)}
+CENTRE = np.array([1600, 30, 55])
+ECHELLE = np.array([150, 4, 6])
+
+
+def entrees(x):
+    return dict(zip(DOMAINE, x))
+
+
+def clients(rng):
+    bas = np.array([b for b, _ in DOMAINE.values()])
+    haut = np.array([h for _, h in DOMAINE.values()])
+    derive = np.cumsum(rng.normal(0, 0.2, (5000, 3)), axis=0) * ECHELLE / 10
+    yield "tableau de bord", "légitime", [("10.0.0.10", CENTRE + derive[i] + rng.normal(0, 0.1, 3) * ECHELLE)
+                                          for i in range(5000)], 1.0
+    points = CENTRE + rng.normal(0, 1, (5, 3)) * ECHELLE
+    yield "analyste", "légitime", [("10.0.0.11", points[rng.integers(5)] + rng.normal(0, 0.05, 3) * ECHELLE)
+                                   for _ in range(300)], 0.2
+    historique = CENTRE + rng.multivariate_normal([0, 0, 0], [[1, .8, .6], [.8, 1, .5], [.6, .5, 1]], 3000) * ECHELLE
+    yield "rejeu d'historique", "légitime", [("10.0.0.12", x) for x in historique], 20.0
+    yield "extraction uniforme", "attaque", [("10.6.6.1", rng.uniform(bas, haut)) for _ in range(500)], 2.0
+    for pas in (8, 12, 20):
+        grille = np.stack(np.meshgrid(*[np.linspace(b, h, pas) for b, h in DOMAINE.values()],
+                                      indexing="ij"), -1).reshape(-1, 3)
+        yield f"grille {pas}³", "attaque", [("10.6.6.2", x) for x in grille], 2.0
+    yield "balayage répété", "attaque", [("10.6.6.5", x) for x in rng.uniform(bas, haut, (250, 3))
+                                         for _ in range(2)], 2.0
+    yield "extraction lente", "attaque", [("10.6.6.3", rng.uniform(bas, haut)) for _ in range(300)], 1 / 60
+    yield "extraction répartie", "attaque", [(f"10.9.9.{i % 64 + 1}", rng.uniform(bas, haut))
+                                             for i in range(512)], 2.0
+    yield "extraction locale", "attaque", [("10.6.6.4", CENTRE + rng.uniform(-0.3, 0.3, 3) * ECHELLE)
+                                           for _ in range(500)], 2.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du détecteur d'extraction S2")
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.graine)
+
+    print(f"--- BANC DÉTECTEUR D'EXTRACTION S2 : domaine {len(DOMAINE)} variables ---")
+    print(f"{'client':>22} {'nature':>9} {'requêtes':>9} {'signalé':>8} {'après':>6} "
+          f"{'cases':>6} {'entropie':>9} {'refusées 5/min':>15}")
+    durees, total = 0.0, 0
+    reparti = None
+    for nom, nature, requetes, debit in clients(rng):
+        detecteur = DetecteurExtraction(DOMAINE)
+        apres = None
+        debut = time.perf_counter()
+        for k, (client, x) in enumerate(requetes):
+            if detecteur.observer(client, entrees(x)):
+                apres = apres or k + 1
+        durees += time.perf_counter() - debut
+        total += len(requetes)
+        # Ancienne limite : 5 requêtes par minute et par adresse
+        adresses = len({c for c, _ in requetes})
+        par_minute = debit * 60 / adresses
+        refusees = max(0.0, 1 - 5 / par_minute)
+        e = detecteur.etat(requetes[0][0])
+        print(f"{nom:>22} {nature:>9} {len(requetes):>9} {'oui' if apres else 'non':>8} {apres or '-':>6} "
+              f"{e['cases']:>6.0f} {e['entropie']:>9.2f} {refusees:>15.0%}")
+        if nom == "extraction répartie":
+            reparti = detecteur
+
+    for _ in range(60):
+        reparti.observer("10.9.9.200", entrees(CENTRE + rng.normal(0, 0.01, 3) * ECHELLE))
+    print(f"/24 de l'extraction répartie : adresses attaquantes limitées "
+          f"{sum(reparti.suspect(f'10.9.9.{i}') for i in range(1, 65))}/64, "
+          f"tableau de bord voisin limité : {'oui' if reparti.suspect('10.9.9.200') else 'non'}")
+
+    tracemalloc.start()
+    detecteur = DetecteurExtraction(DOMAINE)
+    for i in range(4096):
+        detecteur.observer(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}", entrees(CENTRE))
+    memoire = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"coût : {durees / total * 1e6:.1f} µs par requête | "
+          f"mémoire : {memoire / 1e6:.1f} Mo pour {detecteur.stats()['empreintes']} empreintes "
+          f"(clients + /24)")
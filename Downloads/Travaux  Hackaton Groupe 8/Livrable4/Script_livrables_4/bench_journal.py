@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+import numpy as np
+from journal_lectures import ENREGISTREMENT, JournalLectures, LecteurJournal, compacter, ouvrir_store
+
+# Débit du journal S1 sur un cœur :
+#   - écriture : lots de 256 lectures (taille des micro-lots de la
+#     plateforme) depuis une boucle asyncio, fsync périodique en thread
+#   - lecture : parcours des segments mappés en mémoire
+#   - compaction : segments scellés → TimeSeriesStore d'ai4bmi_rbac
+LOT = 256
+
+
+async def ecrire(journal, capteurs, total, periode):
+    rng = np.random.default_rng(0)
+    valeurs = rng.normal(50, 2, total)
+    verdicts = rng.random(total) > 0.01
+    noms = [capteurs[i % len(capteurs)] for i in range(LOT)]
+    synchro = asyncio.create_task(journal.boucle(periode))
+    durees = []
+    t0 = time.time()
+    debut = time.perf_counter()
+    for i in range(0, total, LOT):
+        ts = t0 + np.arange(i, i + LOT) * 1e-5
+        a = time.perf_counter()
+        journal.ajouter(noms, ts, valeurs[i:i + LOT], verdicts[i:i + LOT])
+        durees.append(time.perf_counter() - a)
+        if i % (LOT * 16) == 0:
+            await asyncio.sleep(0)           # laisse tourner la synchro, comme la plateforme
+    journal.fermer()
+    duree = time.perf_counter() - debut
+    synchro.cancel()
+    return duree, np.percentile(durees, 99) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du journal des lectures S1")
+    parser.add_argument("--lectures", type=int, default=4_000_000)
+    parser.add_argument("--capteurs", type=int, default=48)
+    parser.add_argument("--segment-mo", type=int, default=16)
+    parser.add_argument("--fsync", type=float, default=1.0, help="période de fsync (s)")
+    args = parser.parse_args()
+
+    dossier = tempfile.mkdtemp(prefix="journal_")
+    try:
+        capteurs = [f"C{i:04d}" for i in range(args.capteurs)]
+        journal = JournalLectures(f"{dossier}/wal", segment_octets=args.segment_mo * 1024 * 1024)
+        duree, p99 = asyncio.run(ecrire(journal, capteurs, args.lectures, args.fsync))
+        s = journal.stats()
+        print(f"--- BANC JOURNAL S1 : {args.lectures} lectures, {ENREGISTREMENT.itemsize} octets "
+              f"chacune, segments de {args.segment_mo} Mo ---")
+        print(f"écriture   : {args.lectures / duree:>12.0f} lectures/s  ({s['octets'] / duree / 1e6:.0f} Mo/s, "
+              f"{s['segments']} segments, {s['synchros']} fsync, ajout p99 {p99:.0f} µs)")
+
+        lecteur = LecteurJournal(f"{dossier}/wal")
+        debut = time.perf_counter()
+        total, somme = 0, 0.0
+        for numero in lecteur.segments():
+            e = lecteur.enregistrements(numero)
+            somme += float(e["valeur"][e["verdict"] == 1].sum())
+            total += len(e)
+        duree = time.perf_counter() - debut
+        assert total == args.lectures, "enregistrements perdus"
+        print(f"lecture    : {total / duree:>12.0f} lectures/s  (segments mappés en mémoire)")
+
+        store = ouvrir_store(f"{dossier}/series")
+        debut = time.perf_counter()
+        bilan = compacter(f"{dossier}/wal", store, tout=True)
+        duree = time.perf_counter() - debut
+        print(f"compaction : {total / duree:>12.0f} lectures/s  ({bilan['lectures']} acceptées versées "
+              f"dans {len(store.sensors())} séries, {bilan['segments']} segments supprimés)")
+    finally:
+        shutil.rmtree(dossier)
@@ -0,0 +1,85 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+# Limiteur S2 avec 1, 4 et 16 workers (processus séparés, comme gunicorn -w N) :
+#   - quota : chaque worker reçoit 20 requêtes du même attaquant ; avec
+#     "memory://" chacun compte de son côté (jusqu'à N fois le quota), avec
+#     le stockage partagé le quota (120/minute, client non suspect) vaut
+#     pour l'ensemble
+#   - surcoût : requêtes sous le quota (une adresse par tranche de 5) via
+#     le client de test Flask, limiteur désactivé / memory / sqlite
+ATTAQUE = 20
+
+
+def worker(uri, strategie, actif, requetes, numero, depart, sortie):
+    try:
+        sortie.put(_worker(uri, strategie, actif, requetes, numero, depart))
+    except Exception as e:
+        depart.abort()                       # les autres workers ne l'attendent pas
+        sortie.put(e)
+        raise
+
+
+def _worker(uri, strategie, actif, requetes, numero, depart):
+    os.environ["BMI_LIMITES_URI"] = uri
+    os.environ["BMI_LIMITES_STRATEGIE"] = strategie
+    import serveur_bmi_s2
+    serveur_bmi_s2.limiter.enabled = actif
+    client = serveur_bmi_s2.app.test_client()
+    depart.wait()
+    acceptees = sum(client.get("/predict/schuler", environ_base={"REMOTE_ADDR": "10.66.6.6"}).status_code == 200
+                    for _ in range(ATTAQUE))
+    depart.wait()
+    debut, cpu = time.perf_counter(), time.process_time()
+    for i in range(requetes):
+        adresse = f"10.{numero}.{i // 5 // 256 % 256}.{i // 5 % 256}"
+        assert client.get("/predict/schuler", environ_base={"REMOTE_ADDR": adresse}).status_code == 200
+    return acceptees, time.perf_counter() - debut, time.process_time() - cpu
+
+
+def mesurer(uri, strategie, actif, workers, requetes):
+    ctx = multiprocessing.get_context("spawn")
+    depart, sortie = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(uri, strategie, actif, requetes // workers, i, depart, sortie))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+    resultats = [sortie.get() for _ in procs]
+    for p in procs:
+        p.join()
+    for r in resultats:
+        if isinstance(r, Exception):
+            raise r
+    acceptees = sum(r[0] for r in resultats)
+    duree = max(r[1] for r in resultats)
+    cpu = sum(r[2] for r in resultats) / (requetes // workers * workers)
+    return acceptees, requetes // workers * workers / duree, cpu * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du limiteur S2 multi-workers")
+    parser.add_argument("--workers", default="1,4,16")
+    parser.add_argument("--requetes", type=int, default=8000, help="au total, réparties sur les workers")
+    parser.add_argument("--strategie", default="fixed-window", choices=("fixed-window", "sliding-window-counter"))
+    args = parser.parse_args()
+
+    dossier = tempfile.mkdtemp(prefix="limites_")
+    try:
+        print(f"--- BANC LIMITEUR S2 : {args.requetes} requêtes, quota 5/minute, {args.strategie}, "
+              f"{os.cpu_count()} CPU ---")
+        print(f"{'workers':>7} {'stockage':>9} {'attaquant acceptées':>20} {'requêtes/s':>11} "
+              f"{'CPU µs/req':>11} {'surcoût µs':>11}")
+        for n in (int(w) for w in args.workers.split(",")):
+            base = None
+            for nom, uri, actif in (("aucun", "memory://", False), ("memory", "memory://", True),
+                                    ("sqlite", f"sqlite:///{dossier}/limites_{n}.db", True)):
+                acceptees, debit, cpu = mesurer(uri, args.strategie, actif, n, args.requetes)
+                base = cpu if base is None else base
+                attaque = f"{acceptees}/{ATTAQUE * n}" if actif else "-"
+                print(f"{n:>7} {nom:>9} {attaque:>20} {debit:>11.0f} {cpu:>11.0f} {cpu - base:>11.0f}")
+    finally:
+        shutil.rmtree(dossier)
@@ -0,0 +1,84 @@
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+from service_prediction import MACHINES, ServicePrediction
+
+# Service de prédiction S2 sous 1000 clients simultanés (un thread par
+# client, comme les threads du serveur WSGI), chacun enchaînant --requetes
+# appels sur une machine tirée au hasard :
+#   direct        un predict_proba par requête (ancien schéma, sans lot ni cache)
+#   lots          requêtes regroupées, entrées toutes différentes, cache vidé
+#   lots + cache  requêtes regroupées, entrées tirées parmi --fenetres
+#                 points de fonctionnement (tableaux de bord qui rafraîchissent)
+# Débit en requêtes/s et latences p50 / p99 vues par le client.
+
+
+def entrees_clients(rng, clients, requetes, fenetres):
+    """Par client : liste de (machine, vecteur) ; fenetres=None → toutes différentes."""
+    machines = list(MACHINES)
+    if fenetres:
+        points = [(m, service.entrees(m, {v: rng.uniform(b, h) for v, (b, h, _) in MACHINES[m][1].items()}))
+                  for m in (machines[i % len(machines)] for i in range(fenetres))]
+        return [[points[i] for i in rng.integers(len(points), size=requetes)] for _ in range(clients)]
+    return [[(m, service.entrees(m, {v: rng.uniform(b, h) for v, (b, h, _) in MACHINES[m][1].items()}))
+             for m in (machines[i] for i in rng.integers(len(machines), size=requetes))]
+            for _ in range(clients)]
+
+
+def mesurer(appel, charges):
+    latences = [[] for _ in charges]
+    depart = threading.Barrier(len(charges) + 1)
+
+    def client(k):
+        depart.wait()
+        for machine, x in charges[k]:
+            debut = time.perf_counter()
+            appel(machine, x)
+            latences[k].append(time.perf_counter() - debut)
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(len(charges))]
+    for t in threads:
+        t.start()
+    depart.wait()
+    debut = time.perf_counter()
+    for t in threads:
+        t.join()
+    duree = time.perf_counter() - debut
+    tout = np.concatenate(latences) * 1e3
+    return len(tout) / duree, np.percentile(tout, 50), np.percentile(tout, 99)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du service de prédiction S2")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requetes", type=int, default=5, help="par client")
+    parser.add_argument("--fenetres", type=int, default=300, help="points distincts du cas « lots + cache »")
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args()
+    threading.stack_size(256 * 1024)
+    rng = np.random.default_rng(args.graine)
+
+    dossier = tempfile.mkdtemp(prefix="prediction_")
+    try:
+        service = ServicePrediction(dossier=dossier).charger()
+        print(f"--- BANC SERVICE DE PRÉDICTION S2 : {args.clients} clients × {args.requetes} requêtes, "
+              f"{len(MACHINES)} machines ---")
+        print(f"{'mode':>13} {'requêtes/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'lot moyen':>10} {'cache':>7}")
+
+        # Ancien schéma : chaque requête paie son appel sklearn
+        debit, p50, p99 = mesurer(lambda m, x: service.modeles[m].predict_proba([x])[0, 1],
+                                  entrees_clients(rng, args.clients, args.requetes, None))
+        print(f"{'direct':>13} {debit:>11.0f} {p50:>8.1f} {p99:>8.1f} {'1':>10} {'-':>7}")
+
+        for mode, fenetres, cache in (("lots", None, 0), ("lots + cache", args.fenetres, 10000)):
+            service = ServicePrediction(dossier=dossier, cache=cache).charger()
+            charges = entrees_clients(rng, args.clients, args.requetes, fenetres)
+            debit, p50, p99 = mesurer(service.predire, charges)
+            s = service.stats()
+            part = (s["cache"] + s["partagees"]) / s["requetes"]
+            print(f"{mode:>13} {debit:>11.0f} {p50:>8.1f} {p99:>8.1f} {s['lot_moyen']:>10} {part:>7.0%}")
+    finally:
+        shutil.rmtree(dossier)
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+import numpy as np
+from bench_detecteur import generer, qualite
+from detecteur_flux import DetecteurFlux
+from reentrainement import Reentraineur, Reservoirs
+from registre_modeles import RegistreModeles, entrainer
+
+# Réentraînement du bouclier S1 face à une dérive légitime (usure) :
+# rejeu étiqueté à débit fixe dans une boucle asyncio, avec ou sans
+# réentraînement, en mesurant les faux positifs par quart du rejeu, le
+# rappel des injections et le temps de traitement des lots (la boucle
+# d'ingestion ne doit jamais attendre un ajustement).
+LOT = 256
+
+
+async def rejouer(noms, valeurs, debit, noter, reentraineur):
+    verdicts = np.empty(len(valeurs), dtype=bool)
+    durees, retards = [], []
+    taches = []
+    if reentraineur:
+        reentraineur.demarrer()
+        taches.append(asyncio.create_task(reentraineur.boucle()))
+
+    async def sonde():                          # retard de la boucle asyncio
+        while True:
+            avant = time.perf_counter()
+            await asyncio.sleep(0.005)
+            retards.append(time.perf_counter() - avant - 0.005)
+    taches.append(asyncio.create_task(sonde()))
+
+    debut = time.perf_counter()
+    for i in range(0, len(valeurs), LOT):
+        retard = debut + i / debit - time.perf_counter()
+        await asyncio.sleep(max(retard, 0))
+        t0 = time.perf_counter()
+        capteurs, lot = list(noms[i:i + LOT]), valeurs[i:i + LOT]
+        verdicts[i:i + LOT] = noter(capteurs, lot)
+        if reentraineur:
+            reentraineur.observer(capteurs, lot, verdicts[i:i + LOT])
+        durees.append(time.perf_counter() - t0)
+    for tache in taches:
+        tache.cancel()
+    if reentraineur:
+        reentraineur.arreter()
+    return verdicts, np.array(durees) * 1000, np.array(retards) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc du réentraînement S1 (dérive légitime)")
+    parser.add_argument("--capteurs", type=int, default=20)
+    parser.add_argument("--lectures", type=int, default=20000, help="par capteur")
+    parser.add_argument("--derive", type=float, default=8.0, help="dérive sur le rejeu (σ)")
+    parser.add_argument("--debit", type=float, default=40000, help="lectures/s rejouées")
+    parser.add_argument("--mode", choices=("foret", "mixte"), default="foret")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    apprentissage = 1000
+    noms, _, valeurs, types, sains = generer(args.capteurs, args.lectures, apprentissage, rng, args.derive)
+    rang, vus = np.zeros(len(noms), dtype=np.int64), {}
+    for j, nom in enumerate(noms):
+        rang[j] = vus.get(nom, 0)
+        vus[nom] = rang[j] + 1
+    test = rang >= apprentissage
+    noms, valeurs, etiquettes = noms[test], valeurs[test], types[test]
+    quarts = np.array_split(np.arange(len(valeurs)), 4)
+
+    print(f"--- BANC RÉENTRAÎNEMENT S1 : {args.capteurs} capteurs, {len(valeurs)} lectures, "
+          f"dérive {args.derive:g} σ, {args.debit:.0f} lectures/s, mode {args.mode} ---")
+    print(f"{'réentr.':>8} {'FP Q1':>7} {'FP Q2':>7} {'FP Q3':>7} {'FP Q4':>7} {'rappel':>7} "
+          f"{'lot p99 ms':>11} {'lot max ms':>11} {'retard max ms':>14} {'modèles':>8}")
+    for avec in (False, True):
+        dossier = tempfile.mkdtemp(prefix="reentrainement_")
+        try:
+            registre = RegistreModeles(dossier)
+            for nom, historique in sains.items():
+                registre.enregistrer(str(nom), entrainer(historique))
+            reentraineur = None
+            if avec:
+                reentraineur = Reentraineur(registre, Reservoirs(graine=0), periode=2, verification=0.5)
+            if args.mode == "foret":
+                noter = registre.noter
+            else:
+                detecteur = DetecteurFlux()
+                for nom, historique in sains.items():
+                    detecteur.apprendre(detecteur.indices([nom] * len(historique)), historique)
+                noter = lambda c, v: detecteur.noter(c, v, registre.noter)
+            verdicts, durees, retards = asyncio.run(
+                rejouer(noms, valeurs, args.debit, noter, reentraineur))
+            alertes = ~verdicts
+            fp = [alertes[q][etiquettes[q] == 0].mean() for q in quarts]
+            _, rappel, _, _ = qualite(alertes, etiquettes)
+            n = reentraineur.stats()["reentrainements"] if reentraineur else 0
+            print(f"{'oui' if avec else 'non':>8} " + " ".join(f"{x:>7.4f}" for x in fp)
+                  + f" {rappel:>7.3f} {np.percentile(durees, 99):>11.2f} {durees.max():>11.2f}"
+                  f" {retards.max():>14.1f} {n:>8}")
+            if reentraineur:
+                s = reentraineur.stats()
+                print(f"         dérives {s['derives']} | planifiés {s['planifies']} | "
+                      f"réservoirs {s['memoire_mo']} Mo | échange max {s['echange_max_ms']:.3f} ms")
+        finally:
+            shutil.rmtree(dossier)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from registre_modeles import BouclierCompile, RegistreModeles, entrainer
+
+# Démarrage et mémoire du registre avec N modèles capteur :
+#   - ancien démarrage : ré-entraîner tous les modèles à chaque lancement
+#   - registre : ouverture (aucun modèle lu), puis premier passage sur tous
+#     les capteurs (chargement paresseux) avec un cache LRU borné ou non
+GRANDEURS = [(40, 60), (0, 120), (5, 15)]      # température, vibration, courant
+
+
+def historiques(n, lectures, rng):
+    for i in range(n):
+        bas, haut = GRANDEURS[i % len(GRANDEURS)]
+        centre = rng.uniform(bas, haut)
+        yield f"C{i:04d}", f"M{i // 4:03d}", rng.normal(centre, (haut - bas) / 20, lectures)
+
+
+def taille_dossier(dossier):
+    return sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(dossier) for f in fs)
+
+
+def premier_passage(dossier, capacite, capteurs, valeurs):
+    tracemalloc.start()
+    debut = time.perf_counter()
+    registre = RegistreModeles(dossier, capacite=capacite)
+    ouverture = time.perf_counter() - debut
+    registre.noter(capteurs, valeurs)
+    passage = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    courant = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return ouverture, passage, courant, pic, registre.stats()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc du registre de modèles S1")
+    parser.add_argument("--modeles", type=int, default=160)
+    parser.add_argument("--lectures", type=int, default=2000, help="historique par modèle")
+    parser.add_argument("--capacite", type=int, default=64)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dossier = tempfile.mkdtemp(prefix="registre_")
+    try:
+        series = list(historiques(args.modeles, args.lectures, rng))
+
+        debut = time.perf_counter()
+        modeles = [(capteur, machine, entrainer(v)) for capteur, machine, v in series]
+        ajustement = time.perf_counter() - debut
+
+        # Le modèle compilé rend exactement les scores de sklearn
+        foret = modeles[0][2]
+        x = np.r_[rng.uniform(-50, 200, 20000), BouclierCompile.depuis_foret(foret).bornes]
+        assert (BouclierCompile.depuis_foret(foret).decision_function(x)
+                == foret.decision_function(x.reshape(-1, 1))).all(), "scores compilés différents"
+
+        registre = RegistreModeles(dossier)
+        registre.associer({capteur: machine for capteur, machine, _ in series})
+        for capteur, _, modele in modeles:
+            registre.enregistrer(capteur, modele, lectures=args.lectures)
+        del registre, modeles
+
+        # Un passage : une lecture par capteur, dans un ordre quelconque
+        capteurs = [c for c, _, _ in series]
+        rng.shuffle(capteurs)
+        valeurs = rng.uniform(0, 120, len(capteurs))
+
+        print(f"--- BANC REGISTRE S1 : {args.modeles} modèles, disque {taille_dossier(dossier) / 1e6:.1f} Mo ---")
+        print(f"ancien démarrage (ré-entraînement de tous les modèles) : {ajustement * 1000:8.0f} ms")
+        print(f"{'capacité':>9} {'ouverture ms':>13} {'1er passage ms':>15} {'mémoire Mo':>11} "
+              f"{'pic Mo':>7} {'chargements':>12} {'évictions':>10}")
+        for capacite in (args.capacite, args.modeles):
+            ouverture, passage, courant, pic, s = premier_passage(dossier, capacite, capteurs, valeurs)
+            print(f"{capacite:>9} {ouverture * 1000:>13.1f} {passage * 1000:>15.0f} {courant / 1e6:>11.1f} "
+                  f"{pic / 1e6:>7.1f} {s['chargements']:>12} {s['evictions']:>10}")
+
+        # Régime établi : lots de 256 lectures sur tous les capteurs
+        registre = RegistreModeles(dossier, capacite=args.modeles)
+        registre.noter(capteurs, valeurs)
+        lot = [capteurs[i % len(capteurs)] for i in range(256)]
+        debut, notees = time.perf_counter(), 0
+        while time.perf_counter() - debut < 2:
+            registre.noter(lot, rng.uniform(0, 120, 256))
+            notees += 256
+        print(f"régime établi, lots de 256 sur {args.modeles} modèles : "
+              f"{notees / (time.perf_counter() - debut):.0f} lectures/s")
+    finally:
+        shutil.rmtree(dossier)
@@ -0,0 +1,91 @@
+import itertools
+import math
+import os
+import threading
+import numpy as np
+
+# Couche de confidentialité différentielle (S5) appliquée aux sorties :
+#   - paramètres calibrés une fois (écart-type du bruit) à la création du
+#     mécanisme, au lieu d'un objet diffprivlib par valeur
+#   - bruit tiré sur des tableaux NumPy entiers en un appel
+#   - un générateur PCG64 par (processus, thread). Sans graine (production) :
+#     entropie du système, tirée à nouveau dans chaque processus et thread,
+#     les workers forkés ne rejouent pas le même bruit. Graine fixe (bancs) :
+#     suite dérivée de (worker, rang du thread dans l'ordre de ses premiers
+#     tirages), reproductible d'une exécution à l'autre pour un même worker
+#     et un même ordre d'arrivée des threads (toujours vrai en mono-thread).
+#     Un processus forké sans indice `worker` explicite retombe sur son pid :
+#     bruit distinct de celui du parent, mais plus reproductible
+# Calibrage identique à diffprivlib :
+#   gaussien  σ = √(2 ln(1,25/δ)) · Δ / ε   (ε ≤ 1)
+#   laplace   b = Δ / ε
+MECANISMES = ("gaussien", "laplace")
+
+
+class MecanismeVectoriel:
+
+    def __init__(self, mecanisme="gaussien", epsilon=0.1, delta=0.01, sensibilite=0.05, bornes=None, graine=None,
+                 worker=None):
+        """
+        bornes : (min, max) de la grandeur publiée ; le bruit est ajouté puis tronqué (post-traitement).
+        worker : indice stable du processus (0, 1, ...) pour une graine fixe sur plusieurs workers.
+        """
+        if mecanisme not in MECANISMES:
+            raise ValueError(f"mécanisme inconnu : {mecanisme} (attendus : {', '.join(MECANISMES)})")
+        if epsilon <= 0 or sensibilite <= 0:
+            raise ValueError("epsilon et sensibilité doivent être strictement positifs")
+        if mecanisme == "gaussien":
+            if epsilon > 1 or not 0 < delta < 1:
+                raise ValueError("mécanisme gaussien : epsilon dans ]0, 1] et delta dans ]0, 1[")
+            self.echelle = math.sqrt(2 * math.log(1.25 / delta)) * sensibilite / epsilon
+        else:
+            delta = 0.0
+            self.echelle = sensibilite / epsilon
+        self.mecanisme = mecanisme
+        self.epsilon = epsilon
+        self.delta = delta
+        self.sensibilite = sensibilite
+        self.bornes = bornes
+        self.graine = graine
+        self.worker = worker
+        self._origine = self._pid = os.getpid()      # processus créateur / dernier vu
+        self._rangs = itertools.count()
+        self._local = threading.local()
+
+    def _generateur(self):
+        rng = getattr(self._local, "rng", None)
+        if rng is None or self._local.pid != os.getpid():
+            pid = os.getpid()
+            if self.graine is None:
+                sequence = np.random.SeedSequence()
+            else:
+                if pid != self._pid:                 # premier tirage après un fork
+                    self._pid, self._rangs = pid, itertools.count()
+                worker = self.worker if self.worker is not None else (0 if pid == self._origine else pid)
+                sequence = np.random.SeedSequence(self.graine, spawn_key=(worker, next(self._rangs)))
+            rng = self._local.rng = np.random.Generator(np.random.PCG64(sequence))
+            self._local.pid = pid
+        return rng
+
+    def bruiter(self, valeurs):
+        """Tableau (ou scalaire) de valeurs → mêmes valeurs bruitées, en un seul tirage."""
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        rng = self._generateur()
+        if self.mecanisme == "gaussien":
+            sortie = rng.standard_normal(valeurs.shape)
+        else:
+            sortie = rng.laplace(0.0, 1.0, valeurs.shape)
+        sortie *= self.echelle
+        sortie += valeurs
+        if self.bornes is not None:
+            np.clip(sortie, *self.bornes, out=sortie)
+        return sortie if sortie.ndim else float(sortie)
+
+    __call__ = bruiter
+
+    def variance(self):
+        return self.echelle ** 2 if self.mecanisme == "gaussien" else 2 * self.echelle ** 2
+
+    def __repr__(self):
+        return (f"MecanismeVectoriel({self.mecanisme}, ε={self.epsilon}, δ={self.delta}, "
+                f"Δ={self.sensibilite}, échelle={self.echelle:.4g})")
@@ -0,0 +1,167 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from stockage_limites import connecter
+
+# Comptable du budget de confidentialité (S5) : sans lui, un client qui
+# repose la même question moyenne le bruit et retrouve la valeur réelle.
+#   - par (client, grandeur protégée) : nombre de réponses bruitées fraîches
+#     reçues, dans une table SQLite (mode WAL) commune à tous les workers de
+#     l'hôte, comme les compteurs de limites (stockage_limites.py) : une
+#     réponse fraîche est un seul UPSERT ... RETURNING qui n'incrémente que
+#     sous la limite, atomique d'un worker à l'autre, et la base survit aux
+#     redémarrages
+#   - composition : chaque grandeur a un mécanisme (ε, δ) fixe par réponse ;
+#     le nombre de réponses permises est calculé une fois à la déclaration,
+#     au mieux de la composition simple (kε, kδ) et de la composition avancée
+#     (ε√(2k ln(1/δ')) + kε(eᵉ − 1), kδ + δ') ; le contrôle par requête est
+#     une comparaison d'entiers
+#   - en mémoire, les compteurs des CLIENTS_MAX couples les plus récents
+#     (LRU) : un compteur ne fait que croître, un budget vu épuisé est
+#     refusé sans interroger la base
+#   - cache LRU (grandeur, requête) → réponse bruitée, propre au worker :
+#     une question déjà posée reçoit la même réponse et ne consomme pas de budget
+FICHIER_BUDGET = "budgets_s5.db"
+EPSILON_MAX = 1.0           # budget par client et par grandeur
+DELTA_MAX   = 0.1
+CACHE       = 10000         # réponses bruitées gardées
+CLIENTS_MAX = 100_000       # compteurs (client, grandeur) gardés en mémoire
+_REPONSES_MAX = np.iinfo(np.uint16).max
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS budgets (
+    client TEXT NOT NULL, grandeur TEXT NOT NULL, reponses INTEGER NOT NULL,
+    PRIMARY KEY (client, grandeur)
+) WITHOUT ROWID"""
+_CONSOMMER = """INSERT INTO budgets VALUES (:client, :grandeur, 1) ON CONFLICT(client, grandeur)
+    DO UPDATE SET reponses = reponses + 1 WHERE reponses < :permises
+    RETURNING reponses"""
+
+
+class BudgetEpuise(Exception):
+    pass
+
+
+def composer(k, epsilon, delta, delta_prime=0.0):
+    """(ε, δ) cumulés de k réponses (ε, δ) : composition simple, ou avancée si delta_prime > 0."""
+    if delta_prime <= 0 or k == 0:
+        return k * epsilon, k * delta
+    return (epsilon * math.sqrt(2 * k * math.log(1 / delta_prime)) + k * epsilon * math.expm1(epsilon),
+            k * delta + delta_prime)
+
+
+class ComptableBudget:
+
+    def __init__(self, fichier=FICHIER_BUDGET, epsilon_max=EPSILON_MAX, delta_max=DELTA_MAX,
+                 cache=CACHE, clients_max=CLIENTS_MAX):
+        """fichier=None : base en mémoire, propre au processus (bancs, démonstration)."""
+        self.fichier = fichier
+        self.epsilon_max = epsilon_max
+        self.delta_max = delta_max
+        self.delta_prime = delta_max / 2          # part de δ réservée à la composition avancée
+        self.capacite_cache = cache
+        self.clients_max = clients_max
+        self.grandeurs = {}                       # grandeur → (ε, δ, réponses permises)
+        self._consommees = OrderedDict()          # (client, grandeur) → réponses consommées (LRU)
+        self._cache = OrderedDict()
+        self._verrou = threading.Lock()
+        self._base = None
+        self._pid = None
+        self.compteurs = {"requetes": 0, "cache": 0, "fraiches": 0, "refusees": 0, "base": 0}
+
+    # ── Déclaration et composition ───────────────────────────────
+    def cumul(self, k, epsilon, delta):
+        """(ε, δ) cumulés de k réponses : meilleure composition tenant dans delta_max."""
+        candidats = [composer(k, epsilon, delta), composer(k, epsilon, delta, self.delta_prime)]
+        valides = [c for c in candidats if c[1] <= self.delta_max] or candidats[:1]
+        return min(valides)
+
+    def permises(self, epsilon, delta):
+        """Plus grand k dont la composition reste dans (epsilon_max, delta_max) (recherche dichotomique)."""
+        def dans_budget(k):
+            e, d = self.cumul(k, epsilon, delta)
+            return e <= self.epsilon_max and d <= self.delta_max
+        bas, haut = 0, _REPONSES_MAX
+        while bas < haut:
+            milieu = (bas + haut + 1) // 2
+            bas, haut = (milieu, haut) if dans_budget(milieu) else (bas, milieu - 1)
+        return bas
+
+    def declarer(self, grandeur, epsilon, delta=0.0):
+        """Grandeur protégée publiée par un mécanisme (epsilon, delta) par réponse ; retourne k permis."""
+        k = self.permises(epsilon, delta)
+        with self._verrou:
+            self.grandeurs[grandeur] = (epsilon, delta, k)
+        return k
+
+    # ── Base partagée ────────────────────────────────────────────
+    def _connexion(self):
+        """Appelée sous le verrou ; rouverte après fork() dans chaque worker."""
+        if self._pid != os.getpid():
+            self._base = connecter(self.fichier or ":memory:", _SCHEMA)
+            self._pid = os.getpid()
+        return self._base
+
+    def charger(self):
+        """Ouvre (ou crée) la base : les réponses déjà consommées y restent d'un démarrage à l'autre."""
+        with self._verrou:
+            self._connexion()
+        return self
+
+    def _retenir(self, compte, reponses):
+        self._consommees[compte] = reponses
+        self._consommees.move_to_end(compte)
+        if len(self._consommees) > self.clients_max:
+            self._consommees.popitem(last=False)
+
+    # ── Côté requête ─────────────────────────────────────────────
+    def repondre(self, client, grandeur, requete, calculer):
+        """
+        Réponse bruitée à (grandeur, requete) pour client. Déjà posée : réponse
+        en cache, sans coût. Sinon une réponse du budget est consommée puis
+        calculer() est appelé. BudgetEpuise si le client n'en a plus.
+        """
+        cle, compte = (grandeur, requete), (client, grandeur)
+        permises = self.grandeurs[grandeur][2]
+        with self._verrou:
+            self.compteurs["requetes"] += 1
+            if cle in self._cache:
+                self._cache.move_to_end(cle)
+                self.compteurs["cache"] += 1
+                return self._cache[cle]
+            # Un compteur ne fait que croître : épuisé en mémoire, épuisé en base
+            if self._consommees.get(compte, 0) < permises:
+                self.compteurs["base"] += 1
+                ligne = self._connexion().execute(
+                    _CONSOMMER, {"client": client, "grandeur": grandeur, "permises": permises}).fetchone()
+                self._retenir(compte, ligne[0] if ligne else permises)
+            else:
+                ligne = None
+            if ligne is None:
+                self.compteurs["refusees"] += 1
+                raise BudgetEpuise(f"budget épuisé pour {client} sur {grandeur}")
+            self.compteurs["fraiches"] += 1
+        # Calcul hors verrou ; deux requêtes identiques simultanées coûtent chacune une réponse
+        valeur = calculer()
+        with self._verrou:
+            valeur = self._cache.setdefault(cle, valeur)
+            while len(self._cache) > self.capacite_cache:
+                self._cache.popitem(last=False)
+        return valeur
+
+    def depense(self, client, grandeur):
+        """Budget consommé par client sur grandeur (lu dans la base : tous workers confondus)."""
+        epsilon, delta, permises = self.grandeurs[grandeur]
+        with self._verrou:
+            ligne = self._connexion().execute("SELECT reponses FROM budgets WHERE client = ? AND grandeur = ?",
+                                              (client, grandeur)).fetchone()
+        k = ligne[0] if ligne else 0
+        e, d = self.cumul(k, epsilon, delta)
+        return {"reponses": k, "restantes": permises - k, "epsilon": round(e, 4), "delta": round(d, 6)}
+
+    def stats(self):
+        with self._verrou:
+            clients = self._connexion().execute("SELECT COUNT(DISTINCT client) FROM budgets").fetchone()[0]
+        return {**self.compteurs, "clients": clients, "grandeurs": len(self.grandeurs),
+                "en_cache": len(self._cache), "en_memoire": len(self._consommees)}
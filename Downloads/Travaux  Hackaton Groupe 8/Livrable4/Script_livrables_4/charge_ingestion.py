@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import random
+import time
+import numpy as np
+
+# Générateur de charge pour plateforme_centrale.py : P producteurs, chacun
+# sur une connexion persistante, envoient des lots de lectures
+# "capteur;ts;valeur" et lisent les verdicts pour mesurer la latence
+# (ts d'émission → réception du verdict). Au plus EN_VOL lectures sans
+# verdict par producteur : la charge suit la capacité du serveur.
+SERVER_IP   = "127.0.0.1"
+SERVER_PORT = 9999
+LOT         = 100        # lectures par écriture
+EN_VOL      = 2000       # lectures sans verdict max par producteur
+
+
+async def producteur(numero, fin, resultats, debit):
+    reader, writer = await asyncio.open_connection(SERVER_IP, SERVER_PORT)
+    capteurs = [f"P{numero:02d}-T{i:03d}" for i in range(10)]
+    envoyees, recues, latences = 0, 0, []
+    place = asyncio.Event()
+    place.set()
+
+    async def recevoir():
+        nonlocal recues
+        reste = b""
+        while True:
+            bloc = await reader.read(65536)
+            if not bloc:
+                return
+            lignes = (reste + bloc).split(b"\n")
+            reste = lignes.pop()
+            maintenant = time.time()
+            for ligne in lignes:
+                champs = ligne.split(b";")
+                if len(champs) == 3:
+                    latences.append(maintenant - float(champs[1]))
+            recues += len(lignes)
+            if envoyees - recues < EN_VOL:
+                place.set()
+
+    tache = asyncio.create_task(recevoir())
+    debut = time.time()
+    while time.time() < fin:
+        await place.wait()
+        if debit:                       # débit cible : on attend l'heure du prochain lot
+            retard = debut + envoyees / debit - time.time()
+            if retard > 0:
+                await asyncio.sleep(retard)
+        maintenant = time.time()
+        lignes = [f"{random.choice(capteurs)};{maintenant:.6f};{random.uniform(40.0, 60.0):.2f}\n"
+                  for _ in range(LOT)]
+        writer.write("".join(lignes).encode())
+        envoyees += LOT
+        if envoyees - recues >= EN_VOL:
+            place.clear()
+        await writer.drain()
+
+    # Attendre les derniers verdicts (2 s max)
+    limite = time.time() + 2
+    while recues < envoyees and time.time() < limite:
+        await asyncio.sleep(0.01)
+    tache.cancel()
+    writer.close()
+    resultats.append((recues, latences))
+
+
+async def palier(producteurs, duree, debit):
+    resultats = []
+    debut = time.time()
+    await asyncio.gather(*(producteur(i, debut + duree, resultats, debit) for i in range(producteurs)))
+    ecoule = time.time() - debut
+    recues = sum(r for r, _ in resultats)
+    latences = np.concatenate([np.asarray(l) for _, l in resultats if l]) * 1000 if recues else np.zeros(1)
+    return recues / ecoule, np.percentile(latences, 50), np.percentile(latences, 99)
+
+
+async def main(paliers, duree, debit):
+    print("--- CHARGE INGESTION BMI (S1) ---")
+    print(f"débit cible : {f'{debit} lectures/s par producteur' if debit else 'maximum'}")
+    print(f"{'producteurs':>11} {'lectures/s':>12} {'p50 ms':>9} {'p99 ms':>9}")
+    for p in paliers:
+        mesure, p50, p99 = await palier(p, duree, debit)
+        print(f"{p:>11} {mesure:>12.0f} {p50:>9.1f} {p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Charge de la plateforme d'ingestion S1")
+    parser.add_argument("--producteurs", default="1,2,4,8,16", help="paliers, ex. 1,2,4,8")
+    parser.add_argument("--duree", type=float, default=5, help="secondes par palier")
+    parser.add_argument("--debit", type=float, default=0, help="lectures/s par producteur (0 = maximum)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    SERVER_PORT = args.port
+    asyncio.run(main([int(p) for p in args.producteurs.split(",")], args.duree, args.debit))
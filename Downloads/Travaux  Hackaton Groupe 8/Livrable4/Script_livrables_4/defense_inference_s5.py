@@ -1,15 +1,41 @@
+import zlib
 import numpy as np
-from diffprivlib.mechanisms import Gaussian
+from bruit_differentiel import MecanismeVectoriel
 
 # Valeur réelle de la production stratégique (95%)
 cadence_reelle = 0.95 
 
+# Ajout d'un bruit différentiel (mécanisme Gaussien), calibré une fois
+# epsilon bas = plus de protection / epsilon haut = plus de précision
+dp_mechanism = MecanismeVectoriel("gaussien", epsilon=0.1, delta=0.01, sensibilite=0.05)
+
 def obtenir_cadence_securisee(valeur):
-    # Ajout d'un bruit différentiel (mécanisme Gaussien)
-    # epsilon bas = plus de protection / epsilon haut = plus de précision
-    dp_mechanism = Gaussian(epsilon=0.1, delta=0.01, sensitivity=0.05)
-    return dp_mechanism.randomise(valeur)
-
-print(f"--- SYSTÈME DE PROTECTION BMI (S5) ---")
-print(f"Valeur brute (Confidentielle) : {cadence_reelle * 100}%")
-print(f"Valeur envoyée à l'API (Bruitée) : {round(obtenir_cadence_securisee(cadence_reelle) * 100, 2)}%")
+    # Scalaire ou tableau NumPy de cadences : un seul tirage vectoriel
+    return dp_mechanism.bruiter(valeur)
+
+def cadence_du_jour(machine, jour):
+    # Cadence réelle (confidentielle) d'une machine un jour donné : autour de 95%
+    return cadence_reelle - 0.05 * (zlib.crc32(f"{machine}/{jour}".encode()) % 1000) / 1000
+
+if __name__ == "__main__":
+    from budget_confidentialite import BudgetEpuise, ComptableBudget
+
+    print(f"--- SYSTÈME DE PROTECTION BMI (S5) ---")
+    print(f"Valeur brute (Confidentielle) : {cadence_reelle * 100}%")
+    print(f"Valeur envoyée à l'API (Bruitée) : {round(obtenir_cadence_securisee(cadence_reelle) * 100, 2)}%")
+
+    # Un espion repose la même question puis varie les jours pour moyenner le bruit
+    budget = ComptableBudget(fichier=None)
+    permises = budget.declarer("cadence", dp_mechanism.epsilon, dp_mechanism.delta)
+    print(f"Budget par client : ε={budget.epsilon_max}, δ={budget.delta_max} → {permises} réponses fraîches")
+    reponses = []
+    for essai in range(20):
+        jour = "2026-01-05" if essai < 5 else f"2026-01-{essai:02d}"
+        try:
+            reponses.append(budget.repondre("espion", "cadence", ("PRESSE-SCH", jour),
+                                            lambda: obtenir_cadence_securisee(cadence_du_jour("PRESSE-SCH", jour))))
+        except BudgetEpuise as e:
+            print(f"Requête {essai + 1} : REFUSÉE ({e})")
+            break
+    print(f"Réponses obtenues : {len(reponses)}, dont {len(set(reponses))} distinctes ; "
+          f"dépense : {budget.depense('espion', 'cadence')}")
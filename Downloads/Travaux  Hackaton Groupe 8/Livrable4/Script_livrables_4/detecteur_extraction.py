@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# Détecteur d'extraction de modèle (S2) : une empreinte de taille fixe par
+# client (et par sous-réseau /24, pour l'extraction répartie sur plusieurs
+# adresses), mise à jour en O(1) à chaque requête :
+#   - chaque entrée est ramenée à une case (CASES intervalles par variable
+#     sur le domaine de fonctionnement déclaré)
+#   - count-min sketch des cases interrogées (PROFONDEUR × LARGEUR compteurs)
+#   - couverture : cases distinctes sur un bitmap de BITS bits (exact si le
+#     domaine a au plus BITS cases, sinon comptage linéaire)
+#   - entropie des requêtes : Σ c·log c tenu à jour depuis le sketch
+# Un tableau de bord interroge souvent les mêmes points de fonctionnement
+# (peu de cases, forte répétition) ; une extraction balaie le domaine avec
+# une répartition quasi uniforme (entropie maximale), et se voit :
+#   - vite, si presque chaque requête tombe dans une case neuve
+#   - ou quand elle couvre COUVERTURE_MIN des cases observables, même en
+#     reposant chaque point ou sur une grille plus fine que les cases
+# Le volume seul ne rend donc pas un client suspect.
+# Un verdict suspect dure QUARANTAINE secondes, puis l'empreinte repart de
+# zéro. Celui d'un /24 ne s'applique qu'aux adresses qui balaient elles
+# aussi le domaine (requêtes réparties uniformément, en bonne part sur des
+# cases neuves) : un tableau de bord voisin d'une extraction répartie
+# n'est pas limité.
+CASES        = 8            # intervalles par variable
+LARGEUR      = 256          # compteurs par ligne du sketch
+PROFONDEUR   = 4
+BITS         = 1024         # bitmap des cases visitées
+CLIENTS_MAX  = 4096         # empreintes gardées (LRU) : mémoire bornée
+MIN_REQUETES = 12           # requêtes avant de juger un client
+CASES_MIN    = 10           # cases distinctes au moins...
+NOUVEAUTE_MIN = 0.6         # ...60 % au moins des requêtes tombent dans une case neuve...
+COUVERTURE_MIN = 0.2        # ...ou 20 % des cases observables couvertes...
+ENTROPIE_MIN = 0.9          # ...et répartition quasi uniforme (entropie / maximum)
+QUARANTAINE  = 3600.0       # secondes de suspicion avant remise à zéro de l'empreinte
+_MASQUE = (1 << 64) - 1
+
+
+def _melanger(x):
+    """splitmix64 : numéro de case → 64 bits pseudo-aléatoires."""
+    x = (x + 0x9E3779B97F4A7C15) & _MASQUE
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASQUE
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASQUE
+    return x ^ (x >> 31)
+
+
+def sous_reseau(client):
+    """'10.1.2.3' → '10.1.2.0/24' ; autre identifiant : lui-même."""
+    morceaux = client.split(".")
+    return ".".join(morceaux[:3]) + ".0/24" if len(morceaux) == 4 else client
+
+
+class Empreinte:
+    """Sketch, bitmap et compteurs d'un client (≈ 2,2 ko)."""
+
+    __slots__ = ("sketch", "bitmap", "zeros", "requetes", "somme_clogc", "suspect")
+
+    def __init__(self):
+        self.sketch = array("H", bytes(2 * PROFONDEUR * LARGEUR))
+        self.bitmap = bytearray(BITS // 8)
+        self.zeros = BITS
+        self.requetes = 0
+        self.somme_clogc = 0.0
+        self.suspect = 0.0                   # fin de la suspicion (time.monotonic), 0 : jamais
+
+    def ajouter(self, positions, bit):
+        """positions : une case du sketch par ligne ; bit : case dans le bitmap."""
+        sketch = self.sketch
+        c = min(sketch[p] for p in positions)
+        if c < 65535:
+            for p in positions:                  # mise à jour conservatrice
+                if sketch[p] == c:
+                    sketch[p] = c + 1
+            self.somme_clogc += (c + 1) * math.log(c + 1) - (c * math.log(c) if c else 0.0)
+        octet, masque = bit >> 3, 1 << (bit & 7)
+        if not self.bitmap[octet] & masque:
+            self.bitmap[octet] |= masque
+            self.zeros -= 1
+        self.requetes += 1
+
+    def cases(self, exact):
+        """Cases distinctes : bits à un, ou comptage linéaire -m·ln(bits à zéro / m)."""
+        if exact:
+            return BITS - self.zeros
+        return -BITS * math.log(max(self.zeros, 1) / BITS)
+
+    def entropie(self, cases):
+        """Entropie des cases interrogées, rapportée à son maximum (0..1)."""
+        n = self.requetes
+        maximum = math.log(min(n, max(cases, 1)))
+        if n < 2 or maximum <= 0:
+            return 0.0
+        return max(0.0, min(1.0, (math.log(n) - self.somme_clogc / n) / maximum))
+
+
+class DetecteurExtraction:
+
+    def __init__(self, domaine, cases=CASES, clients_max=CLIENTS_MAX, quarantaine=QUARANTAINE):
+        """domaine : {variable: (min, max)} de fonctionnement de la machine."""
+        self.variables = list(domaine)
+        self.bornes = [(domaine[v][0], (domaine[v][1] - domaine[v][0]) / cases) for v in self.variables]
+        self.cases_par_variable = cases
+        self.total_cases = cases ** len(self.variables)
+        self.exact = self.total_cases <= BITS        # une case = un bit, pas d'estimation
+        self.clients_max = clients_max
+        self.quarantaine = quarantaine
+        self._empreintes = OrderedDict()
+        self._verrou = threading.Lock()
+        self.compteurs = {"requetes": 0, "suspects": 0, "expirations": 0, "evictions": 0}
+
+    def case(self, entrees):
+        """Numéro de case d'une entrée {variable: valeur} (hors domaine : case de bord)."""
+        numero, dernier = 0, self.cases_par_variable - 1
+        for v, (bas, pas) in zip(self.variables, self.bornes):
+            numero = numero * self.cases_par_variable + min(max(int((float(entrees[v]) - bas) // pas), 0), dernier)
+        return numero
+
+    def _hacher(self, case):
+        h = _melanger(case)
+        positions = [r * LARGEUR + (h >> (16 * r)) % LARGEUR for r in range(PROFONDEUR)]
+        return positions, case if self.exact else _melanger(h) % BITS
+
+    def _empreinte(self, cle, maintenant):
+        empreinte = self._empreintes.get(cle)
+        if empreinte is not None and 0 < empreinte.suspect <= maintenant:
+            # Quarantaine écoulée : le client repart d'une empreinte vierge
+            empreinte = self._empreintes[cle] = Empreinte()
+            self.compteurs["expirations"] += 1
+            self._empreintes.move_to_end(cle)
+        elif empreinte is None:
+            empreinte = self._empreintes[cle] = Empreinte()
+            if len(self._empreintes) > self.clients_max:
+                self._empreintes.popitem(last=False)
+                self.compteurs["evictions"] += 1
+        else:
+            self._empreintes.move_to_end(cle)
+        return empreinte
+
+    def _juger(self, e, maintenant):
+        if e.suspect or e.requetes < MIN_REQUETES:
+            return bool(e.suspect)
+        cases = e.cases(self.exact)
+        rapide = cases >= CASES_MIN and cases / e.requetes >= NOUVEAUTE_MIN
+        couvrante = cases / min(self.total_cases, BITS) >= COUVERTURE_MIN
+        if (rapide or couvrante) and e.entropie(cases) >= ENTROPIE_MIN:
+            e.suspect = maintenant + self.quarantaine
+            self.compteurs["suspects"] += 1
+        return bool(e.suspect)
+
+    def _balaie(self, e):
+        """Empreinte propre non triviale : requêtes uniformes, en bonne part sur des cases neuves."""
+        if e is None:
+            return False
+        cases = e.cases(self.exact)
+        return (cases / max(e.requetes, 1) >= NOUVEAUTE_MIN / 2
+                and (e.requetes < 2 or e.entropie(cases) >= ENTROPIE_MIN))
+
+    def observer(self, client, entrees):
+        """
+        Intègre une requête. Retourne True si elle fait basculer le client
+        (ou son /24) en suspect ; l'état courant se lit par suspect().
+        """
+        positions, bit = self._hacher(self.case(entrees))
+        maintenant = time.monotonic()
+        with self._verrou:
+            self.compteurs["requetes"] += 1
+            bascule = False
+            for cle in (client, sous_reseau(client)):
+                e = self._empreinte(cle, maintenant)
+                e.ajouter(positions, bit)
+                bascule = (not e.suspect and self._juger(e, maintenant)) or bascule
+            return bascule
+
+    def suspect(self, client):
+        maintenant = time.monotonic()
+        with self._verrou:
+            e = self._empreintes.get(client)
+            if e is not None and e.suspect > maintenant:
+                return True
+            reseau = self._empreintes.get(sous_reseau(client))
+            return (reseau is not None and reseau is not e and reseau.suspect > maintenant
+                    and self._balaie(e))
+
+    def etat(self, client):
+        with self._verrou:
+            e = self._empreintes.get(client)
+            if e is None:
+                return None
+            cases = e.cases(self.exact)
+            return {"requetes": e.requetes, "cases": round(cases, 1),
+                    "couverture": round(cases / self.total_cases, 4),
+                    "nouveaute": round(cases / max(e.requetes, 1), 3),
+                    "entropie": round(e.entropie(cases), 3), "suspect": e.suspect > time.monotonic()}
+
+    def stats(self):
+        octets = PROFONDEUR * LARGEUR * 2 + BITS // 8
+        return {**self.compteurs, "empreintes": len(self._empreintes),
+                "memoire_ko": round(len(self._empreintes) * octets / 1024)}
@@ -0,0 +1,257 @@
+import numpy as np
+
+# Détecteur en flux (S1) : état O(1) par capteur, dans des tableaux NumPy
+# indexés par capteur, mis à jour par lots vectorisés.
+# Référence du capteur (n'apprend que des lectures acceptées : une
+# injection rejetée ne la déplace pas) :
+#   - Welford        moyenne / écart type (mémoire ~FENETRE lectures)
+#   - médiane / MAD  estimées en ligne (approximation stochastique)
+#   - variation      moyenne exponentielle de |x - lecture précédente|
+# Suivi court terme (toutes les lectures, écrêtées à ±ECRETAGE σ) :
+#   - EWMA           carte de contrôle : niveau récent vs médiane, en
+#                    unités de l'écart habituel (au moins σ·√(α/(2-α)),
+#                    davantage pour un capteur à cycle machine) ; voit
+#                    rafales et rampes qu'aucune lecture isolée ne trahit
+# Score = max(z robuste, z EWMA, z variation). Sous SEUIL_BAS : acceptée ;
+# au-dessus de SEUIL_HAUT : rejetée ; entre les deux : cas limite, confié
+# au second étage (Isolation Forest).
+# Capteur en chauffe (moins de MIN_OBS lectures apprises) : le flux ne sait
+# rien en juger, chaque lecture passe par le juge de chauffe (Isolation
+# Forest du capteur, de sa machine ou par défaut) ; sans juge ou sans avis
+# elle est rejetée. Seules les lectures validées sont apprises : une
+# attaque envoyée avant les lectures saines ne devient pas la référence.
+# Une lecture non finie (NaN, ±inf) ou d'un capteur au-delà de
+# CAPTEURS_MAX est rejetée d'office et n'entre jamais dans l'état.
+ALPHA      = 0.05       # poids EWMA d'une lecture
+ALPHA_ECART = 0.01      # poids d'un lot dans l'écart habituel EWMA / médiane
+ETA        = 0.05       # pas de l'estimation en ligne médiane / MAD (× MAD)
+FENETRE    = 1000       # mémoire effective de Welford (lectures)
+MIN_OBS    = 30         # lectures avant de juger un capteur
+ECRETAGE   = 4.0        # une lecture pèse au plus ±4 σ dans l'EWMA
+SEUIL_BAS  = 3.5
+SEUIL_HAUT = 6.0
+CAPTEURS_MAX = 65536    # capteurs suivis au plus (les suivants sont rejetés)
+_MAD_SIGMA = 1.4826     # σ ≈ 1.4826 × MAD pour une loi normale
+_ABS_SIGMA = 1.2533     # σ ≈ 1.2533 × E|x - μ|
+_ABS_MAD   = 0.8453     # MAD ≈ 0.8453 × E|x - μ|
+
+
+def indices_bornes(index, capteurs, capteurs_max, capacite, agrandir):
+    """
+    Lignes des capteurs dans des tableaux indexés par capteur (-1 : plus de
+    place). Un capteur inconnu prend la ligne suivante tant que l'index a
+    moins de capteurs_max entrées ; au-delà de capacite lignes, agrandir()
+    reçoit la nouvelle capacité (doublée, au plus capteurs_max).
+    Partagé par DetecteurFlux et les réservoirs de reentrainement.py.
+    """
+    idx = [index.get(c, -1) for c in capteurs]
+    if -1 in idx:
+        for j, i in enumerate(idx):
+            if i < 0:
+                i = index.get(capteurs[j], -1)
+                if i < 0 and len(index) < capteurs_max:
+                    i = index[capteurs[j]] = len(index)
+                idx[j] = i
+        if len(index) > capacite:
+            agrandir(min(2 * len(index), capteurs_max))
+    return np.asarray(idx, dtype=np.int64)
+
+
+class DetecteurFlux:
+
+    CHAMPS = ("n", "moyenne", "m2", "ewma", "ecart_niveau", "mediane", "mad", "derniere", "variation")
+
+    def __init__(self, capacite=1024, seuil_bas=SEUIL_BAS, seuil_haut=SEUIL_HAUT, min_obs=MIN_OBS,
+                 capteurs_max=CAPTEURS_MAX):
+        self.seuil_bas  = seuil_bas
+        self.seuil_haut = seuil_haut
+        self.min_obs    = min_obs
+        self.capteurs_max = capteurs_max
+        self.index = {}                              # capteur → ligne des tableaux
+        self.n = np.zeros(min(capacite, capteurs_max), dtype=np.int64)
+        for champ in self.CHAMPS[1:]:
+            setattr(self, champ, np.zeros(capacite))
+        self.derniere[:] = np.nan
+        self.compteurs = {"lectures": 0, "acceptees": 0, "rejetees": 0, "second_etage": 0,
+                          "chauffe": 0, "non_finies": 0, "hors_capacite": 0}
+
+    # ── Index des capteurs ───────────────────────────────────────
+    def indices(self, capteurs):
+        """Lignes des capteurs (-1 : plus de place)."""
+        return indices_bornes(self.index, capteurs, self.capteurs_max, len(self.n), self._agrandir)
+
+    def _agrandir(self, capacite):
+        for champ in self.CHAMPS:
+            ancien = getattr(self, champ)
+            nouveau = np.full(capacite, np.nan if champ == "derniere" else 0, dtype=ancien.dtype)
+            nouveau[:len(ancien)] = ancien
+            setattr(self, champ, nouveau)
+
+    # ── Scores ───────────────────────────────────────────────────
+    def _precedentes(self, idx, valeurs):
+        """Lecture précédente du même capteur : dans le lot si possible, sinon l'état."""
+        ordre = np.argsort(idx, kind="stable")
+        tries = idx[ordre]
+        prec = np.empty(len(idx))
+        prec[ordre] = np.r_[np.nan, valeurs[ordre][:-1]]
+        premier = np.empty(len(idx), dtype=bool)
+        premier[ordre] = np.r_[True, tries[1:] != tries[:-1]]
+        prec[premier] = self.derniere[idx[premier]]
+        return prec
+
+    def _ecreter(self, idx, valeurs):
+        sigma = np.maximum(_MAD_SIGMA * self.mad[idx], 1e-9)
+        mediane = self.mediane[idx]
+        return np.clip(valeurs, mediane - ECRETAGE * sigma, mediane + ECRETAGE * sigma)
+
+    def scores(self, idx, valeurs):
+        """z combiné par lecture, d'après l'état avant le lot. NaN = capteur en chauffe."""
+        n = self.n[idx]
+        sigma = np.maximum(np.sqrt(self.m2[idx] / np.maximum(n - 1, 1)), 1e-9)
+        niveau = (1 - ALPHA) * self.ewma[idx] + ALPHA * self._ecreter(idx, valeurs)
+        echelle = np.maximum(_ABS_SIGMA * self.ecart_niveau[idx], sigma * np.sqrt(ALPHA / (2 - ALPHA)))
+        z_ewma   = np.abs(niveau - self.mediane[idx]) / echelle
+        # La carte ne juge que les lectures plus proches du niveau récent que
+        # de la référence : après une rafale, l'EWMA met ~1/α lectures à
+        # revenir, les lectures redevenues normales ne sont pas rejetées
+        z_ewma[np.abs(valeurs - niveau) >= np.abs(valeurs - self.mediane[idx])] = 0
+        z_robust = np.abs(valeurs - self.mediane[idx]) / np.maximum(_MAD_SIGMA * self.mad[idx], 1e-9)
+        z_var    = (np.abs(valeurs - self._precedentes(idx, valeurs))
+                    / np.maximum(_ABS_SIGMA * self.variation[idx], 1e-9))
+        z = np.maximum(np.maximum(z_ewma, z_robust), z_var)
+        z[n < self.min_obs] = np.nan
+        return z
+
+    # ── Apprentissage ────────────────────────────────────────────
+    def apprendre(self, idx, valeurs):
+        """Intègre des lectures (acceptées) dans l'état de leurs capteurs."""
+        if not len(idx):
+            return
+        taille = len(self.n)
+        k = np.bincount(idx, minlength=taille)
+        touches = np.flatnonzero(k)
+        kt = k[touches].astype(np.float64)
+        moyennes = np.bincount(idx, weights=valeurs, minlength=taille) / np.maximum(k, 1)
+        moyenne_lot = moyennes[touches]
+        m2_lot = np.bincount(idx, weights=(valeurs - moyennes[idx]) ** 2, minlength=taille)[touches]
+        variation_lot = np.abs(valeurs - self._precedentes(idx, valeurs))
+        avec_prec = ~np.isnan(variation_lot)
+        variation_lot[~avec_prec] = 0
+
+        # Welford par lots (fusion de Chan), mémoire bornée à FENETRE
+        n  = self.n[touches].astype(np.float64)
+        total = n + kt
+        ecart = moyenne_lot - self.moyenne[touches]
+        self.moyenne[touches] += ecart * kt / total
+        m2 = self.m2[touches] + m2_lot + ecart ** 2 * n * kt / total
+        trop = total > FENETRE
+        m2[trop] *= FENETRE / total[trop]
+        total[trop] = FENETRE
+        self.m2[touches] = m2
+        anciens = self.n[touches]
+        self.n[touches] = total.astype(np.int64)
+
+        # Variation : k écarts ≈ un pas de poids 1 - (1 - ALPHA)^k
+        n_var = np.bincount(idx, weights=avec_prec, minlength=taille)[touches]
+        var_lot = np.bincount(idx, weights=variation_lot, minlength=taille)[touches] / np.maximum(n_var, 1)
+        poids_var = 1 - (1 - ALPHA) ** n_var
+        self.variation[touches] += poids_var * (var_lot - self.variation[touches])
+
+        # Médiane / MAD en ligne : pas de ETA × MAD par lecture vers la cible.
+        # Un gros lot (serveur chargé) ne doit pas faire dépasser la cible :
+        # la médiane ne va pas au-delà de la moyenne du lot, la MAD évolue
+        # en facteur (1 ± ETA) par lecture sans dépasser l'écart du lot
+        mad = self.mad[touches]
+        signes = np.bincount(idx, weights=np.sign(valeurs - self.mediane[idx]), minlength=taille)[touches]
+        pas = np.minimum(ETA * np.maximum(mad, 1e-9) * np.abs(signes),
+                         np.abs(moyenne_lot - self.mediane[touches]))
+        self.mediane[touches] += np.sign(signes) * pas
+        ecarts = np.abs(valeurs - self.mediane[idx])
+        signes = np.bincount(idx, weights=np.sign(ecarts - self.mad[idx]), minlength=taille)[touches]
+        cible = _ABS_MAD * np.bincount(idx, weights=ecarts, minlength=taille)[touches] / kt
+        mad = np.maximum(mad, 1e-9)
+        self.mad[touches] = np.clip(mad * (1 + ETA) ** signes, np.minimum(mad, cible), np.maximum(mad, cible))
+
+        # Fin de chauffe : médiane / MAD initialisées depuis Welford
+        chauds = touches[(anciens < self.min_obs) & (self.n[touches] >= self.min_obs)]
+        self.mediane[chauds] = self.moyenne[chauds]
+        self.mad[chauds] = np.sqrt(self.m2[chauds] / (self.n[chauds] - 1)) / _MAD_SIGMA
+        self.ewma[chauds] = self.moyenne[chauds]
+        self.ecart_niveau[chauds] = (np.sqrt(self.m2[chauds] / (self.n[chauds] - 1))
+                                     * np.sqrt(ALPHA / (2 - ALPHA)) / _ABS_SIGMA)
+
+        # Dernière lecture de chaque capteur (ordre du lot)
+        self.derniere[idx] = valeurs
+
+    def suivre(self, idx, valeurs):
+        """EWMA court terme : toutes les lectures, écrêtées autour de la médiane."""
+        taille = len(self.n)
+        k = np.bincount(idx, minlength=taille)
+        touches = np.flatnonzero(k)
+        moyennes = np.bincount(idx, weights=self._ecreter(idx, valeurs), minlength=taille)[touches] / k[touches]
+        poids = 1 - (1 - ALPHA) ** k[touches]
+        self.ewma[touches] += poids * (moyennes - self.ewma[touches])
+
+    # ── Décision ─────────────────────────────────────────────────
+    def noter(self, capteurs, valeurs, second_etage=None, chauffe=None):
+        """
+        Verdicts (True = acceptée). second_etage(capteurs, valeurs) → verdicts
+        pour les cas limites (NaN : pas d'avis) ; sans second étage ou sans
+        avis, un cas limite est accepté sous le milieu des deux seuils.
+        chauffe(capteurs, valeurs) → verdicts des lectures d'un capteur en
+        chauffe ; sans juge ou sans avis (NaN), elles sont rejetées (un
+        capteur sans juge se chauffe par apprendre() sur un historique sain).
+        Lecture non finie ou capteur hors capacité : rejetée sans être notée.
+        """
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        idx = self.indices(capteurs)
+        finies = np.isfinite(valeurs)
+        valides = finies & (idx >= 0)
+        if valides.all():
+            acceptees = self._noter(capteurs, idx, valeurs, second_etage, chauffe)
+        else:
+            self.compteurs["non_finies"]   += int(len(valeurs) - finies.sum())
+            self.compteurs["hors_capacite"] += int((finies & (idx < 0)).sum())
+            gardees = np.flatnonzero(valides)
+            acceptees = np.zeros(len(valeurs), dtype=bool)
+            acceptees[gardees] = self._noter([capteurs[j] for j in gardees], idx[gardees],
+                                             valeurs[gardees], second_etage, chauffe)
+        self.compteurs["lectures"]  += len(valeurs)
+        self.compteurs["acceptees"] += int(acceptees.sum())
+        self.compteurs["rejetees"]  += int(len(valeurs) - acceptees.sum())
+        return acceptees
+
+    def _noter(self, capteurs, idx, valeurs, second_etage, chauffe):
+        z = self.scores(idx, valeurs)
+        acceptees = z < self.seuil_bas
+        en_chauffe = np.flatnonzero(np.isnan(z))
+        if len(en_chauffe):
+            if chauffe is None:
+                acceptees[en_chauffe] = False
+            else:
+                avis = np.asarray(chauffe([capteurs[j] for j in en_chauffe], valeurs[en_chauffe]),
+                                  dtype=np.float64)
+                acceptees[en_chauffe] = avis == 1
+            self.compteurs["chauffe"] += len(en_chauffe)
+        limites = np.flatnonzero((z >= self.seuil_bas) & (z < self.seuil_haut))
+        if len(limites):
+            zl = z[limites]
+            verdicts = zl < (self.seuil_bas + self.seuil_haut) / 2
+            if second_etage is not None:
+                avis = np.asarray(second_etage([capteurs[j] for j in limites], valeurs[limites]),
+                                  dtype=np.float64)
+                juges = ~np.isnan(avis)
+                verdicts[juges] = avis[juges] == 1
+                self.compteurs["second_etage"] += int(juges.sum())
+            acceptees[limites] = verdicts
+        chauds = self.n[idx] >= self.min_obs
+        self.suivre(idx[chauds], valeurs[chauds])
+        # Écart habituel EWMA / médiane (cycles machine) : appris des lectures acceptées
+        normaux = np.unique(idx[chauds & acceptees])
+        self.ecart_niveau[normaux] += ALPHA_ECART * (np.abs(self.ewma[normaux] - self.mediane[normaux])
+                                                     - self.ecart_niveau[normaux])
+        self.apprendre(idx[acceptees], valeurs[acceptees])
+        return acceptees
+
+    def stats(self):
+        return {"capteurs": len(self.index), **self.compteurs}
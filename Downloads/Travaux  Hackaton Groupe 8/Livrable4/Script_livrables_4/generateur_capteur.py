@@ -1,28 +1,252 @@
-import socket
+import argparse
+import asyncio
+import collections
+import multiprocessing
+import queue
 import time
-import random
+import numpy as np
 
-SERVER_IP = "127.0.0.1"
+# Simulateur de capteurs pour plateforme_centrale.py (S1).
+# N capteurs virtuels répartis sur des machines KUKA / FANUC / SCHULER,
+# chacun avec son niveau, son bruit, son cycle machine et une usure lente
+# (temps simulé accéléré par --acceleration). Des injections
+# d'empoisonnement (pics, rafales, valeurs hors plage, rampes) sont
+# mêlées au flux et étiquetées : chaque verdict du serveur est comparé à
+# la vérité terrain (matrice de confusion, rappel par attaque).
+# P processus × C connexions persistantes, lots "capteur;ts;valeur\n" à
+# débit fixe ; les verdicts d'une connexion arrivent dans l'ordre d'envoi.
+SERVER_IP   = "127.0.0.1"
 SERVER_PORT = 9999
+TICK        = 0.01           # secondes entre deux envois d'une connexion
+STATS_PERIODE = 5
 
-def envoyer_donnee(valeur):
+PROFILS = {
+    #            machine          grandeur  niveau      bruit        usure /h     cycle (s)     amplitude
+    "KUKA":    ("KUKA-KR210",   "vib",   (35, 50),  (0.5, 2.0),  (0.5, 1.5),  (60, 300),    (1.0, 3.0)),
+    "FANUC":   ("CNC-FANUC",    "temp",  (45, 65),  (0.2, 0.8),  (0.5, 2.0),  (600, 1800),  (1.0, 3.0)),
+    "SCHULER": ("PRESSE-SCH",   "cour",  (8, 12),   (0.1, 0.4),  (0.05, 0.2), (2, 10),      (0.5, 1.5)),
+}
+CAPTEURS_PAR_MACHINE = 4
+ATTAQUES = ("pic", "rafale", "hors_plage", "rampe")
+DUREES   = (1, 20, 1, 50)
+
+
+class Parc:
+    """Paramètres et état d'attaque des capteurs d'un processus (tableaux NumPy)."""
+
+    def __init__(self, premier, nombre, taux_attaque, acceleration, graine):
+        self.rng = np.random.default_rng(graine)
+        self.taux_attaque = taux_attaque
+        self.acceleration = acceleration
+        self.t0 = time.time()
+        profils = list(PROFILS.values())
+        self.noms, params = [], []
+        for k in range(premier, premier + nombre):
+            machine, grandeur, niveau, bruit, usure, cycle, amplitude = profils[(k // CAPTEURS_PAR_MACHINE) % 3]
+            numero = k // (CAPTEURS_PAR_MACHINE * 3) + 1
+            self.noms.append(f"{machine}-{numero}.{grandeur}{k % CAPTEURS_PAR_MACHINE:02d}")
+            params.append([self.rng.uniform(*niveau), self.rng.uniform(*bruit), self.rng.uniform(*usure),
+                           self.rng.uniform(*cycle), self.rng.uniform(*amplitude),
+                           self.rng.uniform(0, 2 * np.pi)])
+        self.niveau, self.bruit, self.usure, self.cycle, self.amplitude, self.phase = np.array(params).T
+        self.attaque = np.zeros(nombre, dtype=np.int8)       # 0 = aucune, 1.. = ATTAQUES
+        self.restant = np.zeros(nombre, dtype=np.int64)
+        self.ampleur = np.zeros(nombre)
+
+    def lectures(self, idx, maintenant):
+        """Une lecture par capteur de `idx` (distincts) : (valeurs, types)."""
+        t = (maintenant - self.t0) * self.acceleration
+        bruit = self.bruit[idx]
+        v = (self.niveau[idx] + self.usure[idx] * t / 3600
+             + self.amplitude[idx] * np.sin(2 * np.pi * t / self.cycle[idx] + self.phase[idx])
+             + self.rng.normal(0, 1, len(idx)) * bruit)
+        # Nouvelles injections
+        libres = idx[(self.restant[idx] == 0) & (self.rng.random(len(idx)) < self.taux_attaque)]
+        if len(libres):
+            types = self.rng.integers(1, len(ATTAQUES) + 1, len(libres))
+            self.attaque[libres] = types
+            self.restant[libres] = np.asarray(DUREES)[types - 1]
+            signe = self.rng.choice([-1, 1], len(libres))
+            ampleur = np.select([types == 1, types == 2, types == 3],
+                                [self.rng.uniform(6, 15, len(libres)), self.rng.uniform(3, 5, len(libres)),
+                                 self.rng.uniform(2, 4, len(libres))], 6)
+            self.ampleur[libres] = np.where(types == 3, ampleur, signe * ampleur)
+        actifs = self.restant[idx] > 0
+        types = np.where(actifs, self.attaque[idx], 0)
+        a = self.ampleur[idx]
+        v = np.where(types == 1, v + a * bruit, v)
+        v = np.where(types == 2, v + a * bruit, v)
+        v = np.where(types == 3, self.niveau[idx] * a, v)
+        progression = 1 - (self.restant[idx] - 1) / DUREES[3]          # rampe : 0.5 σ → 6 σ
+        v = np.where(types == 4, v + np.sign(a) * (0.5 + 5.5 * progression) * bruit, v)
+        self.restant[idx[actifs]] -= 1
+        return v, types.astype(np.int8)
+
+
+async def connexion(hote, port, parc, idx_capteurs, debit, fin, compteurs, latences, journal):
+    reader, writer = await asyncio.open_connection(hote, port)
+    attendus = collections.deque()             # (capteur, type) dans l'ordre d'envoi
+
+    async def recevoir():
+        reste = b""
+        while True:
+            bloc = await reader.read(65536)
+            if not bloc:
+                return
+            lignes = (reste + bloc).split(b"\n")
+            reste = lignes.pop()
+            maintenant = time.time()
+            for ligne in lignes:
+                champs = ligne.decode().split(";")
+                if len(champs) != 3 or champs[0] == "ERREUR":
+                    compteurs["erreurs"] += 1
+                    continue
+                capteur, type_ = attendus.popleft()
+                if capteur != champs[0]:
+                    compteurs["desordre"] += 1
+                alerte = champs[2] == "ALERTE"
+                compteurs[("vp" if alerte else "fn") if type_ else ("fp" if alerte else "vn")] += 1
+                if type_:
+                    compteurs[f"{ATTAQUES[type_ - 1]}_{'detectee' if alerte else 'manquee'}"] += 1
+                latences.append(maintenant - float(champs[1]))
+
+    tache = asyncio.create_task(recevoir())
+    curseur, dette = 0, 0.0
+    prochain = time.time()
+    while time.time() < fin:
+        prochain += TICK
+        await asyncio.sleep(max(prochain - time.time(), 0))
+        dette += debit * TICK
+        n, dette = int(dette), dette - int(dette)
+        lignes = []
+        maintenant = time.time()
+        while n > 0:                                # tours sur les capteurs de la connexion
+            k = min(n, len(idx_capteurs) - curseur)
+            idx = idx_capteurs[curseur:curseur + k]
+            valeurs, types = parc.lectures(idx, maintenant)
+            for i, v, ty in zip(idx, valeurs, types):
+                nom = parc.noms[i]
+                lignes.append(f"{nom};{maintenant:.6f};{v:.3f}\n")
+                attendus.append((nom, ty))
+                if journal:
+                    journal.write(f"{nom};{maintenant:.6f};{v:.3f};{int(ty > 0)}\n")
+            compteurs["injectees"] += int((types > 0).sum())
+            curseur = (curseur + k) % len(idx_capteurs)
+            n -= k
+        if lignes:
+            writer.write("".join(lignes).encode())
+            compteurs["envoyees"] += len(lignes)
+            await writer.drain()
+
+    limite = time.time() + 5                        # derniers verdicts
+    while attendus and time.time() < limite:
+        await asyncio.sleep(0.05)
+    tache.cancel()
+    writer.close()
+
+
+async def processus_async(numero, args, sortie):
+    par_processus = -(-args.capteurs // args.processus)
+    premier = numero * par_processus
+    nombre = max(0, min(par_processus, args.capteurs - premier))
+    parc = Parc(premier, nombre, args.taux_attaque, args.acceleration, graine=args.graine + numero)
+    compteurs, latences = collections.Counter(), []
+    journal = None
+    if args.journal:
+        journal = open(args.journal if args.processus == 1 else f"{args.journal}.{numero}", "w", encoding="utf-8")
+    fin = time.time() + args.duree if args.duree else float("inf")
+    debit = args.debit / args.processus / args.connexions
+    groupes = np.array_split(np.arange(nombre), args.connexions)
+
+    async def publier():
+        while True:
+            await asyncio.sleep(1)
+            sortie.put((numero, dict(compteurs), latences[:]))
+            latences.clear()
+
+    pub = asyncio.create_task(publier())
+    try:
+        await asyncio.gather(*(connexion(args.hote, args.port, parc, g, debit, fin, compteurs, latences, journal)
+                               for g in groupes if len(g)))
+    finally:
+        pub.cancel()
+        sortie.put((numero, dict(compteurs), latences[:]))
+        sortie.put((numero, None, None))
+        if journal:
+            journal.close()
+
+
+def processus(numero, args, sortie):
+    try:
+        asyncio.run(processus_async(numero, args, sortie))
+    except KeyboardInterrupt:
+        sortie.put((numero, None, None))
+
+
+def resume(compteurs, latences, ecoule, final=False):
+    c = compteurs
+    vp, fp, fn, vn = c["vp"], c["fp"], c["fn"], c["vn"]
+    jugees = vp + fp + fn + vn
+    p99 = np.percentile(latences, 99) * 1000 if len(latences) else 0
+    ligne = (f"envoyées {c['envoyees']} ({c['envoyees'] / ecoule:.0f}/s) | verdicts {jugees} | "
+             f"précision {vp / max(vp + fp, 1):.3f} | rappel {vp / max(vp + fn, 1):.3f} | "
+             f"faux pos. {fp / max(fp + vn, 1):.4f} | latence p99 {p99:.1f} ms")
+    if final:
+        ligne += "\n" + " | ".join(
+            f"{a} {c[a + '_detectee']}/{c[a + '_detectee'] + c[a + '_manquee']}" for a in ATTAQUES)
+        ligne += f"\nVP {vp} FP {fp} FN {fn} VN {vn} | erreurs {c['erreurs']} | désordre {c['desordre']}"
+    return ligne
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur de capteurs BMI (S1)")
+    parser.add_argument("--capteurs", type=int, default=48)
+    parser.add_argument("--debit", type=float, default=1000, help="lectures/s au total")
+    parser.add_argument("--duree", type=float, default=0, help="secondes (0 = jusqu'à Ctrl-C)")
+    parser.add_argument("--processus", type=int, default=1)
+    parser.add_argument("--connexions", type=int, default=4, help="par processus")
+    parser.add_argument("--taux-attaque", type=float, default=0.002, help="par lecture saine")
+    parser.add_argument("--acceleration", type=float, default=60, help="temps simulé / temps réel")
+    parser.add_argument("--journal", help="CSV capteur;ts;valeur;etiquette (rejeu de bench_detecteur.py)")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--hote", default=SERVER_IP)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    # hôte et port voyagent dans args : un processus lancé en spawn réimporte le module
+    args = parser.parse_args()
+
+    print("--- GÉNÉRATEUR DE TEST BMI (S1) ---")
+    print(f"{args.capteurs} capteurs | {args.debit:.0f} lectures/s | {args.processus} processus × "
+          f"{args.connexions} connexions | injections {args.taux_attaque:g}/lecture")
+    sortie = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=processus, args=(i, args, sortie), daemon=True)
+             for i in range(args.processus)]
+    for p in procs:
+        p.start()
+    debut = time.time()
+    derniers = {i: collections.Counter() for i in range(args.processus)}
+    latences, actifs, affiche = [], args.processus, time.time()
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.connect((SERVER_IP, SERVER_PORT))
-        s.send(str(valeur).encode())
-        print(f"[SENT] Température envoyée : {valeur}°C")
-        s.close()
-    except Exception as e:
-        print(f"[ERREUR] Connexion au serveur impossible : {e}")
-
-print("--- GÉNÉRATEUR DE TEST BMI (S1) ---")
-
-try:
-    while True:
-        # Envoi d'une donnée normale
-        temp_normale = round(random.uniform(40.0, 60.0), 2)
-        envoyer_donnee(temp_normale)
-        time.sleep(2)
-
-except KeyboardInterrupt:
-    print("\nSimulation arrêtée.")
+        while actifs:
+            try:
+                numero, compteurs, lat = sortie.get(timeout=1)
+            except queue.Empty:
+                continue
+            if compteurs is None:
+                actifs -= 1
+                continue
+            derniers[numero] = collections.Counter(compteurs)
+            latences += lat
+            if time.time() - affiche >= STATS_PERIODE:
+                affiche = time.time()
+                print("[SIM] " + resume(sum(derniers.values(), collections.Counter()),
+                                        latences, time.time() - debut))
+                latences = latences[-100000:]
+    except KeyboardInterrupt:
+        print("\nSimulation arrêtée.")
+    total = sum(derniers.values(), collections.Counter())
+    ecoule = min(time.time() - debut, args.duree or float("inf"))
+    print("[BILAN] " + resume(total, latences, ecoule, final=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+
+# Journal d'écriture anticipée (WAL) des lectures jugées par la plateforme S1.
+# DOSSIER_JOURNAL/
+#   capteurs.txt          ligne k = nom du capteur d'identifiant k (ajout seul)
+#   000000000001.seg      segment : en-tête de ENTETE octets puis enregistrements
+#   000000000002.seg      de taille fixe (capteur, verdict, ts µs, valeur)
+#   compaction.json       dernier segment versé dans le stockage séries
+# Écriture : tampon de TAMPON octets (un write() pour plusieurs lots), vidé
+# et fsync() toutes les FSYNC_PERIODE secondes dans un thread : une panne
+# machine perd au plus cette période, un arrêt du processus rien de plus.
+# Rotation à SEGMENT_OCTETS ; un segment n'est jamais rouvert (un redémarrage
+# en commence un nouveau), tous sauf le dernier sont donc scellés.
+# La numérotation reprend après le plus grand segment sur disque ou déjà
+# compacté (compaction.json) : un numéro versé puis supprimé n'est jamais
+# réutilisé, sans quoi la compaction sauterait les segments suivants.
+# Lecture : segments mappés en mémoire (np.memmap), un enregistrement
+# tronqué en fin de segment (panne pendant l'écriture) est ignoré.
+# Horodatages : la plateforme refuse ceux hors de [horloge - RETARD_MAX,
+# horloge + AVANCE_MAX] ; la compaction refiltre avec la même fenêtre,
+# bornée en bas par l'ouverture du segment (notée dans l'en-tête) : une
+# lecture datée de 2096 ne peut pas figer store.latest de son capteur.
+DOSSIER_JOURNAL = "journal"
+SEGMENT_OCTETS  = 64 * 1024 * 1024
+TAMPON          = 1024 * 1024
+FSYNC_PERIODE   = 1.0
+MAGIC           = b"BMIWAL\x00\x01"
+ENTETE          = 16            # MAGIC + taille d'enregistrement (uint32) + ouverture (uint32, s epoch)
+ENREGISTREMENT  = np.dtype([("capteur", "<u4"), ("verdict", "u1"), ("_", "V3"),
+                            ("ts", "<i8"), ("valeur", "<f8")])      # 24 octets
+ACCEPTEE, REJETEE = 1, 0
+AVANCE_MAX      = 300           # s : horodatage au plus en avance sur l'horloge serveur...
+RETARD_MAX      = 7 * 86400     # ...et au plus en retard (passerelle qui vide son tampon)
+US = 1_000_000
+AI4BMI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "ai4bmi_rbac")
+
+
+def _entete():
+    return MAGIC + np.array([ENREGISTREMENT.itemsize, int(time.time())], dtype="<u4").tobytes()
+
+
+def horodatage_plausible(ts, maintenant):
+    """ts (s epoch) dans la fenêtre acceptée autour de l'horloge serveur ? Faux pour NaN."""
+    return maintenant - RETARD_MAX <= ts <= maintenant + AVANCE_MAX
+
+
+def _etat_compaction(dossier):
+    chemin = os.path.join(dossier, "compaction.json")
+    if os.path.exists(chemin):
+        with open(chemin, encoding="utf-8") as f:
+            return json.load(f)
+    return {"segment": 0}
+
+
+class JournalLectures:
+    """Écrivain unique (boucle asyncio de la plateforme)."""
+
+    def __init__(self, dossier=DOSSIER_JOURNAL, segment_octets=SEGMENT_OCTETS, tampon=TAMPON):
+        self.dossier = dossier
+        self.segment_octets = segment_octets
+        self.tampon = tampon
+        os.makedirs(dossier, exist_ok=True)
+        self.ids = {}
+        chemin = os.path.join(dossier, "capteurs.txt")
+        if os.path.exists(chemin):
+            with open(chemin, encoding="utf-8") as f:
+                for ligne in f:
+                    self.ids[ligne.rstrip("\n")] = len(self.ids)
+        self._capteurs = open(chemin, "a", encoding="utf-8")
+        self._scelles = []                   # segments tournés, pas encore synchronisés
+        self._fichier = None
+        self.numero = max(LecteurJournal(dossier).segments() + [_etat_compaction(dossier)["segment"]])
+        self.compteurs = {"enregistrements": 0, "octets": 0, "segments": 0, "synchros": 0}
+        self._ouvrir()
+
+    def _ouvrir(self):
+        self.numero += 1
+        chemin = os.path.join(self.dossier, f"{self.numero:012d}.seg")
+        self._fichier = open(chemin, "xb", buffering=self.tampon)
+        self._fichier.write(_entete())
+        self._taille = ENTETE
+        self.compteurs["segments"] += 1
+
+    def _identifiants(self, capteurs):
+        ids = self.ids
+        resultat = [ids.get(c) for c in capteurs]
+        if None in resultat:
+            for j, i in enumerate(resultat):
+                if i is None:
+                    i = ids.get(capteurs[j])
+                    if i is None:
+                        i = ids[capteurs[j]] = len(ids)
+                        self._capteurs.write(capteurs[j] + "\n")
+                    resultat[j] = i
+            self._capteurs.flush()      # avant les enregistrements qui le citent
+        return resultat
+
+    def ajouter(self, capteurs, ts, valeurs, verdicts):
+        """Un enregistrement par lecture (ts en secondes epoch, verdict True = acceptée)."""
+        lot = np.empty(len(capteurs), dtype=ENREGISTREMENT)
+        lot["capteur"] = self._identifiants(capteurs)
+        lot["verdict"] = verdicts
+        lot["ts"] = np.rint(np.asarray(ts, dtype=np.float64) * US)
+        lot["valeur"] = valeurs
+        octets = lot.tobytes()
+        if self._taille + len(octets) > self.segment_octets and self._taille > ENTETE:
+            self._fichier.flush()
+            self._scelles.append(self._fichier)
+            self._ouvrir()
+        self._fichier.write(octets)
+        self._taille += len(octets)
+        self.compteurs["enregistrements"] += len(lot)
+        self.compteurs["octets"] += len(octets)
+
+    # ── Durabilité ───────────────────────────────────────────────
+    def _vider(self):
+        """Boucle : tampons Python → noyau. Retourne les fichiers à fsync()."""
+        self._capteurs.flush()
+        self._fichier.flush()
+        scelles, self._scelles = self._scelles, []
+        return [self._capteurs, *scelles, self._fichier], scelles
+
+    def _fsync(self, fichiers, scelles):
+        """Thread : noyau → disque (capteurs.txt d'abord), ferme les segments tournés."""
+        for f in fichiers:
+            os.fsync(f.fileno())
+        for f in scelles:
+            f.close()
+
+    def synchroniser(self):
+        self._fsync(*self._vider())
+        self.compteurs["synchros"] += 1
+
+    async def boucle(self, periode=FSYNC_PERIODE):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(periode)
+            await loop.run_in_executor(None, self._fsync, *self._vider())
+            self.compteurs["synchros"] += 1
+
+    def fermer(self):
+        if self._fichier is not None:
+            self.synchroniser()
+            self._fichier.close()
+            self._capteurs.close()
+            self._fichier = None
+
+    def stats(self):
+        return {**self.compteurs, "segment": self.numero, "capteurs": len(self.ids)}
+
+
+class LecteurJournal:
+    """Accès en lecture seule, segments mappés en mémoire."""
+
+    def __init__(self, dossier=DOSSIER_JOURNAL):
+        self.dossier = dossier
+        self._noms = []
+
+    def segments(self):
+        if not os.path.isdir(self.dossier):
+            return []
+        return sorted(int(n[:-4]) for n in os.listdir(self.dossier) if n.endswith(".seg"))
+
+    def capteurs(self):
+        """Noms des capteurs par identifiant (relu : l'écrivain en ajoute)."""
+        with open(os.path.join(self.dossier, "capteurs.txt"), encoding="utf-8") as f:
+            self._noms = [ligne.rstrip("\n") for ligne in f]
+        return self._noms
+
+    def _lire_entete(self, chemin):
+        """En-tête vérifié → instant d'ouverture (s epoch, 0 pour un segment plus ancien que ce champ)."""
+        with open(chemin, "rb") as f:
+            entete = f.read(ENTETE)
+        taille, ouverture = np.frombuffer(entete[8:16], dtype="<u4") if len(entete) == ENTETE else (0, 0)
+        if entete[:8] != MAGIC or taille != ENREGISTREMENT.itemsize:
+            raise ValueError(f"{chemin} : segment illisible")
+        return int(ouverture)
+
+    def ouverture(self, numero):
+        return self._lire_entete(os.path.join(self.dossier, f"{numero:012d}.seg"))
+
+    def enregistrements(self, numero):
+        chemin = os.path.join(self.dossier, f"{numero:012d}.seg")
+        self._lire_entete(chemin)
+        n = (os.path.getsize(chemin) - ENTETE) // ENREGISTREMENT.itemsize
+        if n == 0:
+            return np.empty(0, dtype=ENREGISTREMENT)
+        return np.memmap(chemin, dtype=ENREGISTREMENT, mode="r", offset=ENTETE, shape=(n,))
+
+    def resume(self):
+        lignes = []
+        for numero in self.segments():
+            e = self.enregistrements(numero)
+            acceptees = int((e["verdict"] == ACCEPTEE).sum())
+            lignes.append(f"segment {numero:>6} : {len(e):>9} lectures, {len(e) - acceptees:>7} rejetées"
+                          + (f", {e['ts'][0] / US:.3f} → {e['ts'][-1] / US:.3f}" if len(e) else ""))
+        return lignes
+
+
+def compacter(dossier, store, rejetees=False, supprimer=True, tout=False):
+    """
+    Verse les segments scellés dans le stockage séries (TimeSeriesStore) :
+    lectures acceptées (et rejetées si demandé) triées par capteur puis
+    horodatage. Reprise sûre : on n'ajoute que ce qui est postérieur à la
+    dernière lecture du capteur dans le stockage, la progression n'est
+    enregistrée qu'après flush(). Horodatages hors de [ouverture du segment
+    - RETARD_MAX, horloge + AVANCE_MAX] : ignorés. tout=True : l'écrivain
+    est arrêté, le dernier segment est aussi versé.
+    """
+    lecteur = LecteurJournal(dossier)
+    etat_chemin = os.path.join(dossier, "compaction.json")
+    etat = _etat_compaction(dossier)
+    segments = lecteur.segments()
+    scelles = [s for s in (segments if tout else segments[:-1]) if s > etat["segment"]]
+    bilan = {"segments": 0, "lectures": 0, "ignorees": 0, "hors_fenetre": 0, "capteurs_invalides": set()}
+    for numero in scelles:
+        e = lecteur.enregistrements(numero)
+        if not rejetees:
+            e = e[e["verdict"] == ACCEPTEE]
+        hors = ((e["ts"] < (lecteur.ouverture(numero) - RETARD_MAX) * US)
+                | (e["ts"] > (time.time() + AVANCE_MAX) * US))
+        if hors.any():
+            bilan["hors_fenetre"] += int(hors.sum())
+            e = e[~hors]
+        noms = lecteur.capteurs()
+        ordre = np.lexsort((e["ts"], e["capteur"]))
+        ids, ts, valeurs = e["capteur"][ordre], e["ts"][ordre], e["valeur"][ordre]
+        coupes = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+        for a, b in zip(np.r_[0, coupes], np.r_[coupes, len(ids)]):
+            if a == b:
+                continue
+            capteur = noms[ids[a]]
+            try:
+                derniere = store.latest(capteur)
+                debut = a if derniere is None else a + int(np.searchsorted(ts[a:b], derniere[0], "right"))
+                store.append(capteur, ts[debut:b], valeurs[debut:b])
+            except ValueError:
+                bilan["capteurs_invalides"].add(capteur)
+                bilan["ignorees"] += int(b - a)
+                continue
+            bilan["lectures"] += int(b - debut)
+            bilan["ignorees"] += int(debut - a)
+        store.flush()
+        del e
+        temporaire = etat_chemin + ".tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump({"segment": numero}, f)
+        os.replace(temporaire, etat_chemin)
+        if supprimer:
+            os.remove(os.path.join(dossier, f"{numero:012d}.seg"))
+        bilan["segments"] += 1
+    bilan["capteurs_invalides"] = sorted(bilan["capteurs_invalides"])
+    return bilan
+
+
+def ouvrir_store(racine):
+    """TimeSeriesStore d'ai4bmi_rbac (app/models/timeseries.py)."""
+    sys.path.insert(0, os.path.abspath(AI4BMI))
+    from app.models.timeseries import TimeSeriesStore
+    return TimeSeriesStore(racine)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Journal des lectures S1 : résumé et compaction")
+    parser.add_argument("--journal", default=DOSSIER_JOURNAL)
+    parser.add_argument("--compacter", metavar="DOSSIER_SERIES",
+                        help="verser les segments scellés dans ce stockage séries "
+                             "(ex. ../../ai4bmi_rbac/data/timeseries)")
+    parser.add_argument("--rejetees", action="store_true", help="verser aussi les lectures rejetées")
+    parser.add_argument("--garder", action="store_true", help="ne pas supprimer les segments versés")
+    parser.add_argument("--tout", action="store_true", help="plateforme arrêtée : verser aussi le dernier segment")
+    args = parser.parse_args()
+    if args.compacter:
+        bilan = compacter(args.journal, ouvrir_store(args.compacter), args.rejetees,
+                          not args.garder, args.tout)
+        print(f"Compaction : {bilan['segments']} segment(s), {bilan['lectures']} lectures versées, "
+              f"{bilan['ignorees']} ignorées, {bilan['hors_fenetre']} hors fenêtre d'horodatage")
+        if bilan["capteurs_invalides"]:
+            print(f"Capteurs au nom refusé par le stockage : {', '.join(bilan['capteurs_invalides'])}")
+    else:
+        for ligne in LecteurJournal(args.journal).resume():
+            print(ligne)
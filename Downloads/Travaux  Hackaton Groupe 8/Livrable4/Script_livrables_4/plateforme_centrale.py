@@ -1,34 +1,287 @@
-import socket
+import argparse
+import asyncio
+import math
+import time
 import numpy as np
-from sklearn.ensemble import IsolationForest
+from detecteur_flux import DetecteurFlux
+from journal_lectures import DOSSIER_JOURNAL, JournalLectures, horodatage_plausible
+from registre_modeles import DEFAUT, RegistreModeles, entrainer
+from reentrainement import Reentraineur
 
-# 1. Entraînement du bouclier (Isolation Forest)
-historique_sain = np.random.uniform(40, 60, (100, 1))
-bouclier = IsolationForest(contamination=0.1).fit(historique_sain)
+# Protocole (TCP, connexion persistante, une lecture par ligne) :
+#   client → serveur : "capteur;timestamp;valeur\n"   (timestamp epoch en s)
+#                      "valeur\n" reste accepté (ancien generateur_capteur.py)
+#   serveur → client : "capteur;timestamp;OK\n" ou "capteur;timestamp;ALERTE\n"
+#                      "ERREUR;<ligne>\n" si la ligne est illisible
+#                      (dont valeur non finie, timestamp non fini ou
+#                      hors de la fenêtre acceptée autour de l'horloge)
+PORT          = 9999
+TAILLE_LECTURE = 65536      # octets lus par appel sur une connexion
+FILE_MAX      = 1000        # lots en attente d'analyse (contre-pression au-delà)
+LOT_MAX       = 256         # lectures notées par un seul appel au bouclier...
+DELAI_MAX     = 0.005       # ...ou dès que la plus ancienne attend depuis 5 ms
+STATS_PERIODE = 5           # secondes entre deux lignes de statistiques
+VERBEUX       = False       # --verbeux : une ligne par lecture acceptée
+MODES         = ("mixte", "flux", "foret")
+MODE          = "mixte"     # flux + Isolation Forest pour les cas limites
 
-server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-server.bind(('0.0.0.0', 9999))
-server.listen(5)
+# 1. Bouclier : détecteur en flux par capteur (detecteur_flux.py) et
+#    Isolation Forest par capteur / machine (registre_modeles.py)
+registre = RegistreModeles()
+detecteur = DetecteurFlux()
+# 2. Réentraînement en tâche de fond sur les lectures acceptées (reentrainement.py)
+reentraineur = Reentraineur(registre)
+# 3. Journal des lectures jugées (journal_lectures.py), ouvert par main()
+journal = None
 
-print("--- PLATEFORME BMI : Surveillance active (Port 9999) ---")
+stats = {"lectures": 0, "alertes": 0, "erreurs": 0, "connexions": 0, "lots": 0, "latences": []}
 
-while True:
-    client, addr = server.accept()
+
+def preparer_registre():
+    """Premier démarrage : entraîne et sauve le modèle par défaut (40-60 °C)."""
+    if DEFAUT not in registre.cles():
+        registre.enregistrer(DEFAUT, entrainer(np.random.uniform(40, 60, 100)),
+                             source="uniforme 40-60")
+    print(f"Registre : {len(registre.cles())} modèle(s) dans {registre.dossier}/, "
+          f"{registre.capacite} en mémoire au plus")
+
+
+def second_etage(capteurs, valeurs):
+    """
+    Cas limites d'un capteur déjà chauffé : Isolation Forest du capteur ou
+    de sa machine. Le modèle par défaut ne décrit que la sonde de
+    démonstration (40-60 °C) : un capteur qui n'a que lui reste jugé par le
+    flux (NaN) jusqu'à son premier modèle dédié. Pendant la chauffe, en
+    revanche, la forêt juge seule, modèle par défaut compris (noter()) :
+    un capteur hors de cette plage doit être catalogué ou avoir son modèle.
+    """
+    verdicts = registre.noter(capteurs, valeurs).astype(np.float64)
+    verdicts[[registre.cle_pour(c) == DEFAUT for c in capteurs]] = np.nan
+    return verdicts
+
+
+def noter(capteurs, valeurs):
+    """Verdicts d'un micro-lot selon MODE (True = acceptée)."""
+    if MODE == "foret":
+        return registre.noter(capteurs, valeurs)
+    return detecteur.noter(capteurs, valeurs, second_etage if MODE == "mixte" else None,
+                           chauffe=registre.noter)
+
+
+def decoder(ligne, maintenant):
+    """'capteur;ts;valeur' ou 'valeur' → (capteur, ts, valeur). ValueError si illisible ou non plausible."""
+    champs = ligne.split(";")
+    if len(champs) == 3:
+        capteur, ts, valeur = champs[0], float(champs[1]), float(champs[2])
+    elif len(champs) == 1:
+        capteur, ts, valeur = "inconnu", maintenant, float(champs[0])
+    else:
+        raise ValueError(ligne)
+    if not (math.isfinite(valeur) and horodatage_plausible(ts, maintenant)):
+        raise ValueError(ligne)
+    return capteur, ts, valeur
+
+
+class Connexion:
+    """Un capteur (ou une passerelle) connecté : lecture par blocs, réponses tamponnées."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.adresse = writer.get_extra_info("peername")[0]
+        self.en_cours = 0                    # lots déposés pas encore analysés
+        self.termine = asyncio.Event()
+        self.termine.set()
+
+    def repondre(self, lignes):
+        if not self.writer.is_closing():
+            self.writer.write("".join(lignes).encode())
+
+
+async def lire_connexion(connexion, file):
+    """
+    Découpe le flux en lignes et dépose un lot par bloc reçu.
+    Contre-pression : file pleine → put() attend ; réponses non lues
+    par le client → drain() attend ; dans les deux cas on cesse de lire
+    ce socket et TCP ralentit l'émetteur.
+    """
+    reste = b""
+    while True:
+        bloc = await connexion.reader.read(TAILLE_LECTURE)
+        if bloc:
+            lignes = (reste + bloc).split(b"\n")
+            reste = lignes.pop()
+        else:
+            lignes, reste = [reste], b""     # dernière ligne sans "\n" (ancien générateur)
+        maintenant = time.time()
+        lot, erreurs = [], []
+        for brute in lignes:
+            ligne = brute.decode(errors="replace").strip()
+            if not ligne:
+                continue
+            try:
+                lot.append(decoder(ligne, maintenant))
+            except ValueError:
+                erreurs.append(f"ERREUR;{ligne[:64]}\n")
+        if erreurs:
+            stats["erreurs"] += len(erreurs)
+            print(f"[ERREUR] {len(erreurs)} donnée(s) illisible(s) reçue(s) de {connexion.adresse}")
+            connexion.repondre(erreurs)
+        if lot:
+            connexion.en_cours += 1
+            connexion.termine.clear()
+            await file.put((connexion, lot))
+        if not bloc:
+            break
+        await connexion.writer.drain()
+
+
+async def regrouper(file, lot_max, delai_max):
+    """
+    Micro-lot : attend une première entrée puis agrège la file jusqu'à
+    lot_max lectures ou delai_max secondes (un bloc réseau peut dépasser
+    lot_max : analyser() le note alors en plusieurs appels). delai_max = 0 → on ne prend
+    que ce qui est déjà en file (pas d'attente ajoutée).
+    """
+    entrees = [await file.get()]
+    total = len(entrees[0][1])
+    echeance = time.monotonic() + delai_max
+    while total < lot_max:
+        try:
+            entree = file.get_nowait()
+        except asyncio.QueueEmpty:
+            reste = echeance - time.monotonic()
+            if reste <= 0:
+                break
+            try:
+                entree = await asyncio.wait_for(file.get(), reste)
+            except asyncio.TimeoutError:
+                break
+        entrees.append(entree)
+        total += len(entree[1])
+    return entrees
+
+
+async def analyser(file, lot_max=LOT_MAX, delai_max=DELAI_MAX):
+    """
+    Consommateur unique : note chaque micro-lot (noter(), selon MODE)
+    et renvoie les verdicts.
+    """
+    while True:
+        entrees = await regrouper(file, lot_max, delai_max)
+        capteurs = [capteur for _, lot in entrees for capteur, _, _ in lot]
+        valeurs = [valeur for _, lot in entrees for _, _, valeur in lot]
+        acceptees = np.concatenate([noter(capteurs[i:i + lot_max], valeurs[i:i + lot_max])
+                                    for i in range(0, len(valeurs), lot_max)])
+        reentraineur.observer(capteurs, valeurs, acceptees)
+        if journal is not None:
+            journal.ajouter(capteurs, [ts for _, lot in entrees for _, ts, _ in lot], valeurs, acceptees)
+        maintenant = time.time()
+        i = 0
+        for connexion, lot in entrees:
+            reponses = []
+            for capteur, ts, valeur in lot:
+                if acceptees[i]:
+                    reponses.append(f"{capteur};{ts};OK\n")
+                    if VERBEUX:
+                        print(f"[OK] {connexion.adresse} / {capteur} : {valeur}°C. Donnée acceptée.")
+                else:
+                    stats["alertes"] += 1
+                    reponses.append(f"{capteur};{ts};ALERTE\n")
+                    print(f"[ALERTE S1] {connexion.adresse} / {capteur} : {valeur}°C. EMPOISONNEMENT DÉTECTÉ !")
+                i += 1
+            stats["lectures"] += len(lot)
+            stats["latences"].append(maintenant - lot[0][1])
+            connexion.repondre(reponses)
+            connexion.en_cours -= 1
+            if not connexion.en_cours:
+                connexion.termine.set()
+        stats["lots"] += 1
+
+
+async def gerer_client(reader, writer, file):
+    connexion = Connexion(reader, writer)
+    stats["connexions"] += 1
+    try:
+        await lire_connexion(connexion, file)
+        # Fin d'envoi du client : on lui renvoie encore les verdicts en attente
+        await asyncio.wait_for(connexion.termine.wait(), timeout=10)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        pass
+    finally:
+        stats["connexions"] -= 1
+        writer.close()
+
+
+async def afficher_stats(file):
+    precedent, lots_precedents = 0, 0
+    while True:
+        await asyncio.sleep(STATS_PERIODE)
+        lectures, lots, latences = stats["lectures"], stats["lots"], stats["latences"]
+        stats["latences"] = []
+        p99 = np.percentile(latences, 99) * 1000 if latences else 0
+        taille = (lectures - precedent) / (lots - lots_precedents) if lots > lots_precedents else 0
+        modeles = registre.stats()
+        flux = detecteur.stats()
+        reent = reentraineur.stats()
+        journalisees = f" | journal {journal.stats()['enregistrements']}" if journal is not None else ""
+        print(f"[STATS] {(lectures - precedent) / STATS_PERIODE:.0f} lectures/s | "
+              f"{stats['connexions']} connexion(s) | alertes {stats['alertes']} | "
+              f"file {file.qsize()}/{FILE_MAX} | lot moyen {taille:.0f} | "
+              f"modèles {modeles['en_memoire']}/{modeles['modeles']} | "
+              f"2e étage {flux['second_etage']} | réentraînements {reent['reentrainements']}"
+              f"{journalisees} | latence p99 {p99:.1f} ms")
+        precedent, lots_precedents = lectures, lots
+
+
+async def main(hote, port, lot_max=LOT_MAX, delai_max=DELAI_MAX, reentrainement=True,
+               dossier_journal=DOSSIER_JOURNAL):
+    global journal
+    file = asyncio.Queue(maxsize=FILE_MAX)
+    server = await asyncio.start_server(lambda r, w: gerer_client(r, w, file), hote, port,
+                                        reuse_address=True, backlog=1024)
+    print(f"--- PLATEFORME BMI : Surveillance active (Port {port}) ---")
+    print(f"Micro-lots : {lot_max} lectures ou {delai_max * 1000:g} ms | mode {MODE}")
+    preparer_registre()
+    taches = [server.serve_forever(), analyser(file, lot_max, delai_max), afficher_stats(file)]
+    if reentrainement:
+        taches.append(reentraineur.boucle())
+    if dossier_journal:
+        journal = JournalLectures(dossier_journal)
+        taches.append(journal.boucle())
+        print(f"Journal : {dossier_journal}/ (segment {journal.numero}, fsync toutes les secondes)")
     try:
-        message = client.recv(1024).decode().strip()
-        if message:
-            # Nettoyage et conversion en nombre
-            valeur = float(message)
-
-            prediction = bouclier.predict([[valeur]])
-            if prediction[0] == 1:
-                print(f"[OK] {addr[0]} : {valeur}°C. Donnée acceptée.")
-            else:
-                print(f"[ALERTE S1] {addr[0]} : {valeur}°C. EMPOISONNEMENT DÉTECTÉ !")
-    except ValueError:
-        print(f"[ERREUR] Donnée non numérique reçue de {addr[0]}")
-    except Exception as e:
-        print(f"Erreur : {e}")
+        async with server:
+            await asyncio.gather(*taches)
     finally:
-        client.close()
+        reentraineur.arreter()
+        if journal is not None:
+            journal.fermer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plateforme BMI — ingestion capteurs (S1)")
+    parser.add_argument("--hote", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--lot", type=int, default=LOT_MAX,
+                        help="lectures max par appel au bouclier (1 = une par une)")
+    parser.add_argument("--delai-ms", type=float, default=DELAI_MAX * 1000,
+                        help="attente max pour compléter un lot (latence ajoutée)")
+    parser.add_argument("--mode", choices=MODES, default=MODE,
+                        help="flux : détecteur en flux seul ; foret : Isolation Forest sur chaque "
+                             "lecture ; mixte : flux + Isolation Forest pour les cas limites")
+    parser.add_argument("--sans-reentrainement", action="store_true",
+                        help="ne pas réentraîner les modèles sur les lectures acceptées")
+    parser.add_argument("--journal", default=DOSSIER_JOURNAL,
+                        help="dossier du journal des lectures jugées (journal_lectures.py)")
+    parser.add_argument("--sans-journal", action="store_true", help="ne pas journaliser les lectures")
+    parser.add_argument("--verbeux", action="store_true", help="afficher chaque lecture acceptée")
+    args = parser.parse_args()
+    VERBEUX = args.verbeux
+    MODE = args.mode
+    try:
+        asyncio.run(main(args.hote, args.port, max(1, args.lot), args.delai_ms / 1000,
+                         not args.sans_reentrainement, None if args.sans_journal else args.journal))
+    except KeyboardInterrupt:
+        print("\nPlateforme arrêtée.")
@@ -0,0 +1,237 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from detecteur_flux import indices_bornes
+from registre_modeles import RegistreModeles, BouclierCompile, cle_valide, entrainer
+
+# Réentraînement du bouclier S1 en tâche de fond :
+#   - un réservoir d'échantillons par capteur, alimenté par les seules
+#     lectures acceptées (tableau NumPy capteurs × RESERVOIR, borné à
+#     CAPTEURS_MAX capteurs : mémoire fixe quel que soit le trafic)
+#   - échantillonnage de Vitter (algorithme R) avec un compteur plafonné
+#     à HORIZON : les lectures anciennes sont oubliées progressivement,
+#     le réservoir suit la dérive lente (usure, saisons)
+#   - déclencheurs : dérive (niveau récent éloigné de plus de
+#     DERIVE_SEUIL σ du centre du modèle), période, ou premier modèle
+#     dédié d'un capteur qui n'utilise que le modèle machine / défaut
+#   - ajustement dans un processus séparé (priorité basse), écriture du
+#     fichier par ce processus, puis remplacement du modèle en mémoire
+#     par une simple affectation : l'ingestion ne s'arrête jamais
+#   - un capteur dont l'ajustement échoue attend ECHEC_ATTENTE s, doublé
+#     à chaque échec (au plus PERIODE) ; un nom qui ne peut pas être une
+#     clé du registre n'est jamais soumis
+RESERVOIR       = 1024          # échantillons gardés par capteur
+HORIZON         = 20000         # mémoire effective du réservoir (lectures)
+CAPTEURS_MAX    = 4096          # capteurs échantillonnés au plus
+MIN_ECHANTILLON = 256           # échantillons avant un (ré)entraînement
+VERIFICATION    = 10            # secondes entre deux examens des capteurs
+PERIODE         = 3600          # réentraînement planifié (secondes)
+ECHEC_ATTENTE   = 60            # secondes avant de réessayer après un échec (doublées)
+DERIVE_SEUIL    = 1.0           # |niveau - centre du modèle| en σ du modèle
+ALPHA_NIVEAU    = 0.01          # poids d'une lecture dans le niveau récent
+PARALLELES      = 1             # processus d'ajustement
+EN_ATTENTE_MAX  = 64            # ajustements demandés non terminés
+NICE            = 10
+
+
+class Reservoirs:
+    """Échantillons bornés par capteur, mis à jour par lots vectorisés."""
+
+    def __init__(self, taille=RESERVOIR, horizon=HORIZON, capteurs_max=CAPTEURS_MAX, graine=None):
+        self.taille = taille
+        self.horizon = horizon
+        self.capteurs_max = capteurs_max
+        self.rng = np.random.default_rng(graine)
+        self.index = {}
+        self.ignorees = 0                   # lectures de capteurs au-delà de capteurs_max
+        self._allouer(min(64, capteurs_max))
+
+    def _allouer(self, capacite):
+        anciens = getattr(self, "donnees", None)
+        donnees = np.zeros((capacite, self.taille), dtype=np.float32)
+        champs = {"vus": np.zeros(capacite, dtype=np.int64),
+                  "nouvelles": np.zeros(capacite, dtype=np.int64),
+                  "niveau": np.zeros(capacite)}
+        if anciens is not None:
+            donnees[:len(anciens)] = anciens
+            for nom, tableau in champs.items():
+                tableau[:len(anciens)] = getattr(self, nom)
+        self.donnees = donnees
+        for nom, tableau in champs.items():
+            setattr(self, nom, tableau)
+
+    def indices(self, capteurs):
+        """Lignes des capteurs (-1 : plus de place)."""
+        return indices_bornes(self.index, capteurs, self.capteurs_max, len(self.vus), self._allouer)
+
+    def ajouter(self, capteurs, valeurs):
+        idx = self.indices(capteurs)
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        garder = idx >= 0
+        self.ignorees += int(len(idx) - garder.sum())
+        idx, valeurs = idx[garder], valeurs[garder]
+        if not len(idx):
+            return
+        # Rang de chaque lecture parmi celles du même capteur dans le lot
+        ordre = np.argsort(idx, kind="stable")
+        tries = idx[ordre]
+        debuts = np.r_[0, np.flatnonzero(tries[1:] != tries[:-1]) + 1]
+        rang = np.empty(len(idx), dtype=np.int64)
+        rang[ordre] = np.arange(len(idx)) - np.repeat(debuts, np.diff(np.r_[debuts, len(idx)]))
+        vus = np.minimum(self.vus[idx] + rang, self.horizon)
+        # Algorithme R : case libre, sinon case tirée dans [0, vus] (gardée si < taille)
+        cases = np.where(vus < self.taille, vus, self.rng.integers(0, vus + 1))
+        ecrire = cases < self.taille
+        self.donnees[idx[ecrire], cases[ecrire]] = valeurs[ecrire]
+
+        k = np.bincount(idx, minlength=len(self.vus))
+        touches = np.flatnonzero(k)
+        self.vus[touches] = np.minimum(self.vus[touches] + k[touches], self.horizon)
+        self.nouvelles[touches] += k[touches]
+        moyennes = np.bincount(idx, weights=valeurs, minlength=len(self.vus))[touches] / k[touches]
+        poids = 1 - (1 - ALPHA_NIVEAU) ** k[touches]
+        neufs = self.vus[touches] == k[touches]
+        self.niveau[touches] += poids * (moyennes - self.niveau[touches])
+        self.niveau[touches[neufs]] = moyennes[neufs]
+
+    def echantillon(self, capteur):
+        i = self.index[capteur]
+        return self.donnees[i, :min(self.vus[i], self.taille)].copy()
+
+    def octets(self):
+        return self.donnees.nbytes + self.vus.nbytes + self.nouvelles.nbytes + self.niveau.nbytes
+
+
+def _initialiser_processus():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)      # Ctrl-C : le serveur arrête le pool
+    if hasattr(os, "nice"):
+        os.nice(NICE)                  # l'ingestion garde la priorité sur le CPU
+
+
+def _ajuster(dossier, cle, valeurs, meta):
+    """Processus d'ajustement : entraîne, compile, sauve. Retourne (version, bornes, scores)."""
+    centre = float(np.median(valeurs))
+    echelle = float(1.4826 * np.median(np.abs(valeurs - centre))) or float(np.std(valeurs)) or 1e-6
+    modele = BouclierCompile.depuis_foret(entrainer(valeurs))
+    version = RegistreModeles(dossier).enregistrer(cle, modele, centre=centre, echelle=echelle,
+                                                   echantillons=len(valeurs), **meta)
+    return version, modele.bornes, modele.scores, centre, echelle
+
+
+class Reentraineur:
+
+    def __init__(self, registre, reservoirs=None, periode=PERIODE, verification=VERIFICATION,
+                 derive_seuil=DERIVE_SEUIL, paralleles=PARALLELES):
+        self.registre = registre
+        self.reservoirs = reservoirs or Reservoirs()
+        self.periode = periode
+        self.verification = verification
+        self.derive_seuil = derive_seuil
+        self.paralleles = paralleles
+        self._executeur = None
+        self._en_cours = set()
+        self._dernier = {}                   # capteur → instant du dernier ajustement
+        self._echecs = {}                    # capteur → (échecs consécutifs, prochain essai)
+        self._references = {}                # capteur → (centre, échelle) de son modèle
+        self.compteurs = {"reentrainements": 0, "derives": 0, "planifies": 0,
+                          "premiers": 0, "echecs": 0, "echange_max_ms": 0.0}
+
+    # ── Côté ingestion (boucle asyncio, vectorisé) ───────────────
+    def observer(self, capteurs, valeurs, acceptees):
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        acceptees = np.asarray(acceptees, dtype=bool) & np.isfinite(valeurs)
+        if acceptees.any():
+            self.reservoirs.ajouter([c for c, a in zip(capteurs, acceptees) if a],
+                                    valeurs[acceptees])
+
+    def _reference(self, capteur):
+        if capteur not in self._references:
+            meta = self.registre.meta(capteur) if capteur in self.registre.cles() else None
+            self._references[capteur] = ((meta["centre"], meta["echelle"])
+                                         if meta and "centre" in meta else None)
+        return self._references[capteur]
+
+    def candidats(self, maintenant=None):
+        """Capteurs à réentraîner, avec le motif : dérive, planifié ou premier."""
+        maintenant = maintenant or time.time()
+        r = self.reservoirs
+        resultat = []
+        for capteur, i in r.index.items():
+            if capteur in self._en_cours or min(r.vus[i], r.taille) < MIN_ECHANTILLON:
+                continue
+            if capteur in self._echecs and maintenant < self._echecs[capteur][1]:
+                continue
+            if not cle_valide(capteur):
+                continue
+            reference = self._reference(capteur)
+            if reference is None:
+                resultat.append((capteur, "premier"))
+            elif abs(r.niveau[i] - reference[0]) > self.derive_seuil * reference[1]:
+                resultat.append((capteur, "derive"))
+            elif (maintenant - self._dernier.get(capteur, 0) >= self.periode
+                  and r.nouvelles[i] >= MIN_ECHANTILLON):
+                resultat.append((capteur, "planifie"))
+        return resultat
+
+    # ── Tâche de fond ────────────────────────────────────────────
+    def demarrer(self):
+        if self._executeur is None:
+            self._executeur = ProcessPoolExecutor(
+                self.paralleles, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialiser_processus)
+
+    def arreter(self):
+        if self._executeur is not None:
+            self._executeur.shutdown(wait=True, cancel_futures=True)
+            self._executeur = None
+
+    async def reentrainer(self, capteur, motif):
+        """Ajuste dans le processus dédié puis remplace le modèle du capteur."""
+        loop = asyncio.get_running_loop()
+        self._en_cours.add(capteur)
+        valeurs = self.reservoirs.echantillon(capteur).astype(np.float64)
+        self.reservoirs.nouvelles[self.reservoirs.index[capteur]] = 0
+        try:
+            version, bornes, scores, centre, echelle = await loop.run_in_executor(
+                self._executeur, _ajuster, self.registre.dossier, capteur, valeurs, {"motif": motif})
+        except Exception as e:
+            self.compteurs["echecs"] += 1
+            echecs = self._echecs.get(capteur, (0, 0))[0] + 1
+            attente = min(ECHEC_ATTENTE * 2 ** (echecs - 1), self.periode)
+            self._echecs[capteur] = (echecs, time.time() + attente)
+            print(f"[REENTRAINEMENT] échec {capteur} : {e} (nouvel essai dans {attente:.0f} s)")
+            return None
+        finally:
+            self._en_cours.discard(capteur)
+        self._echecs.pop(capteur, None)
+        debut = time.perf_counter()
+        self.registre.installer(capteur, version, BouclierCompile(bornes, scores))
+        self._references[capteur] = (centre, echelle)
+        self._dernier[capteur] = time.time()
+        self.compteurs["reentrainements"] += 1
+        self.compteurs[{"derive": "derives", "planifie": "planifies", "premier": "premiers"}[motif]] += 1
+        self.compteurs["echange_max_ms"] = max(self.compteurs["echange_max_ms"],
+                                               (time.perf_counter() - debut) * 1000)
+        print(f"[REENTRAINEMENT] {capteur} v{version} ({motif}, {len(valeurs)} échantillons)")
+        return version
+
+    async def boucle(self):
+        self.demarrer()
+        taches = set()
+        while True:
+            await asyncio.sleep(self.verification)
+            for capteur, motif in self.candidats():
+                if len(taches) >= EN_ATTENTE_MAX:
+                    break
+                tache = asyncio.create_task(self.reentrainer(capteur, motif))
+                taches.add(tache)
+                tache.add_done_callback(taches.discard)
+
+    def stats(self):
+        return {**self.compteurs, "capteurs": len(self.reservoirs.index),
+                "en_cours": len(self._en_cours), "en_echec": len(self._echecs),
+                "memoire_mo": round(self.reservoirs.octets() / 1e6, 1)}
@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+# Registre des détecteurs d'empoisonnement (S1), un modèle par capteur ou
+# par machine :
+#   modeles/<cle>/v<N>.npz        détecteur compilé (version N)
+#   modeles/<cle>/courant.json    version active + métadonnées
+#   modeles/catalogue.json        capteur → machine
+# Au démarrage rien n'est chargé : un modèle est lu sur disque à sa
+# première utilisation puis gardé dans un cache LRU de CAPACITE modèles.
+DOSSIER_MODELES = "modeles"
+CAPACITE        = 64            # modèles gardés en mémoire
+GARDER_VERSIONS = 3             # versions conservées sur disque par clé
+DEFAUT          = "defaut"      # modèle de repli (capteur et machine inconnus)
+ROUTES_MAX      = 100000        # résolutions capteur → modèle mémorisées
+CONTAMINATION   = 0.1
+
+_CLE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+def cle_valide(cle):
+    """Nom utilisable comme clé de modèle (et nom de fichier) ?"""
+    return bool(_CLE.match(cle))
+
+
+def _verifier(cle):
+    if not cle_valide(cle):
+        raise ValueError(f"Clé de modèle invalide : {cle!r}")
+    return cle
+
+
+def _ecrire_json(chemin, donnees):
+    tmp = chemin + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(donnees, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, chemin)
+
+
+def entrainer(valeurs, contamination=CONTAMINATION):
+    """IsolationForest ajusté sur un historique sain (liste de valeurs)."""
+    X = np.asarray(valeurs, dtype=np.float64).reshape(-1, 1)
+    return IsolationForest(contamination=contamination, random_state=0).fit(X)
+
+
+class BouclierCompile:
+    """
+    IsolationForest à une variable réduit à une fonction en escalier.
+    Chaque arbre découpe l'axe des valeurs aux seuils de ses nœuds : entre
+    deux seuils consécutifs (toutes forêts confondues) le score est
+    constant. On garde les seuils triés et le score de chaque intervalle ;
+    decision_function devient un searchsorted, avec exactement les scores
+    de sklearn (les arbres comparent x arrondi en float32 : x ≤ seuil).
+    """
+
+    def __init__(self, bornes, scores):
+        self.bornes = bornes          # float32, croissantes
+        self.scores = scores          # float64, len(bornes) + 1
+
+    @classmethod
+    def depuis_foret(cls, foret):
+        if foret.n_features_in_ != 1:
+            raise ValueError("Seuls les détecteurs à une variable sont compilables")
+        seuils = np.concatenate([e.tree_.threshold[e.tree_.children_left >= 0]
+                                 for e in foret.estimators_])
+        # Plus grand float32 ≤ seuil : x32 ≤ borne ⇔ x32 ≤ seuil
+        bornes = seuils.astype(np.float32)
+        trop_haut = bornes.astype(np.float64) > seuils
+        bornes[trop_haut] = np.nextafter(bornes[trop_haut], np.float32(-np.inf))
+        bornes = np.unique(bornes)
+        points = np.r_[bornes, np.nextafter(bornes[-1:], np.float32(np.inf))]
+        scores = foret.decision_function(points.astype(np.float64).reshape(-1, 1))
+        # Fusion des intervalles voisins de même score
+        garder = scores[1:] != scores[:-1]
+        return cls(bornes[garder], scores[np.r_[garder, True]])
+
+    def decision_function(self, X):
+        x = np.asarray(X, dtype=np.float32).reshape(-1)
+        return self.scores[np.searchsorted(self.bornes, x, side="left")]
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) >= 0, 1, -1)
+
+    def sauver(self, chemin):
+        with open(chemin, "wb") as f:
+            np.savez(f, bornes=self.bornes, scores=self.scores)
+
+    @classmethod
+    def charger(cls, chemin):
+        with np.load(chemin) as d:
+            return cls(d["bornes"], d["scores"])
+
+
+class RegistreModeles:
+    """
+    Résolution d'une lecture : modèle du capteur, sinon celui de sa
+    machine (catalogue), sinon DEFAUT. La résolution est mémorisée par
+    capteur ; enregistrer() et associer() l'invalident.
+    """
+
+    def __init__(self, dossier=DOSSIER_MODELES, capacite=CAPACITE):
+        self.dossier  = dossier
+        self.capacite = capacite
+        self._verrou  = threading.RLock()
+        self._cache   = OrderedDict()       # cle → (version, modèle)
+        self._routes  = {}                  # capteur → cle
+        self.chargements = 0
+        self.evictions   = 0
+        os.makedirs(dossier, exist_ok=True)
+        self._cles = {n for n in os.listdir(dossier)
+                      if os.path.isfile(os.path.join(dossier, n, "courant.json"))}
+        try:
+            with open(os.path.join(dossier, "catalogue.json"), encoding="utf-8") as f:
+                self._catalogue = json.load(f)
+        except FileNotFoundError:
+            self._catalogue = {}
+
+    # ── Écriture ─────────────────────────────────────────────────
+    def enregistrer(self, cle, modele, **meta):
+        """
+        Sauve une nouvelle version (IsolationForest compilé au passage)
+        et l'active. Retourne son numéro.
+        """
+        _verifier(cle)
+        if isinstance(modele, IsolationForest):
+            modele = BouclierCompile.depuis_foret(modele)
+        dossier = os.path.join(self.dossier, cle)
+        os.makedirs(dossier, exist_ok=True)
+        with self._verrou:
+            version = self.version(cle) + 1
+            fichier = f"v{version}.npz"
+            modele.sauver(os.path.join(dossier, fichier + ".tmp"))
+            os.replace(os.path.join(dossier, fichier + ".tmp"), os.path.join(dossier, fichier))
+            _ecrire_json(os.path.join(dossier, "courant.json"), {
+                "version":    version,
+                "fichier":    fichier,
+                "entraine_le": time.strftime("%Y-%m-%d %H:%M:%S"),
+                **meta,
+            })
+            for ancienne in range(1, version - GARDER_VERSIONS + 1):
+                try:
+                    os.remove(os.path.join(dossier, f"v{ancienne}.npz"))
+                except FileNotFoundError:
+                    pass
+            self._cles.add(cle)
+            self._mettre_en_cache(cle, version, modele)
+            self._routes.clear()
+        return version
+
+    def associer(self, capteurs_machines):
+        """Complète le catalogue {capteur: machine}."""
+        with self._verrou:
+            self._catalogue.update(capteurs_machines)
+            _ecrire_json(os.path.join(self.dossier, "catalogue.json"), self._catalogue)
+            self._routes.clear()
+
+    # ── Lecture ──────────────────────────────────────────────────
+    def cles(self):
+        return sorted(self._cles)
+
+    def meta(self, cle):
+        try:
+            with open(os.path.join(self.dossier, cle, "courant.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def version(self, cle):
+        meta = self.meta(cle)
+        return meta["version"] if meta else 0
+
+    def cle_pour(self, capteur):
+        cle = self._routes.get(capteur)
+        if cle is None:
+            machine = self._catalogue.get(capteur)
+            if capteur in self._cles:
+                cle = capteur
+            elif machine in self._cles:
+                cle = machine
+            else:
+                cle = DEFAUT
+            if len(self._routes) >= ROUTES_MAX:
+                self._routes.clear()
+            self._routes[capteur] = cle
+        return cle
+
+    def modele(self, cle):
+        """Modèle actif de `cle` (chargé au premier appel). KeyError si absent."""
+        with self._verrou:
+            entree = self._cache.get(cle)
+            if entree is not None:
+                self._cache.move_to_end(cle)
+                return entree[1]
+            meta = self.meta(cle)
+            if meta is None:
+                raise KeyError(cle)
+            modele = BouclierCompile.charger(os.path.join(self.dossier, cle, meta["fichier"]))
+            self.chargements += 1
+            self._mettre_en_cache(cle, meta["version"], modele)
+            return modele
+
+    def installer(self, cle, version, modele):
+        """Active en mémoire une version déjà écrite sur disque (par un autre processus)."""
+        with self._verrou:
+            self._cles.add(cle)
+            self._mettre_en_cache(cle, version, modele)
+            self._routes.clear()
+
+    def recharger(self, cle):
+        """Oublie la version en mémoire (nouvelle version écrite par un autre processus)."""
+        with self._verrou:
+            self._cache.pop(cle, None)
+            if self.meta(cle) is not None:
+                self._cles.add(cle)
+            self._routes.clear()
+
+    def _mettre_en_cache(self, cle, version, modele):
+        self._cache[cle] = (version, modele)
+        self._cache.move_to_end(cle)
+        while len(self._cache) > self.capacite:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    # ── Notation ─────────────────────────────────────────────────
+    def noter(self, capteurs, valeurs):
+        """
+        Verdicts (True = acceptée) pour des lectures de capteurs mélangés :
+        une recherche vectorisée par modèle concerné.
+        """
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        cles = np.array([self.cle_pour(c) for c in capteurs])
+        acceptees = np.empty(len(valeurs), dtype=bool)
+        for cle in np.unique(cles):
+            masque = cles == cle
+            scores = self.modele(str(cle)).decision_function(valeurs[masque].reshape(-1, 1))
+            acceptees[masque] = scores >= 0
+        return acceptees
+
+    def stats(self):
+        return {
+            "modeles":     len(self._cles),
+            "en_memoire":  len(self._cache),
+            "capacite":    self.capacite,
+            "chargements": self.chargements,
+            "evictions":   self.evictions,
+        }
+
+
+if __name__ == "__main__":
+    # Entraînement hors ligne : un modèle par capteur depuis un CSV
+    # "capteur;machine;valeur" (historique sain), ou le modèle par défaut.
+    parser = argparse.ArgumentParser(description="Registre des détecteurs S1")
+    parser.add_argument("--dossier", default=DOSSIER_MODELES)
+    parser.add_argument("--historique", help="CSV capteur;machine;valeur")
+    parser.add_argument("--par-machine", action="store_true",
+                        help="un modèle par machine au lieu d'un par capteur")
+    args = parser.parse_args()
+
+    registre = RegistreModeles(args.dossier)
+    if not args.historique:
+        version = registre.enregistrer(DEFAUT, entrainer(np.random.uniform(40, 60, 100)),
+                                       source="uniforme 40-60")
+        print(f"[REGISTRE] {DEFAUT} v{version}")
+    else:
+        series, catalogue = {}, {}
+        with open(args.historique, encoding="utf-8") as f:
+            for ligne in f:
+                capteur, machine, valeur = ligne.strip().split(";")
+                catalogue[capteur] = machine
+                series.setdefault(machine if args.par_machine else capteur, []).append(float(valeur))
+        registre.associer(catalogue)
+        for cle, valeurs in series.items():
+            version = registre.enregistrer(cle, entrainer(valeurs), source=args.historique,
+                                           lectures=len(valeurs))
+            print(f"[REGISTRE] {cle} v{version} ({len(valeurs)} lectures)")
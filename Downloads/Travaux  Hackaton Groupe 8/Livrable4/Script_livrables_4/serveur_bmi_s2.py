@@ -1,29 +1,135 @@
-from flask import Flask, jsonify
+import datetime
+import math
+import os
+from flask import Flask, jsonify, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+import stockage_limites  # enregistre le schéma sqlite:// auprès de limits
+from detecteur_extraction import DetecteurExtraction
+from bruit_differentiel import MecanismeVectoriel
+from service_prediction import MACHINES, ServicePrediction, domaine
+from budget_confidentialite import BudgetEpuise, ComptableBudget
+from defense_inference_s5 import cadence_du_jour, dp_mechanism, obtenir_cadence_securisee
 
 app = Flask(__name__)
 
+# Compteurs partagés par tous les workers de l'hôte (stockage_limites.py) ;
+# BMI_LIMITES_URI=redis://hote:6379 pour plusieurs hôtes
+STOCKAGE_LIMITES = os.environ.get("BMI_LIMITES_URI", f"sqlite:///{stockage_limites.FICHIER_DEFAUT}")
+# fixed-window ou sliding-window-counter (pas de rafale de 2× le quota à la bascule de fenêtre)
+STRATEGIE_LIMITES = os.environ.get("BMI_LIMITES_STRATEGIE", "fixed-window")
+
+# Modèles de panne par machine, chargés une fois ; requêtes simultanées
+# notées par lots, réponses répétées servies par le cache (service_prediction.py)
+# Sorties bruitées (S5, mécanisme de Laplace) : désactivées par défaut,
+# BMI_DP_EPSILON=ε pour les activer.
+# Sensibilité : une probabilité publiée vit dans [0, 1] et rien ne borne
+# mieux l'effet d'un enregistrement d'entraînement sur la forêt, d'où Δ = 1.
+# Statut et conseil sont lus sur la valeur publiée (sinon ils divulguent la
+# vraie), donc ε doit garder le conseil juste : P(|bruit| ≥ ECART_CONSEIL)
+# = exp(-ECART_CONSEIL·ε/Δ) ≤ ERREUR_CONSEIL_MAX impose ε ≥ 23,03. À ε = 1
+# (b = 1), un point nominal (p ≈ 0,04) recevait « Critique » une fois sur quatre ;
+# à ε = 24, il quitte « Optimal » dans ~1 % des cas et n'atteint « Critique » jamais en pratique.
+EPSILON_PREDICTION = float(os.environ.get("BMI_DP_EPSILON", "0"))
+SENSIBILITE_PREDICTION = 1.0
+ECART_CONSEIL = 0.2          # largeur de la bande « Optimal » de conseil()
+ERREUR_CONSEIL_MAX = 0.01
+EPSILON_CONSEIL_MIN = SENSIBILITE_PREDICTION * math.log(1 / ERREUR_CONSEIL_MAX) / ECART_CONSEIL
+if 0 < EPSILON_PREDICTION < EPSILON_CONSEIL_MIN:
+    raise ValueError(f"BMI_DP_EPSILON={EPSILON_PREDICTION:g} : conseil faussé par le bruit dans plus de "
+                     f"{ERREUR_CONSEIL_MAX:.0%} des réponses, ε ≥ {EPSILON_CONSEIL_MIN:.2f} requis")
+bruit = (MecanismeVectoriel("laplace", epsilon=EPSILON_PREDICTION, sensibilite=SENSIBILITE_PREDICTION,
+                            bornes=(0.0, 1.0))
+         if EPSILON_PREDICTION > 0 else None)
+service = ServicePrediction(postraitement=bruit).charger()
+ALIAS = {"schuler": "PRESSE-SCH", "kuka": "KUKA-KR210", "fanuc": "CNC-FANUC"}
+# Limite selon le comportement (detecteur_extraction.py) : un tableau de bord
+# qui interroge souvent le même point de fonctionnement garde un quota large,
+# un client qui balaie le domaine d'entrée tombe au quota d'extraction
+LIMITE_NORMALE = "120 per minute"
+LIMITE_SUSPECT = "5 per hour"
+detecteurs = {machine: DetecteurExtraction(domaine(machine)) for machine in MACHINES}
+# Cadences de production (S5) : budget de confidentialité par client et par
+# machine (budget_confidentialite.py), une question déjà posée ne coûte rien
+budget = ComptableBudget()
+for machine in MACHINES:
+    budget.declarer(f"cadence:{machine}", dp_mechanism.epsilon, dp_mechanism.delta)
+budget.charger()
+
+
+def limite_predict():
+    client = get_remote_address()
+    return LIMITE_SUSPECT if any(d.suspect(client) for d in detecteurs.values()) else LIMITE_NORMALE
+
+
 # Configuration du Rate Limiter (Bouclier contre l'extraction)
-# On limite à 5 requêtes par minute pour la démo
 limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["200 per day", "5 per minute"],
-    storage_uri="memory://",
+    storage_uri=STOCKAGE_LIMITES,
+    strategy=STRATEGIE_LIMITES,
 )
 
-@app.route('/predict/schuler', methods=['GET'])
-@limiter.limit("5 per minute") # Limite spécifique pour l'extraction de modèle
-def predict():
-    # Simulation d'une réponse du modèle IA (Random Forest/LSTM)
+def conseil(probabilite):
+    if probabilite < 0.2:
+        return "Optimal", "Maintenance dans 15 jours"
+    if probabilite < 0.6:
+        return "Surveillance", "Maintenance à planifier cette semaine"
+    return "Critique", "Arrêt et intervention immédiate"
+
+
+@app.route('/predict/<machine>', methods=['GET'])
+@limiter.limit(limite_predict) # Limite selon le profil de requêtes du client
+def predict(machine):
+    machine = ALIAS.get(machine.lower(), machine.upper())
+    if machine not in MACHINES:
+        return jsonify({"erreur": f"machine inconnue, attendues : {', '.join(MACHINES)}"}), 404
+    # Entrées absentes : point de fonctionnement nominal
+    try:
+        x = service.entrees(machine, request.args)
+    except ValueError:
+        return jsonify({"erreur": "entrées numériques attendues dans le domaine de fonctionnement : "
+                                  + ", ".join(f"{v} [{bas}, {haut}]" for v, (bas, haut) in domaine(machine).items())}), 400
+    client = get_remote_address()
+    if detecteurs[machine].observer(client, dict(zip(MACHINES[machine][1], x))):
+        app.logger.warning("[S2] profil d'extraction : %s %s", client, detecteurs[machine].etat(client))
+    probabilite = service.predire(machine, x)
+    statut, action = conseil(probabilite)
+    return jsonify({
+        "machine": MACHINES[machine][0],
+        "statut": statut,
+        "probabilite_panne": f"{probabilite:.1%}",
+        "conseil": action
+    })
+
+@app.route('/cadence/<machine>', methods=['GET'])
+def cadence(machine):
+    machine = ALIAS.get(machine.lower(), machine.upper())
+    if machine not in MACHINES:
+        return jsonify({"erreur": f"machine inconnue, attendues : {', '.join(MACHINES)}"}), 404
+    jour = request.args.get("jour", datetime.date.today().isoformat())
+    try:
+        datetime.date.fromisoformat(jour)
+    except ValueError:
+        return jsonify({"erreur": "jour attendu au format AAAA-MM-JJ"}), 400
+    client, grandeur = get_remote_address(), f"cadence:{machine}"
+    try:
+        valeur = budget.repondre(client, grandeur, jour,
+                                 lambda: obtenir_cadence_securisee(cadence_du_jour(machine, jour)))
+    except BudgetEpuise:
+        return jsonify({"erreur": "budget de confidentialité épuisé", "budget": budget.depense(client, grandeur)}), 429
     return jsonify({
-        "machine": "Presse SCHULER",
-        "statut": "Optimal",
-        "probabilite_panne": "2.4%",
-        "conseil": "Maintenance dans 15 jours"
+        "machine": MACHINES[machine][0],
+        "jour": jour,
+        "cadence": f"{valeur:.1%}",
+        "budget": budget.depense(client, grandeur)
     })
 
 if __name__ == '__main__':
     print("--- SERVEUR BMI : API de Prédiction Sécurisée ---")
-    app.run(host='0.0.0.0', port=5000)
+    print(f"Limites : {STOCKAGE_LIMITES} ({STRATEGIE_LIMITES})")
+    print(f"Modèles : {', '.join(service.modeles)} ({service.dossier}/)")
+    print(f"Sorties : {bruit or 'sans bruit différentiel'}")
+    print(f"Budgets S5 : ε={budget.epsilon_max}, δ={budget.delta_max} par client et par machine ({budget.fichier})")
+    app.run(host='0.0.0.0', port=5000, threaded=True)
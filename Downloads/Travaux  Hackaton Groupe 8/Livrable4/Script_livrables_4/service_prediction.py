@@ -0,0 +1,184 @@
+import math
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+# Service de prédiction de panne (S2) derrière /predict/<machine> :
+#   - un modèle sérialisé par machine (DOSSIER_PREDICTION/<machine>.joblib),
+#     chargé une fois au démarrage (entraîné sur données simulées au premier
+#     lancement, comme le modèle par défaut de la plateforme S1)
+#   - regroupement : les requêtes arrivées dans la même fenêtre de DELAI
+#     secondes (ou LOT_MAX requêtes) sont notées par un seul predict_proba
+#     par machine, dans un thread dédié ; le coût fixe d'un appel sklearn
+#     est payé une fois par lot au lieu d'une fois par requête
+#   - cache LRU (machine, entrées arrondies) → probabilité, et une même
+#     entrée déjà en cours de calcul n'est pas recalculée (requêtes
+#     identiques simultanées : un seul résultat partagé)
+#   - post-traitement optionnel appliqué au tableau des probabilités de
+#     chaque lot (ex. bruit différentiel, bruit_differentiel.py) ; la valeur
+#     bruitée est celle mise en cache : une même question reçoit la même réponse
+DOSSIER_PREDICTION = "modeles_prediction"
+LOT_MAX   = 512
+DELAI     = 0.002           # secondes d'attente max pour compléter un lot
+CACHE     = 10000           # entrées gardées dans le cache LRU
+DECIMALES = 2               # arrondi des entrées pour la clé du cache
+ATTENTE_MAX = 5.0           # secondes avant d'abandonner une requête
+
+MACHINES = {
+    #  machine        libellé               entrées : (min, max) de fonctionnement, nominal
+    "KUKA-KR210":  ("Robot KUKA KR210",    {"vibration": (0, 12, 3), "couple": (0, 400, 180),
+                                            "temperature": (20, 90, 45)}),
+    "CNC-FANUC":   ("Centre CNC FANUC",    {"temperature_broche": (20, 110, 55), "vibration": (0, 10, 2),
+                                            "charge": (0, 100, 60)}),
+    "PRESSE-SCH":  ("Presse SCHULER",      {"force": (0, 2500, 1600), "cadence": (0, 60, 30),
+                                            "temperature": (20, 90, 55)}),
+}
+
+
+def domaine(machine):
+    """{entrée: (min, max)} d'une machine."""
+    return {v: (bas, haut) for v, (bas, haut, _) in MACHINES[machine][1].items()}
+
+
+def entrainer(machine, n=5000, graine=0):
+    """Modèle de démonstration : la panne devient probable loin du point nominal."""
+    rng = np.random.default_rng(graine)
+    entrees = MACHINES[machine][1].values()
+    bas, haut, nominal = (np.array(c, dtype=np.float64) for c in zip(*entrees))
+    # Moitié sur tout le domaine, moitié autour du point nominal (régime courant)
+    x = np.r_[rng.uniform(bas, haut, (n // 2, len(bas))),
+              np.clip(rng.normal(nominal, 0.1 * (haut - bas), (n - n // 2, len(bas))), bas, haut)]
+    ecart = np.abs(x - nominal) / (haut - bas)
+    risque = 1 / (1 + np.exp(-(20 * ecart.max(axis=1) + 4 * ecart.sum(axis=1) - 7)))
+    y = rng.random(n) < risque
+    return RandomForestClassifier(n_estimators=50, max_depth=8, random_state=graine).fit(x, y)
+
+
+class ServicePrediction:
+
+    def __init__(self, dossier=DOSSIER_PREDICTION, lot_max=LOT_MAX, delai=DELAI, cache=CACHE, postraitement=None):
+        """postraitement : tableau de probabilités → tableau de même forme, appelé une fois par lot."""
+        self.dossier = dossier
+        self.lot_max = lot_max
+        self.delai = delai
+        self.capacite_cache = cache
+        self.postraitement = postraitement
+        self.modeles = {}
+        self._cache = OrderedDict()
+        self._en_cours = {}                   # clé → Future partagé
+        self._verrou = threading.Lock()
+        self._file = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self.compteurs = {"requetes": 0, "cache": 0, "partagees": 0, "lots": 0, "notees": 0}
+
+    def charger(self):
+        """Charge (ou crée au premier lancement) le modèle de chaque machine."""
+        os.makedirs(self.dossier, exist_ok=True)
+        for machine in MACHINES:
+            chemin = os.path.join(self.dossier, f"{machine}.joblib")
+            if not os.path.exists(chemin):
+                joblib.dump(entrainer(machine), chemin)
+            modele = joblib.load(chemin)
+            modele.set_params(n_jobs=1)   # un lot de quelques centaines de lignes : pas de pool de threads
+            self.modeles[machine] = modele
+        return self
+
+    def demarrer(self):
+        """Thread de notation ; lancé à la première requête (après fork() des workers)."""
+        with self._verrou:
+            if self._thread is None or self._pid != os.getpid():
+                if self._pid is not None:           # processus fils : file et calculs du parent perdus
+                    self._file, self._en_cours = queue.Queue(), {}
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._boucle, name="lots-prediction", daemon=True)
+                self._thread.start()
+        return self
+
+    def entrees(self, machine, valeurs):
+        """
+        {entrée: valeur} (absentes : nominal) → vecteur dans l'ordre du modèle.
+        ValueError si illisible, non finie ou hors du domaine de fonctionnement :
+        une requête invalide ne doit pas atteindre le lot qu'elle partagerait.
+        """
+        x = []
+        for v, (bas, haut, nominal) in MACHINES[machine][1].items():
+            valeur = float(valeurs.get(v, nominal))
+            if not (math.isfinite(valeur) and bas <= valeur <= haut):
+                raise ValueError(f"{v} = {valeur} hors de [{bas}, {haut}]")
+            x.append(round(valeur, DECIMALES))
+        return tuple(x)
+
+    # ── Côté requête (threads du serveur WSGI) ───────────────────
+    def predire(self, machine, x):
+        """Probabilité de panne pour le vecteur x (tuple) ; KeyError si machine inconnue."""
+        if machine not in self.modeles:
+            raise KeyError(machine)
+        if self._thread is None or self._pid != os.getpid():
+            self.demarrer()
+        cle = (machine, x)
+        with self._verrou:
+            self.compteurs["requetes"] += 1
+            if cle in self._cache:
+                self._cache.move_to_end(cle)
+                self.compteurs["cache"] += 1
+                return self._cache[cle]
+            futur = self._en_cours.get(cle)
+            if futur is None:
+                futur = self._en_cours[cle] = Future()
+                self._file.put((cle, futur))
+            else:
+                self.compteurs["partagees"] += 1
+        return futur.result(ATTENTE_MAX)
+
+    # ── Thread de notation ───────────────────────────────────────
+    def _regrouper(self):
+        lot = [self._file.get()]
+        echeance = time.monotonic() + self.delai
+        while len(lot) < self.lot_max:
+            reste = echeance - time.monotonic()
+            try:
+                lot.append(self._file.get(timeout=reste) if reste > 0 else self._file.get_nowait())
+            except queue.Empty:
+                break
+        return lot
+
+    def _boucle(self):
+        while True:
+            lot = self._regrouper()
+            par_machine = {}
+            for cle, futur in lot:
+                par_machine.setdefault(cle[0], []).append((cle, futur))
+            for machine, requetes in par_machine.items():
+                try:
+                    x = np.array([cle[1] for cle, _ in requetes])
+                    probas = self.modeles[machine].predict_proba(x)[:, 1]
+                    if self.postraitement is not None:
+                        probas = self.postraitement(probas)
+                except Exception as e:
+                    with self._verrou:
+                        for cle, futur in requetes:
+                            self._en_cours.pop(cle, None)
+                    for _, futur in requetes:
+                        futur.set_exception(e)
+                    continue
+                with self._verrou:
+                    for (cle, _), p in zip(requetes, probas):
+                        self._cache[cle] = float(p)
+                        self._en_cours.pop(cle, None)
+                    while len(self._cache) > self.capacite_cache:
+                        self._cache.popitem(last=False)
+                for (_, futur), p in zip(requetes, probas):
+                    futur.set_result(float(p))
+            self.compteurs["lots"] += 1
+            self.compteurs["notees"] += len(lot)
+
+    def stats(self):
+        c = self.compteurs
+        return {**c, "lot_moyen": round(c["notees"] / max(c["lots"], 1), 1), "en_cache": len(self._cache)}
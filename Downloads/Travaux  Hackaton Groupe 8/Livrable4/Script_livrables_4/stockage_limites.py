@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+# Stockage partagé des compteurs Flask-Limiter (S2) : un fichier SQLite en
+# mode WAL, commun à tous les workers d'un même hôte (gunicorn -w N, etc.).
+# Avec "memory://" chaque worker a ses propres compteurs et un attaquant
+# obtient N fois le quota.
+#   storage_uri="sqlite:///limites_s2.db"     (chemin relatif)
+#   storage_uri="sqlite:////var/lib/bmi/l.db" (chemin absolu)
+# Fenêtre fixe : un seul UPSERT ... RETURNING par requête (atomique, pas de
+# verrou applicatif). Fenêtre glissante ("sliding-window-counter") : lecture
+# des deux fenêtres et incrément dans une même transaction BEGIN IMMEDIATE.
+# Plusieurs hôtes : storage_uri="redis://hote:6379" (stockage Redis de limits,
+# paquet redis requis), sans changer le reste du serveur.
+FICHIER_DEFAUT = "limites_s2.db"
+ATTENTE_VERROU = 5000           # ms d'attente si un autre worker écrit
+PURGE_PERIODE  = 60             # secondes entre deux suppressions des compteurs expirés
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS compteurs (
+    cle TEXT PRIMARY KEY, valeur INTEGER NOT NULL, expiration REAL NOT NULL
+) WITHOUT ROWID"""
+_INCR = """INSERT INTO compteurs VALUES (:cle, :n, :exp) ON CONFLICT(cle) DO UPDATE SET
+    valeur     = CASE WHEN expiration <= :t THEN :n   ELSE valeur + :n END,
+    expiration = CASE WHEN expiration <= :t THEN :exp ELSE expiration END
+    RETURNING valeur"""
+
+
+def connecter(chemin, schema):
+    """
+    Connexion autocommit en mode WAL, schéma créé au besoin. Partagée avec
+    les budgets S5 (budget_confidentialite.py) ; une connexion par processus.
+    """
+    c = sqlite3.connect(chemin, isolation_level=None, check_same_thread=False,
+                        timeout=ATTENTE_VERROU / 1000)
+    c.execute(f"PRAGMA busy_timeout = {ATTENTE_VERROU}")
+    # Passage en WAL (une fois par fichier) : verrou exclusif, sans
+    # attente automatique si tous les workers démarrent ensemble
+    for essai in range(50):
+        try:
+            if c.execute("PRAGMA journal_mode").fetchone()[0] in ("wal", "memory"):
+                break
+            c.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError:
+            time.sleep(0.01 * (essai + 1))
+    c.execute("PRAGMA synchronous = NORMAL")    # compteurs : pas de fsync par requête
+    c.execute(schema)
+    return c
+
+
+class StockageSQLite(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Compteurs à expiration dans SQLite (WAL), une connexion par processus et par thread."""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        chemin = (uri or "sqlite://")[len("sqlite://"):]
+        self.chemin = chemin[1:] if chemin.startswith("/") else chemin
+        self.chemin = self.chemin or FICHIER_DEFAUT
+        self._local = threading.local()
+        self._prochaine_purge = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._connexion()              # crée le fichier et la table dès le démarrage
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connexion(self):
+        # Après fork() (workers gunicorn), une connexion héritée n'est pas réutilisable
+        c = getattr(self._local, "connexion", None)
+        if c is None or self._local.pid != os.getpid():
+            c = connecter(self.chemin, _SCHEMA)
+            self._local.connexion, self._local.pid = c, os.getpid()
+        return c
+
+    def _purger(self, c, maintenant):
+        if maintenant >= self._prochaine_purge:
+            self._prochaine_purge = maintenant + PURGE_PERIODE
+            c.execute("DELETE FROM compteurs WHERE expiration <= ?", (maintenant,))
+
+    # ── Fenêtre fixe ─────────────────────────────────────────────
+    def incr(self, key, expiry, amount=1):
+        c = self._connexion()
+        maintenant = time.time()
+        self._purger(c, maintenant)
+        return c.execute(_INCR, {"cle": key, "n": amount, "exp": maintenant + expiry,
+                                 "t": maintenant}).fetchone()[0]
+
+    def get(self, key):
+        ligne = self._connexion().execute(
+            "SELECT valeur FROM compteurs WHERE cle = ? AND expiration > ?", (key, time.time())).fetchone()
+        return ligne[0] if ligne else 0
+
+    def get_expiry(self, key):
+        maintenant = time.time()
+        ligne = self._connexion().execute(
+            "SELECT expiration FROM compteurs WHERE cle = ? AND expiration > ?", (key, maintenant)).fetchone()
+        return ligne[0] if ligne else maintenant
+
+    def check(self):
+        try:
+            return self._connexion().execute("SELECT 1").fetchone() == (1,)
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connexion().execute("DELETE FROM compteurs").rowcount
+
+    def clear(self, key):
+        self._connexion().execute("DELETE FROM compteurs WHERE cle = ?", (key,))
+
+    # ── Fenêtre glissante ────────────────────────────────────────
+    def _fenetres(self, c, key, expiry, maintenant):
+        precedente, courante = self.sliding_window_keys(key, expiry, maintenant)
+        valeurs = dict(c.execute("SELECT cle, valeur FROM compteurs WHERE cle IN (?, ?) AND expiration > ?",
+                                 (precedente, courante, maintenant)).fetchall())
+        n_prec, n_cour = valeurs.get(precedente, 0), valeurs.get(courante, 0)
+        ttl_prec = (1 - (((maintenant - expiry) / expiry) % 1)) * expiry if n_prec else 0.0
+        ttl_cour = (1 - ((maintenant / expiry) % 1)) * expiry + expiry
+        return courante, n_prec, ttl_prec, n_cour, ttl_cour
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        c = self._connexion()
+        maintenant = time.time()
+        c.execute("BEGIN IMMEDIATE")            # lecture + incrément sans course entre workers
+        try:
+            courante, n_prec, ttl_prec, n_cour, _ = self._fenetres(c, key, expiry, maintenant)
+            accepte = floor(n_prec * ttl_prec / expiry + n_cour) + amount <= limit
+            if accepte:
+                c.execute(_INCR, {"cle": courante, "n": amount, "exp": maintenant + 2 * expiry,
+                                  "t": maintenant}).fetchone()
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        return accepte
+
+    def get_sliding_window(self, key, expiry):
+        _, n_prec, ttl_prec, n_cour, ttl_cour = self._fenetres(self._connexion(), key, expiry, time.time())
+        return n_prec, ttl_prec, n_cour, ttl_cour
+
+    def clear_sliding_window(self, key, expiry):
+        precedente, courante = self.sliding_window_keys(key, expiry, time.time())
+        self._connexion().execute("DELETE FROM compteurs WHERE cle IN (?, ?)", (precedente, courante))
@@ -16,6 +16,10 @@ from datetime import datetime
 from argon2 import PasswordHasher
 # VerifyMismatchError non utilisé — supprimé
 
+from database import invalider_profil
+import refresh_tokens
+import revocation
+
 try:
     from mailer import envoyer_credentials
     MAIL_DISPONIBLE = True
@@ -189,6 +193,8 @@ def ajouter_utilisateur(username, mot_de_passe=None, role="operateur_fanuc", ema
             conn2.commit()
             conn2.close()
 
+        invalider_profil(username)
+
         log_event(
             f"Création utilisateur : {username} | rôle={role} "
             f"| mdp_temp={mdp_temporaire}"
@@ -288,6 +294,10 @@ def desactiver_utilisateur(username):
     conn.close()
 
     if modifie:
+        invalider_profil(username)
+        # Couper aussi les sessions en cours (JWT 15 min + refresh)
+        revocation.revoquer_utilisateur(username)
+        refresh_tokens.revoquer_utilisateur(username)
         log_event(f"Désactivation : {username}")
     return modifie > 0
 
@@ -306,6 +316,7 @@ def reactiver_utilisateur(username):
     conn.close()
 
     if modifie:
+        invalider_profil(username)
         log_event(f"Réactivation : {username}")
     return modifie > 0
 
@@ -327,6 +338,7 @@ def reinitialiser_totp(username):
     conn.close()
 
     if modifie:
+        invalider_profil(username)
         log_event(f"Reset TOTP : {username}")
         return nouveau_secret
     return None
@@ -377,6 +389,7 @@ def changer_mot_de_passe(username, nouveau_mdp):
     conn.commit()
     conn.close()
 
+    invalider_profil(username)
     log_event(f"Changement mot de passe : {username}")
     return True, "Mot de passe mis à jour avec succès"
 
@@ -34,6 +34,8 @@ from auth import (
     MAX_TENTATIVES
 )
 from database import initialiser_db, creer_utilisateurs_test, set_must_change
+from revocation import est_revoque
+from archivage import rechercher_logs
 from password_policy import (
     valider_mot_de_passe, sauvegarder_mot_de_passe
 )
@@ -144,6 +146,8 @@ def requiert_auth(f):
         payload = verifier_jwt(token)
         if "erreur" in payload:
             return jsonify(payload), 401
+        if est_revoque(payload):
+            return jsonify({"erreur": "Token révoqué"}), 401
         request.utilisateur = payload
         return f(*args, **kwargs)
     return wrapper
@@ -543,6 +547,23 @@ def get_logs():
         )
         return jsonify({"erreur": "Acces refuse"}), 403
 
+    # Période demandée → archives compressées + table chaude
+    depuis = request.args.get("depuis")
+    jusqua = request.args.get("jusqua")
+    if depuis or jusqua:
+        try:
+            limite = int(request.args.get("limite", 500))
+        except ValueError:
+            return jsonify({"erreur": "Parametre limite invalide"}), 400
+        if limite < 1:
+            return jsonify({"erreur": "Parametre limite invalide"}), 400
+        logs = rechercher_logs(
+            depuis, jusqua,
+            username=request.args.get("username"),
+            limite=min(limite, 1000)
+        )
+        return jsonify({"logs": logs, "total": len(logs)}), 200
+
     from database import get_connection
     conn   = get_connection()
     cursor = conn.execute("""
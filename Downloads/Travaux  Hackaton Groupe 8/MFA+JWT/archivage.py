@@ -0,0 +1,268 @@
+"""
+archivage.py — BMI Auth v2.0
+Rétention de auth_logs : chaque journée plus ancienne que RETENTION_JOURS
+est compressée en NDJSON (zstd si disponible, sinon gzip) dans archives/,
+indexée dans un manifeste, puis supprimée de la table chaude par lots.
+rechercher_logs() interroge les archives concernées + la table chaude.
+"""
+
+import os
+import gzip
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from logger_bmi import auth_logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DB_PATH          = "bmi_auth.db"
+RETENTION_JOURS  = 90
+DOSSIER_ARCHIVES = "archives"
+MANIFESTE        = os.path.join(DOSSIER_ARCHIVES, "manifest.json")
+HEURE_ARCHIVAGE  = 3        # job nocturne à 03:00
+LOT_SUPPRESSION  = 5000
+EXTENSION        = "zst" if zstandard else "gz"
+
+_stop   = threading.Event()
+_thread = None
+
+
+def _conn():
+    c = sqlite3.connect(DB_PATH, timeout=10)
+    c.row_factory = sqlite3.Row
+    return c
+
+
+# ============================================================
+# FICHIERS D'ARCHIVE (même format que la rétention des audit_logs
+# d'AI4BMI, dupliqué ici : ce dossier se déploie seul)
+# ============================================================
+
+def _ouvrir_ecriture(chemin, extension=EXTENSION):
+    if extension == "zst":
+        return zstandard.open(chemin, "wt", encoding="utf-8")
+    return gzip.open(chemin, "wt", encoding="utf-8")
+
+
+def _ouvrir_lecture(chemin):
+    if chemin.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard requis pour lire {chemin}")
+        return zstandard.open(chemin, "rt", encoding="utf-8")
+    return gzip.open(chemin, "rt", encoding="utf-8")
+
+
+def charger_manifeste():
+    """Index des archives : une entrée par journée (ou reprise) archivée."""
+    try:
+        with open(MANIFESTE, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _sauver_manifeste(manifeste):
+    """Écriture atomique (fichier temporaire + fsync + rename)."""
+    tmp = MANIFESTE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifeste, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, MANIFESTE)
+
+
+def _ecrire_archive(chemin, lignes, extension=EXTENSION):
+    """
+    Écrit les lignes (ids croissants) via un fichier temporaire renommé
+    à la fin ; rien n'est créé si aucune ligne.
+    Retourne (nombre, premier id, dernier id) — ids à None si vide.
+    """
+    nb, premier_id, dernier_id = 0, None, None
+    with _ouvrir_ecriture(chemin + ".tmp", extension) as f:
+        for ligne in lignes:
+            f.write(json.dumps(ligne) + "\n")
+            nb        += 1
+            premier_id = premier_id or ligne["id"]
+            dernier_id = ligne["id"]
+    if nb:
+        os.replace(chemin + ".tmp", chemin)
+    else:
+        os.remove(chemin + ".tmp")
+    return nb, premier_id, dernier_id
+
+
+def _lire_archive(chemin):
+    with _ouvrir_lecture(chemin) as f:
+        for ligne in f:
+            yield json.loads(ligne)
+
+# ============================================================
+# ARCHIVAGE
+# ============================================================
+
+def _archiver_jour(conn, jour, manifeste):
+    """
+    Archive la partition `jour` puis la supprime de auth_logs.
+    Le manifeste mémorise le dernier id écrit : après un crash entre
+    l'archive et la suppression, rien n'est archivé deux fois.
+    """
+    debut  = jour.strftime("%Y-%m-%d 00:00:00")
+    fin    = (jour + timedelta(days=1)).strftime("%Y-%m-%d 00:00:00")
+    parts  = [e for e in manifeste if e["jour"] == jour.isoformat()]
+    deja   = max((e["dernier_id"] for e in parts), default=0)
+
+    cursor = conn.execute("""
+        SELECT id, username, ip_address, action, succes, raison, timestamp
+        FROM auth_logs
+        WHERE timestamp >= ? AND timestamp < ? AND id > ?
+        ORDER BY id
+    """, (debut, fin, deja))
+
+    nom    = f"auth_logs-{jour.isoformat()}" + (f"-{len(parts) + 1}" if parts else "")
+    chemin = os.path.join(DOSSIER_ARCHIVES, f"{nom}.ndjson.{EXTENSION}")
+    nb, premier_id, dernier_id = _ecrire_archive(
+        chemin, (dict(row) for row in cursor), EXTENSION
+    )
+    dernier_id = dernier_id or deja
+
+    if nb:
+        manifeste.append({
+            "jour":        jour.isoformat(),
+            "fichier":     os.path.basename(chemin),
+            "lignes":      nb,
+            "premier_id":  premier_id,
+            "dernier_id":  dernier_id,
+            "debut":       debut,
+            "fin":         fin,
+            "archive_le":  datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        _sauver_manifeste(manifeste)
+
+    while True:
+        n = conn.execute("""
+            DELETE FROM auth_logs WHERE id IN (
+                SELECT id FROM auth_logs
+                WHERE timestamp >= ? AND timestamp < ? AND id <= ?
+                LIMIT ?
+            )
+        """, (debut, fin, dernier_id, LOT_SUPPRESSION)).rowcount
+        conn.commit()
+        if n < LOT_SUPPRESSION:
+            break
+    return nb
+
+
+def archiver_journaux(retention_jours=RETENTION_JOURS, maintenant=None):
+    """Archive toutes les journées entièrement hors rétention."""
+    os.makedirs(DOSSIER_ARCHIVES, exist_ok=True)
+    limite = ((maintenant or datetime.utcnow())
+              - timedelta(days=retention_jours)).date()
+    conn = _conn()
+    try:
+        row = conn.execute("SELECT MIN(timestamp) FROM auth_logs").fetchone()
+        if not row[0]:
+            return 0
+        manifeste = charger_manifeste()
+        jour  = datetime.strptime(row[0][:10], "%Y-%m-%d").date()
+        total = 0
+        while jour < limite:
+            total += _archiver_jour(conn, jour, manifeste)
+            jour  += timedelta(days=1)
+    finally:
+        conn.close()
+    if total:
+        auth_logger.info(
+            f"Archivage auth_logs : {total} ligne(s) avant {limite}"
+        )
+    return total
+
+# ============================================================
+# RECHERCHE (archives + table chaude)
+# ============================================================
+
+def rechercher_logs(debut=None, fin=None, username=None, limite=500):
+    """
+    Journaux dans [debut, fin) ("YYYY-MM-DD[ HH:MM:SS]"), ordre chronologique.
+    Seules les archives qui recoupent la période sont décompressées.
+    """
+    resultats = []
+
+    def garder(row):
+        ts = row["timestamp"]
+        return ((not debut or ts >= debut) and (not fin or ts < fin)
+                and (not username or row["username"] == username))
+
+    for e in sorted(charger_manifeste(),
+                    key=lambda e: (e["jour"], e["premier_id"])):
+        if (debut and e["fin"] <= debut) or (fin and e["debut"] >= fin):
+            continue
+        for row in _lire_archive(os.path.join(DOSSIER_ARCHIVES, e["fichier"])):
+            if garder(row):
+                resultats.append(row)
+                if len(resultats) >= limite:
+                    return resultats
+
+    requete = """
+        SELECT id, username, ip_address, action, succes, raison, timestamp
+        FROM auth_logs WHERE 1 = 1
+    """
+    params = []
+    if debut:
+        requete += " AND timestamp >= ?"
+        params.append(debut)
+    if fin:
+        requete += " AND timestamp < ?"
+        params.append(fin)
+    if username:
+        requete += " AND username = ?"
+        params.append(username)
+    requete += " ORDER BY timestamp, id LIMIT ?"
+    params.append(limite - len(resultats))
+
+    conn = _conn()
+    resultats += [dict(r) for r in conn.execute(requete, params)]
+    conn.close()
+    return resultats
+
+# ============================================================
+# JOB NOCTURNE
+# ============================================================
+
+def _secondes_avant_prochaine_execution(heure):
+    maintenant = datetime.now()
+    prochaine  = maintenant.replace(hour=heure, minute=0,
+                                    second=0, microsecond=0)
+    if prochaine <= maintenant:
+        prochaine += timedelta(days=1)
+    return (prochaine - maintenant).total_seconds()
+
+
+def _boucle(heure):
+    while not _stop.wait(_secondes_avant_prochaine_execution(heure)):
+        try:
+            archiver_journaux()
+        except Exception as e:
+            auth_logger.error(f"Erreur archivage auth_logs : {e}")
+
+
+def demarrer_archivage(heure=HEURE_ARCHIVAGE):
+    """Lance le job d'archivage nocturne dans un thread démon."""
+    global _thread
+    if _thread and _thread.is_alive():
+        return _thread
+    _stop.clear()
+    _thread = threading.Thread(
+        target=_boucle, args=(heure,),
+        name="archivage-auth-logs", daemon=True
+    )
+    _thread.start()
+    return _thread
+
+
+def arreter_archivage():
+    _stop.set()
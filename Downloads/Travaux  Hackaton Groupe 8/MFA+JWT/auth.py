@@ -14,7 +14,8 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
 
 # Logger centralisé — doit être importé EN PREMIER
-from database import get_must_change, set_must_change
+from database import charger_profil
+import refresh_tokens
 from logger_bmi import (
     auth_logger,
     log_connexion,
@@ -212,22 +213,21 @@ def est_bloque(username, ip):
 # VÉRIFICATION MOT DE PASSE
 # ============================================================
 
-def verifier_mot_de_passe(username, mot_de_passe):
-    """Compatible Argon2 (nouveaux comptes) et SHA-256 (anciens)."""
-    conn = get_connection()
-    row  = conn.execute("""
-        SELECT password_hash FROM users
-        WHERE username = ? AND actif = 1
-    """, (username,)).fetchone()
-    conn.close()
+def verifier_mot_de_passe(username, mot_de_passe, profil=None):
+    """
+    Compatible Argon2 (nouveaux comptes) et SHA-256 (anciens).
+    `profil` : contexte déjà chargé par charger_profil() (évite une requête).
+    """
+    if profil is None:
+        profil = charger_profil(username)
 
-    if not row:
+    if not profil or not profil["actif"]:
         auth_logger.warning(
             f"Utilisateur inconnu ou inactif : {username}"
         )
         return False
 
-    stored = row["password_hash"]
+    stored = profil["password_hash"]
 
     if stored.startswith("$argon2"):
         try:
@@ -247,21 +247,17 @@ def verifier_mot_de_passe(username, mot_de_passe):
 # TOTP
 # ============================================================
 
-def verifier_totp(username, code_totp):
-    conn = get_connection()
-    row  = conn.execute(
-        "SELECT totp_secret FROM users WHERE username = ?",
-        (username,)
-    ).fetchone()
-    conn.close()
+def verifier_totp(username, code_totp, profil=None):
+    if profil is None:
+        profil = charger_profil(username)
 
-    if not row:
+    if not profil:
         auth_logger.error(
             f"Secret TOTP introuvable : {username}"
         )
         return False
 
-    valide = pyotp.TOTP(row["totp_secret"]).verify(
+    valide = pyotp.TOTP(profil["totp_secret"]).verify(
         code_totp, valid_window=1
     )
 
@@ -276,19 +272,11 @@ def verifier_totp(username, code_totp):
 # JWT RS256
 # ============================================================
 
-def _get_role(username):
-    conn = get_connection()
-    row  = conn.execute(
-        "SELECT role FROM users WHERE username = ?",
-        (username,)
-    ).fetchone()
-    conn.close()
-    return row["role"] if row else "inconnu"
-
-
-def creer_jwt(username):
-    role         = _get_role(username)
-    must_changer = get_must_change(username)
+def creer_jwt(username, profil=None):
+    if profil is None:
+        profil = charger_profil(username)
+    role         = profil["role"] if profil else "inconnu"
+    must_changer = profil["must_change"] if profil else False
     now          = datetime.now(timezone.utc)
     jti          = str(uuid.uuid4())
 
@@ -327,81 +315,30 @@ def verifier_jwt(token):
 # ============================================================
 
 def creer_refresh_token(username):
-    token  = str(uuid.uuid4())
-    expire = datetime.now() + timedelta(days=REFRESH_EXPIRATION)
-
-    conn = get_connection()
-    conn.execute("""
-        INSERT INTO refresh_tokens
-            (token, username, expires_at)
-        VALUES (?, ?, ?)
-    """, (token, username,
-          expire.strftime("%Y-%m-%d %H:%M:%S")))
-    conn.commit()
-    conn.close()
-
+    """Ouvre une nouvelle famille de refresh tokens (nouvelle session)."""
+    token = refresh_tokens.emettre(username)
     auth_logger.info(
         f"Refresh token créé | user={username} "
-        f"expire={expire.strftime('%Y-%m-%d')}"
+        f"expire={REFRESH_EXPIRATION}j"
     )
     return token
 
 
 def renouveler_tokens(refresh_token):
-    conn = get_connection()
-    row  = conn.execute(
-        "SELECT * FROM refresh_tokens WHERE token = ?",
-        (refresh_token,)
-    ).fetchone()
-
-    if not row:
-        conn.close()
-        auth_logger.warning("Refresh token inconnu présenté")
-        return None, None, "Token inconnu"
-
-    expire = datetime.strptime(
-        row["expires_at"], "%Y-%m-%d %H:%M:%S"
+    """Rotation atomique du refresh token puis émission d'un JWT."""
+    username, nouveau_refresh, statut = refresh_tokens.rotation(
+        refresh_token
     )
+    if not username:
+        return None, None, statut
 
-    if datetime.now() > expire:
-        conn.execute(
-            "DELETE FROM refresh_tokens WHERE token = ?",
-            (refresh_token,)
-        )
-        conn.commit()
-        conn.close()
-        auth_logger.warning(
-            f"Refresh expiré | user={row['username']}"
-        )
-        return None, None, "Token expiré"
-
-    if row["utilise"]:
-        # VOL DE TOKEN
-        username = row["username"]
-        conn.execute(
-            "DELETE FROM refresh_tokens WHERE username = ?",
-            (username,)
-        )
-        conn.commit()
-        conn.close()
-        log_securite(
-            "VOL_TOKEN_DETECTE",
-            f"Réutilisation refresh token ! "
-            f"user={username} — tous tokens révoqués",
-            niveau="CRITICAL"
-        )
-        return None, None, "Token compromis"
-
-    username = row["username"]
-    conn.execute(
-        "UPDATE refresh_tokens SET utilise=1 WHERE token=?",
-        (refresh_token,)
-    )
-    conn.commit()
-    conn.close()
+    profil = charger_profil(username)
+    if not profil or not profil["actif"]:
+        refresh_tokens.revoquer_utilisateur(username)
+        auth_logger.warning(f"Refresh refusé, compte inactif | user={username}")
+        return None, None, "Compte désactivé"
 
-    nouveau_jwt     = creer_jwt(username)
-    nouveau_refresh = creer_refresh_token(username)
+    nouveau_jwt = creer_jwt(username, profil)
     auth_logger.info(
         f"Tokens renouvelés | user={username}"
     )
@@ -432,8 +369,11 @@ def connexion_complete(username, mot_de_passe,
             "tentatives_restantes": 0
         }
 
+    # Contexte utilisateur chargé une seule fois pour tout le flux
+    profil = charger_profil(username)
+
     # 2. Mot de passe
-    if not verifier_mot_de_passe(username, mot_de_passe):
+    if not verifier_mot_de_passe(username, mot_de_passe, profil):
         enregistrer_tentative_echouee(username, ip)
         nb = compter_tentatives_recentes(username, ip)
         log_connexion(username, ip, False,
@@ -445,7 +385,7 @@ def connexion_complete(username, mot_de_passe,
         }
 
     # 3. TOTP
-    if not verifier_totp(username, code_totp):
+    if not verifier_totp(username, code_totp, profil):
         enregistrer_tentative_echouee(username, ip)
         nb = compter_tentatives_recentes(username, ip)
         log_connexion(username, ip, False,
@@ -458,8 +398,8 @@ def connexion_complete(username, mot_de_passe,
 
     # 4. SUCCÈS
     reinitialiser_tentatives(username, ip)
-    role          = _get_role(username)
-    access_token  = creer_jwt(username)
+    role          = profil["role"]
+    access_token  = creer_jwt(username, profil)
     refresh_token = creer_refresh_token(username)
 
     log_connexion(username, ip, True)
@@ -469,7 +409,7 @@ def connexion_complete(username, mot_de_passe,
         niveau="INFO"
     )
 
-    must_changer = get_must_change(username)
+    must_changer = profil["must_change"]
 
     return {
         "succes":        True,
@@ -5,9 +5,19 @@ Initialise SQLite avec toutes les tables nécessaires
 
 import sqlite3
 import os
+import time
+from threading import Lock
 
 DB_PATH = "bmi_auth.db"
 
+# Cache partagé des profils (users + password_metadata)
+PROFIL_TTL               = 10     # secondes
+FICHIER_VERSION_PROFILS  = "profils.version"
+
+_lock_profils   = Lock()
+_cache_profils  = {}
+_version_cache  = None
+
 def get_connection():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
@@ -29,17 +39,6 @@ def initialiser_db():
         )
     """)
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS refresh_tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            token TEXT UNIQUE NOT NULL,
-            username TEXT NOT NULL,
-            expires_at TEXT NOT NULL,
-            utilise INTEGER DEFAULT 0,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS auth_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -51,6 +50,9 @@ def initialiser_db():
             timestamp TEXT DEFAULT CURRENT_TIMESTAMP
         )
     """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_auth_logs_ts ON auth_logs(timestamp)
+    """)
 
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS tentatives (
@@ -80,6 +82,13 @@ def initialiser_db():
 
     conn.commit()
     conn.close()
+
+    # refresh_tokens : schéma et migration gérés par refresh_tokens.py
+    from refresh_tokens import init_table_refresh
+    from revocation import init_table_revocation
+    init_table_refresh()
+    init_table_revocation()
+
     print("Base de données initialisée : bmi_auth.db")
 
 def creer_utilisateurs_test():
@@ -185,3 +194,83 @@ def set_must_change(username, valeur=1):
     """, (username, int(valeur)))
     conn.commit()
     conn.close()
+    invalider_profil(username)
+
+# ============================================================
+# PROFIL UTILISATEUR — 1 requête JOIN + cache TTL partagé
+# ============================================================
+
+def _version_profils():
+    """
+    Horodatage du fichier témoin touché à chaque mutation.
+    Permet à add_user.py (autre processus) d'invalider le cache
+    du serveur sans requête SQL supplémentaire.
+    """
+    try:
+        return os.stat(FICHIER_VERSION_PROFILS).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def charger_profil(username):
+    """
+    Contexte utilisateur pour tout le flux de connexion :
+    hash, secret TOTP, rôle, actif et must_change en UNE requête.
+    Servi depuis le cache si lu il y a moins de PROFIL_TTL secondes.
+    Retourne un dict, ou None si l'utilisateur n'existe pas.
+    """
+    global _version_cache
+    maintenant = time.time()
+    version    = _version_profils()
+
+    with _lock_profils:
+        if version != _version_cache:
+            _cache_profils.clear()
+            _version_cache = version
+        entree = _cache_profils.get(username)
+        if entree and maintenant - entree[0] < PROFIL_TTL:
+            return entree[1]
+
+    conn = get_connection()
+    row  = conn.execute("""
+        SELECT u.username, u.password_hash, u.totp_secret,
+               u.role, u.actif,
+               COALESCE(m.must_change, 0) AS must_change
+        FROM users u
+        LEFT JOIN password_metadata m ON m.username = u.username
+        WHERE u.username = ?
+    """, (username,)).fetchone()
+    conn.close()
+
+    if not row:
+        return None
+
+    profil = {
+        "username":      row["username"],
+        "password_hash": row["password_hash"],
+        "totp_secret":   row["totp_secret"],
+        "role":          row["role"],
+        "actif":         bool(row["actif"]),
+        "must_change":   bool(row["must_change"]),
+    }
+    with _lock_profils:
+        _cache_profils[username] = (maintenant, profil)
+    return profil
+
+
+def invalider_profil(username=None):
+    """
+    Retire un profil (ou tous) du cache et touche le fichier témoin
+    pour que les autres processus rechargent aussi.
+    """
+    with _lock_profils:
+        if username is None:
+            _cache_profils.clear()
+        else:
+            _cache_profils.pop(username, None)
+    try:
+        with open(FICHIER_VERSION_PROFILS, "a"):
+            pass
+        os.utime(FICHIER_VERSION_PROFILS)
+    except OSError:
+        pass
@@ -0,0 +1,262 @@
+"""
+refresh_tokens.py — BMI Auth v2.0
+Stockage des refresh tokens : empreintes SHA-256, expiration en epoch
+indexée, rotation en une transaction, familles de tokens (révocation
+en cas de vol) et compaction périodique en arrière-plan.
+"""
+
+import time
+import sqlite3
+import hashlib
+import secrets
+import threading
+
+from logger_bmi import auth_logger, log_securite
+
+DB_PATH              = "bmi_auth.db"
+REFRESH_EXPIRATION   = 7 * 24 * 3600   # 7 jours
+CONSERVATION_UTILISE = 24 * 3600       # fenêtre de détection de réutilisation
+GC_INTERVALLE        = 3600            # 1 h entre deux compactions
+GC_LOT               = 500             # lignes supprimées par transaction
+
+_gc_stop   = threading.Event()
+_gc_thread = None
+
+
+def _conn():
+    # isolation_level=None → transactions explicites (BEGIN IMMEDIATE)
+    c = sqlite3.connect(DB_PATH, isolation_level=None, timeout=5)
+    c.row_factory = sqlite3.Row
+    return c
+
+
+def _empreinte(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+# ============================================================
+# INITIALISATION / MIGRATION
+# ============================================================
+
+def init_table_refresh():
+    """
+    Crée la table et ses index. Migre l'ancien schéma (token en clair,
+    expires_at TEXT) en hachant les tokens encore valides.
+    """
+    conn = _conn()
+    try:
+        colonnes = [r["name"] for r in conn.execute(
+            "PRAGMA table_info(refresh_tokens)"
+        )]
+        anciens = []
+        if colonnes and "token_hash" not in colonnes:
+            anciens = conn.execute("""
+                SELECT token, username, expires_at FROM refresh_tokens
+                WHERE utilise = 0 AND expires_at > datetime('now', 'localtime')
+            """).fetchall()
+            conn.execute("DROP TABLE refresh_tokens")
+
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                token_hash TEXT PRIMARY KEY,
+                famille    TEXT NOT NULL,
+                username   TEXT NOT NULL,
+                expires_at INTEGER NOT NULL,
+                utilise_le INTEGER,
+                created_at INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_refresh_expires
+                ON refresh_tokens(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_refresh_utilise
+                ON refresh_tokens(utilise_le) WHERE utilise_le IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS idx_refresh_famille
+                ON refresh_tokens(famille);
+            CREATE INDEX IF NOT EXISTS idx_refresh_username
+                ON refresh_tokens(username);
+        """)
+
+        if anciens:
+            maintenant = int(time.time())
+            conn.execute("BEGIN")
+            conn.executemany("""
+                INSERT OR IGNORE INTO refresh_tokens
+                    (token_hash, famille, username, expires_at, created_at)
+                VALUES (?, ?, ?, CAST(strftime('%s', ?, 'utc') AS INTEGER), ?)
+            """, [
+                (_empreinte(r["token"]), secrets.token_hex(8),
+                 r["username"], r["expires_at"], maintenant)
+                for r in anciens
+            ])
+            conn.execute("COMMIT")
+            auth_logger.info(
+                f"refresh_tokens migrée : {len(anciens)} token(s) haché(s)"
+            )
+    finally:
+        conn.close()
+
+# ============================================================
+# ÉMISSION / ROTATION
+# ============================================================
+
+def _inserer(conn, username, famille, maintenant):
+    token = secrets.token_urlsafe(32)
+    conn.execute("""
+        INSERT INTO refresh_tokens
+            (token_hash, famille, username, expires_at, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (_empreinte(token), famille, username,
+          maintenant + REFRESH_EXPIRATION, maintenant))
+    return token
+
+
+def emettre(username):
+    """Nouveau token, nouvelle famille (= nouvelle session)."""
+    conn = _conn()
+    try:
+        token = _inserer(conn, username, secrets.token_hex(8),
+                         int(time.time()))
+    finally:
+        conn.close()
+    return token
+
+
+def rotation(token):
+    """
+    Consomme `token` et émet son successeur dans la même famille,
+    le tout dans UNE transaction (UPDATE ... RETURNING).
+    Retourne (username, nouveau_token, "OK") ou (None, None, raison).
+    """
+    h          = _empreinte(token)
+    maintenant = int(time.time())
+    conn       = _conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("""
+            UPDATE refresh_tokens SET utilise_le = ?
+            WHERE token_hash = ? AND utilise_le IS NULL
+              AND expires_at > ?
+            RETURNING username, famille
+        """, (maintenant, h, maintenant)).fetchone()
+
+        if row:
+            nouveau = _inserer(conn, row["username"], row["famille"],
+                               maintenant)
+            conn.execute("COMMIT")
+            return row["username"], nouveau, "OK"
+
+        # Échec : déterminer pourquoi
+        row = conn.execute("""
+            SELECT username, famille, utilise_le
+            FROM refresh_tokens WHERE token_hash = ?
+        """, (h,)).fetchone()
+
+        if not row:
+            conn.execute("COMMIT")
+            auth_logger.warning("Refresh token inconnu présenté")
+            return None, None, "Token inconnu"
+
+        if row["utilise_le"] is not None:
+            # VOL DE TOKEN — toute la famille est révoquée
+            conn.execute(
+                "DELETE FROM refresh_tokens WHERE famille = ?",
+                (row["famille"],)
+            )
+            conn.execute("COMMIT")
+            log_securite(
+                "VOL_TOKEN_DETECTE",
+                f"Réutilisation refresh token ! "
+                f"user={row['username']} famille={row['famille']} "
+                f"— famille révoquée",
+                niveau="CRITICAL"
+            )
+            return None, None, "Token compromis"
+
+        conn.execute("DELETE FROM refresh_tokens WHERE token_hash = ?", (h,))
+        conn.execute("COMMIT")
+        auth_logger.warning(f"Refresh expiré | user={row['username']}")
+        return None, None, "Token expiré"
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+# ============================================================
+# RÉVOCATION
+# ============================================================
+
+def revoquer_utilisateur(username):
+    """Supprime toutes les sessions d'un utilisateur."""
+    conn = _conn()
+    try:
+        n = conn.execute(
+            "DELETE FROM refresh_tokens WHERE username = ?", (username,)
+        ).rowcount
+    finally:
+        conn.close()
+    return n
+
+# ============================================================
+# COMPACTION (GC)
+# ============================================================
+
+def compacter(lot=GC_LOT):
+    """
+    Supprime par lots les tokens expirés et ceux utilisés depuis plus
+    de CONSERVATION_UTILISE secondes. Un lot = une transaction courte,
+    pour ne pas bloquer les rotations concurrentes.
+    Retourne le nombre de lignes supprimées.
+    """
+    maintenant = int(time.time())
+    limite_utilise = maintenant - CONSERVATION_UTILISE
+    total = 0
+    conn  = _conn()
+    try:
+        while True:
+            n = conn.execute("""
+                DELETE FROM refresh_tokens WHERE rowid IN (
+                    SELECT rowid FROM refresh_tokens
+                    WHERE expires_at <= ?
+                    UNION
+                    SELECT rowid FROM refresh_tokens
+                    WHERE utilise_le < ?
+                    LIMIT ?
+                )
+            """, (maintenant, limite_utilise, lot)).rowcount
+            total += n
+            # UNION (et non UNION ALL) : un token expiré ET utilisé n'occupe
+            # qu'une place du lot ; on s'arrête sur un lot vide
+            if n == 0:
+                break
+    finally:
+        conn.close()
+    if total:
+        auth_logger.info(f"GC refresh_tokens : {total} ligne(s) supprimée(s)")
+    return total
+
+
+def _boucle_gc(intervalle):
+    while not _gc_stop.wait(intervalle):
+        try:
+            compacter()
+        except Exception as e:
+            auth_logger.error(f"Erreur GC refresh_tokens : {e}")
+
+
+def demarrer_gc(intervalle=GC_INTERVALLE):
+    """Lance la compaction périodique dans un thread démon (idempotent)."""
+    global _gc_thread
+    if _gc_thread and _gc_thread.is_alive():
+        return _gc_thread
+    _gc_stop.clear()
+    compacter()
+    _gc_thread = threading.Thread(
+        target=_boucle_gc, args=(intervalle,),
+        name="gc-refresh-tokens", daemon=True
+    )
+    _gc_thread.start()
+    return _gc_thread
+
+
+def arreter_gc():
+    _gc_stop.set()
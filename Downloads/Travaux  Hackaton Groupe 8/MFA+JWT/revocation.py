@@ -0,0 +1,150 @@
+"""
+revocation.py — BMI Auth v2.0
+Liste de révocation des JWT : jti révoqués + "not-before" par utilisateur.
+Index en mémoire (vérification O(1) par requête), alimenté par la table
+jwt_revocations et resynchronisé par polling pour que tous les workers
+convergent. Une entrée disparaît à l'expiration des tokens concernés.
+"""
+
+import time
+import sqlite3
+from threading import Lock
+
+from logger_bmi import auth_logger, log_securite
+
+DB_PATH         = "bmi_auth.db"
+SYNC_INTERVALLE = 2          # secondes entre deux polls de la table
+DUREE_MAX_JWT   = 15 * 60    # = auth.JWT_EXPIRATION (minutes → secondes)
+
+_lock_sync      = Lock()
+_jti_revoques   = {}         # jti      → exp
+_not_before     = {}         # username → (nbf, exp)
+_dernier_id     = 0
+_derniere_sync  = 0.0
+
+
+def _conn():
+    c = sqlite3.connect(DB_PATH, timeout=5)
+    c.row_factory = sqlite3.Row
+    return c
+
+
+def init_table_revocation():
+    conn = _conn()
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS jwt_revocations (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            type       TEXT NOT NULL,      -- 'jti' ou 'user'
+            cle        TEXT NOT NULL,      -- jti ou username
+            nbf        INTEGER,            -- type 'user' : iat <= nbf refusé
+            exp        INTEGER NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_revocations_exp
+            ON jwt_revocations(exp);
+    """)
+    conn.commit()
+    conn.close()
+
+# ============================================================
+# INDEX EN MÉMOIRE
+# ============================================================
+
+def _appliquer(type_, cle, nbf, exp):
+    if type_ == "jti":
+        _jti_revoques[cle] = exp
+    else:
+        ancien = _not_before.get(cle)
+        if not ancien or nbf >= ancien[0]:
+            _not_before[cle] = (nbf, exp)
+
+
+def _purger_memoire(maintenant):
+    for jti, exp in list(_jti_revoques.items()):
+        if exp <= maintenant:
+            _jti_revoques.pop(jti, None)
+    for user, (_, exp) in list(_not_before.items()):
+        if exp <= maintenant:
+            _not_before.pop(user, None)
+
+
+def synchroniser():
+    """Charge les révocations ajoutées depuis le dernier poll."""
+    global _dernier_id, _derniere_sync
+    maintenant = int(time.time())
+    try:
+        conn = _conn()
+        rows = conn.execute("""
+            SELECT id, type, cle, nbf, exp FROM jwt_revocations
+            WHERE id > ? AND exp > ?
+            ORDER BY id
+        """, (_dernier_id, maintenant)).fetchall()
+        conn.close()
+    except Exception as e:
+        auth_logger.error(f"Erreur synchro révocations : {e}")
+        return
+    for r in rows:
+        _appliquer(r["type"], r["cle"], r["nbf"], r["exp"])
+    if rows:
+        _dernier_id = max(_dernier_id, rows[-1]["id"])
+    _derniere_sync = time.monotonic()
+    _purger_memoire(maintenant)
+
+
+def _synchroniser_si_besoin():
+    if time.monotonic() - _derniere_sync < SYNC_INTERVALLE:
+        return
+    # Un seul thread poll, les autres lisent l'index courant
+    if _lock_sync.acquire(blocking=False):
+        try:
+            synchroniser()
+        finally:
+            _lock_sync.release()
+
+
+def est_revoque(payload):
+    """
+    True si le JWT (payload décodé) est révoqué :
+    jti listé, ou émis avant le not-before de son utilisateur.
+    """
+    _synchroniser_si_besoin()
+    if payload.get("jti") in _jti_revoques:
+        return True
+    nb = _not_before.get(payload.get("sub"))
+    return bool(nb) and payload.get("iat", 0) <= nb[0]
+
+# ============================================================
+# RÉVOCATION
+# ============================================================
+
+def _inserer(type_, cle, nbf, exp):
+    maintenant = int(time.time())
+    conn = _conn()
+    conn.execute("""
+        INSERT INTO jwt_revocations (type, cle, nbf, exp)
+        VALUES (?, ?, ?, ?)
+    """, (type_, cle, nbf, exp))
+    # Écritures rares → on en profite pour purger les entrées expirées
+    conn.execute(
+        "DELETE FROM jwt_revocations WHERE exp <= ?", (maintenant,)
+    )
+    conn.commit()
+    conn.close()
+    _appliquer(type_, cle, nbf, exp)
+
+
+def revoquer_jti(jti, exp):
+    """Révoque un access token précis jusqu'à son expiration `exp`."""
+    _inserer("jti", jti, None, int(exp))
+    log_securite("JWT_REVOQUE", f"jti={jti[:8]}...", niveau="INFO")
+
+
+def revoquer_utilisateur(username):
+    """Invalide tous les access tokens déjà émis pour `username`."""
+    maintenant = int(time.time())
+    _inserer("user", username, maintenant, maintenant + DUREE_MAX_JWT)
+    log_securite(
+        "JWT_REVOQUES_UTILISATEUR",
+        f"user={username} — tokens émis avant {maintenant} refusés",
+        niveau="WARNING"
+    )
@@ -10,6 +10,8 @@ from app import app
 from database import initialiser_db, creer_utilisateurs_test
 from app import init_table_qr_scans
 from detecteur import init_tables_ids
+from refresh_tokens import demarrer_gc
+from archivage import demarrer_archivage
 import pyotp
 
 def get_ip_locale():
@@ -28,6 +30,8 @@ if __name__ == "__main__":
     initialiser_db()
     init_table_qr_scans()
     init_tables_ids()      # Correction : tables IDS manquantes
+    demarrer_gc()          # Compaction périodique des refresh tokens
+    demarrer_archivage()   # Archivage nocturne de auth_logs
     secrets = creer_utilisateurs_test()
 
     ip = get_ip_locale()
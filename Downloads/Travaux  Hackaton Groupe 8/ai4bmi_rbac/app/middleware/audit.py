@@ -0,0 +1,180 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import MemoryHandler
+from app.models.database import AuditLog, SessionLocal
+
+QUEUE_SIZE   = 10000   # entrées en attente avant perte
+BATCH_SIZE   = 256     # lignes max par INSERT groupé
+POLL_TIMEOUT = 0.5     # réveil du worker quand la file est vide
+HIT_INTERVAL = 5.0     # regroupement des accès servis par le cache
+AUDIT_FILE   = 'logs/audit.log'
+
+_STOP = object()
+
+def _audit_logger() -> logging.Logger:
+    """Logger JSON bufferisé : une écriture disque par lot."""
+    logger = logging.getLogger("audit")
+    if not logger.handlers:
+        fh = logging.FileHandler(AUDIT_FILE, encoding="utf-8")
+        fh.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(MemoryHandler(BATCH_SIZE, flushLevel=logging.ERROR, target=fh))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+audit_logger = _audit_logger()
+
+class AuditSink:
+    """
+    Journal d'audit asynchrone : les dépendances FastAPI déposent
+    l'entrée dans une file (O(1), jamais bloquant) et un thread
+    écrit par lots en base (bulk_insert_mappings) et dans audit.log.
+    File pleine → l'entrée est comptée comme perdue, la requête
+    n'attend jamais le stockage.
+    Les accès servis par le cache de réponses (record_hit) sont
+    regroupés par (utilisateur, IP, ressource, endpoint) : une ligne
+    avec hits = n toutes les HIT_INTERVAL secondes.
+    """
+
+    def __init__(self, session_factory=SessionLocal, logger: logging.Logger = audit_logger,
+                 queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE):
+        self.session_factory = session_factory
+        self.logger     = logger
+        self.batch_size = batch_size
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.errors  = 0
+        self.batches = 0
+        self.hits    = 0
+        self._lock   = threading.Lock()
+        self._thread = None
+        self._pending_hits: dict = {}
+        self._last_hits = time.monotonic()
+
+    # ── Cycle de vie ─────────────────────────────────────────────
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Vide la file puis arrête le worker (appelé à l'arrêt de l'app)."""
+        if not (self._thread and self._thread.is_alive()):
+            return
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # ── Producteurs ──────────────────────────────────────────────
+    def submit(self, entry: dict) -> bool:
+        if not (self._thread and self._thread.is_alive()):
+            self.start()
+        try:
+            self.queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def record_hit(self, entry: dict):
+        if not (self._thread and self._thread.is_alive()):
+            self.start()
+        key = (entry["username"], entry["role"], entry["ip"],
+               entry["resource"], entry["action"], entry["status"], entry["endpoint"])
+        with self._lock:
+            slot = self._pending_hits.get(key)
+            if slot:
+                slot["hits"] += 1
+            else:
+                self._pending_hits[key] = {**entry, "hits": 1}
+            self.hits += 1
+
+    def _drain_hits(self) -> list:
+        with self._lock:
+            entries, self._pending_hits = list(self._pending_hits.values()), {}
+        self._last_hits = time.monotonic()
+        return entries
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth":    self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "written":        self.written,
+            "dropped":        self.dropped,
+            "errors":         self.errors,
+            "batches":        self.batches,
+            "cached_hits":    self.hits,
+            "pending_hits":   len(self._pending_hits),
+        }
+
+    # ── Worker ───────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            if time.monotonic() - self._last_hits >= HIT_INTERVAL:
+                hits = self._drain_hits()
+                if hits:
+                    self._write(hits)
+            try:
+                item = self.queue.get(timeout=POLL_TIMEOUT)
+            except queue.Empty:
+                continue
+            stop  = item is _STOP
+            batch = [] if stop else [item]
+            # Draine ce qui est déjà en file : lots naturels sous charge
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if stop:
+                batch += self._drain_hits()
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: list):
+        db = self.session_factory()
+        try:
+            db.bulk_insert_mappings(AuditLog, batch)
+            db.commit()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            db.rollback()
+            self.errors += len(batch)
+            print(f"\n ERREUR AUDIT  |  {len(batch)} entrées non enregistrées : {e}")
+        finally:
+            db.close()
+
+        for entry in batch:
+            self.logger.info(json.dumps({**entry, "timestamp": entry["timestamp"].isoformat()}))
+        for handler in self.logger.handlers:
+            handler.flush()
+
+audit_sink = AuditSink()
+
+def log_access(username: str, role: str, ip: str,
+               resource: str, action: str, status: str, endpoint: str,
+               cached: bool = False):
+    (audit_sink.record_hit if cached else audit_sink.submit)({
+        "timestamp": datetime.utcnow(),
+        "username":  username,
+        "role":      role,
+        "ip":        ip,
+        "resource":  resource,
+        "action":    action,
+        "status":    status,
+        "endpoint":  endpoint
+    })
@@ -0,0 +1,141 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from app.utils.auth import decode_token
+from app.middleware import rbac
+from app.middleware.audit import log_access
+
+# Ressource RBAC → âge max (s) d'une réponse en cache, quelle que soit sa version :
+# les données écrites par un autre processus (journal_lectures --compacter, autres
+# workers) ou les fenêtres par défaut qui finissent à « maintenant » n'invalident rien ici
+CACHED_RESOURCES = {
+    "capteurs":    1.0,
+    "predictions": 5.0,
+    "historiques": 30.0,
+}
+CACHE_SIZE    = 1024
+CACHE_CONTROL = "private, no-cache"   # le navigateur revalide à chaque poll → chaque accès est audité
+
+
+class ResponseCache:
+    """
+    Réponses GET des routes /api en lecture seule, par (ressource, rôle, URL).
+    Une entrée expire CACHED_RESOURCES[ressource] secondes après sa création
+    (TTL strict : seul moyen de voir les écritures d'un autre processus),
+    ou dès que sa ressource est invalidée dans ce processus. ETag = hash du contenu.
+    """
+
+    def __init__(self, max_age: dict = CACHED_RESOURCES, maxsize: int = CACHE_SIZE):
+        self.max_age  = max_age
+        self.maxsize  = maxsize
+        self.hits     = 0
+        self.misses   = 0
+        self.not_modified = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._versions = {resource: 0 for resource in max_age}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resource_for(path: str) -> Optional[str]:
+        parts = path.split("/")
+        if len(parts) >= 3 and parts[1] == "api" and parts[2] in CACHED_RESOURCES:
+            return parts[2]
+        return None
+
+    def version(self, resource: str) -> int:
+        return self._versions[resource]
+
+    def get(self, key: tuple, resource: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        etag, body, version, created = entry
+        if version != self._versions[resource] or time.monotonic() - created >= self.max_age[resource]:
+            return None
+        return etag, body
+
+    def put(self, key: tuple, body: bytes, version: int) -> str:
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        with self._lock:
+            self._entries[key] = (etag, body, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, resource: Optional[str] = None):
+        """Hook d'invalidation : à appeler quand les données d'une ressource changent."""
+        with self._lock:
+            for r in ([resource] if resource else list(self._versions)):
+                self._versions[r] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "not_modified": self.not_modified, "versions": dict(self._versions)}
+
+response_cache = ResponseCache()
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+def _cached_response(body: Optional[bytes], etag: str, status: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Cache": status}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def cache_middleware(request: Request, call_next):
+    """
+    GET /api/{capteurs,predictions,historiques}… : le RBAC est vérifié ici
+    (jeton en cache + table de décision) ; si la réponse est en cache, ni
+    la route ni la sérialisation JSON ne sont rejouées, 304 si l'ETag du
+    client est à jour. L'accès est audité de façon groupée (record_hit).
+    Jeton absent / invalide ou accès refusé : la route répond elle-même.
+    """
+    resource = response_cache.resource_for(request.url.path)
+    auth = request.headers.get("authorization", "")
+    if request.method != "GET" or resource is None or not auth.lower().startswith("bearer "):
+        return await call_next(request)
+    try:
+        token_data = decode_token(auth[7:])
+    except HTTPException:
+        return await call_next(request)
+    username, role = token_data["username"], token_data["role"]
+    if not rbac.policy.enforce(username, resource, "read"):
+        return await call_next(request)
+
+    key = (resource, role, request.url.path, request.url.query)
+    if_none_match = request.headers.get("if-none-match")
+    cached = response_cache.get(key, resource)
+    if cached:
+        etag, body = cached
+        response_cache.hits += 1
+        ip = request.client.host if request.client else "unknown"
+        log_access(username, role, ip, resource, "read", "ALLOWED", request.url.path, cached=True)
+        if _etag_matches(if_none_match, etag):
+            response_cache.not_modified += 1
+            return _cached_response(None, etag, "HIT")
+        return _cached_response(body, etag, "HIT")
+
+    # Absent : la route s'exécute (et journalise) normalement, on garde le corps
+    response_cache.misses += 1
+    version  = response_cache.version(resource)
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = response_cache.put(key, body, version)
+    if _etag_matches(if_none_match, etag):
+        return _cached_response(None, etag, "MISS")
+    return _cached_response(body, etag, "MISS")
@@ -0,0 +1,220 @@
+import functools
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+import casbin
+
+# Modèle RBAC "plat" de config/model.conf : la décision ne dépend que de
+# l'appartenance (sub, obj, act) à la matrice rôle × ressource × action.
+RBAC_MATCHER = "g(r_sub,p_sub)&&r_obj==p_obj&&r_act==p_act"
+RBAC_EFFECT  = "some(where(p_eft==allow))"
+CACHE_SIZE   = 4096
+POLL_INTERVAL = 1.0   # secondes entre deux vérifications de mtime
+
+
+def _normalise(expr: str) -> str:
+    return "".join(expr.split()).replace(".", "_")
+
+
+def is_flat_rbac(enforcer: casbin.Enforcer) -> bool:
+    """Vrai si le modèle peut être compilé en table de décision."""
+    model = enforcer.get_model().model
+    try:
+        matcher = model["m"]["m"].value
+        effect  = model["e"]["e"].value
+        tokens  = model["p"]["p"].tokens
+    except KeyError:
+        return False
+    return (_normalise(matcher) == RBAC_MATCHER
+            and _normalise(effect) == RBAC_EFFECT
+            and len(tokens) == 3)
+
+
+class DecisionTable:
+    """
+    Décisions RBAC précompilées à partir d'un enforcer Casbin.
+
+    - user_roles : sujet → rôles résolus (héritage transitif des règles g)
+    - allowed    : ensemble des triplets (sub, obj, act) autorisés, déjà
+                   étendus à tous les sujets connus → 1 lookup de set
+    Si le modèle n'est pas le RBAC plat attendu, on retombe sur
+    enforcer.enforce derrière un LRU (sub, obj, act).
+    Immuable : une recharge construit une nouvelle table.
+    """
+
+    def __init__(self, enforcer: casbin.Enforcer, cache_size: int = CACHE_SIZE):
+        self.enforcer = enforcer
+        self.compiled = is_flat_rbac(enforcer)
+        self.user_roles: Dict[str, FrozenSet[str]] = {}
+        self.allowed: FrozenSet[Tuple[str, str, str]] = frozenset()
+        self._cached_enforce = functools.lru_cache(maxsize=cache_size)(
+            enforcer.enforce
+        )
+        if self.compiled:
+            self._compile()
+
+    def _compile(self) -> None:
+        perms: Dict[str, set] = {}
+        for sub, obj, act, *_ in self.enforcer.get_policy():
+            perms.setdefault(sub, set()).add((obj, act))
+
+        subjects = set(perms)
+        for user, role, *_ in self.enforcer.get_grouping_policy():
+            subjects.update((user, role))
+
+        allowed = set()
+        for sub in subjects:
+            roles = frozenset(self.enforcer.get_implicit_roles_for_user(sub))
+            self.user_roles[sub] = roles
+            for s in roles | {sub}:
+                for obj, act in perms.get(s, ()):
+                    allowed.add((sub, obj, act))
+        self.allowed = frozenset(allowed)
+
+    def enforce(self, sub: str, obj: str, act: str) -> bool:
+        if self.compiled:
+            return (sub, obj, act) in self.allowed
+        return self._cached_enforce(sub, obj, act)
+
+    def roles_for(self, sub: str) -> FrozenSet[str]:
+        return self.user_roles.get(sub, frozenset())
+
+
+UserSource = Callable[[], Optional[Iterable[Tuple[str, str]]]]
+
+
+class PolicyManager:
+    """
+    Politique RBAC rechargeable à chaud.
+
+    - permissions (p) et héritages de rôles : policy.csv
+    - affectations utilisateur → rôle (g) : la source `user_source`
+      (table users, couples (username, rôle | None si désactivé)) fait
+      foi pour les comptes qu'elle connaît ; les lignes g du CSV ne
+      servent que pour les autres.
+    Chaque rechargement construit un nouvel enforcer + DecisionTable hors
+    du chemin des requêtes puis remplace `self.table` d'une affectation :
+    les lecteurs ne prennent jamais de verrou.
+    Un thread surveille le mtime de policy.csv et du fichier témoin
+    `stamp`, que touche users_changed() pour prévenir les autres workers ;
+    dans ce worker, users_changed() réveille directement le thread, la
+    requête d'administration ne paie jamais la reconstruction.
+    """
+
+    def __init__(self, model_path: str, policy_path: str,
+                 user_source: Optional[UserSource] = None,
+                 stamp_path: Optional[str] = None,
+                 interval: float = POLL_INTERVAL):
+        self.model_path  = model_path
+        self.policy_path = policy_path
+        self.user_source = user_source
+        self.stamp_path  = stamp_path
+        self.interval    = interval
+        self.reloads     = 0
+        self.errors      = 0
+        self.last_reload_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._lock   = threading.Lock()
+        self._stop   = threading.Event()
+        self._wake   = threading.Event()
+        self._thread = None
+        self._seen   = self._mtimes()
+        self.table   = self._build()
+
+    # ── Construction ─────────────────────────────────────────────
+    def _mtimes(self) -> Tuple[int, ...]:
+        stamps = []
+        for path in (self.policy_path, self.stamp_path):
+            try:
+                stamps.append(os.stat(path).st_mtime_ns if path else 0)
+            except FileNotFoundError:
+                stamps.append(0)
+        return tuple(stamps)
+
+    def _build(self) -> DecisionTable:
+        enforcer = casbin.Enforcer(self.model_path, self.policy_path)
+        enforcer.enable_auto_save(False)     # les règles g de la base ne vont pas dans le CSV
+        users = self.user_source() if self.user_source else None
+        if users is not None:
+            users = list(users)
+            known = {name for name, _ in users}
+            stale = [rule for rule in enforcer.get_grouping_policy() if rule[0] in known]
+            if stale:
+                enforcer.remove_grouping_policies(stale)
+            rules = [[name, role] for name, role in users if role]
+            if rules:
+                enforcer.add_grouping_policies(rules)
+        return DecisionTable(enforcer)
+
+    def reload(self) -> float:
+        """Reconstruit la politique et la publie. Retourne la durée en ms."""
+        with self._lock:
+            seen  = self._mtimes()
+            start = time.perf_counter()
+            table = self._build()
+            self.table = table
+            self._seen = seen
+            self.last_reload_ms = (time.perf_counter() - start) * 1000
+            self.reloads += 1
+        print(f"\n POLITIQUE RBAC  |  rechargée en {self.last_reload_ms:.1f} ms")
+        return self.last_reload_ms
+
+    def users_changed(self) -> None:
+        """
+        À appeler après une création / modification / suppression de compte.
+        Ne fait que signaler : la table est reconstruite puis publiée par le
+        thread de surveillance (ou un thread ponctuel s'il n'est pas lancé).
+        """
+        if self.stamp_path:
+            Path(self.stamp_path).touch()
+        self._wake.set()
+        if not (self._thread and self._thread.is_alive()):
+            threading.Thread(target=self._reload_pending, name="policy-reload", daemon=True).start()
+
+    # ── Lecture ──────────────────────────────────────────────────
+    def enforce(self, sub: str, obj: str, act: str) -> bool:
+        return self.table.enforce(sub, obj, act)
+
+    def stats(self) -> dict:
+        return {
+            "reloads":        self.reloads,
+            "errors":         self.errors,
+            "last_reload_ms": self.last_reload_ms,
+            "last_error":     self.last_error,
+            "compiled":       self.table.compiled,
+            "rules":          len(self.table.allowed),
+            "subjects":       len(self.table.user_roles),
+        }
+
+    # ── Surveillance ─────────────────────────────────────────────
+    def _reload_pending(self):
+        self._wake.clear()
+        try:
+            self.reload()
+        except Exception as e:
+            # policy.csv en cours d'écriture ou invalide : on garde l'ancienne table
+            self.errors += 1
+            self.last_error = str(e)
+            self._seen = self._mtimes()
+            print(f"\n ERREUR POLITIQUE  |  rechargement ignoré : {e}")
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            if self._stop.is_set():
+                return
+            if self._wake.is_set() or self._mtimes() != self._seen:
+                self._reload_pending()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="policy-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
@@ -1,56 +1,41 @@
-import casbin
-import logging
-import json
-from datetime import datetime
 from fastapi import Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
 from app.utils.auth import decode_token
-from app.models.database import AuditLog, get_db
-
-enforcer = casbin.Enforcer('config/model.conf', 'config/policy.csv')
-
-logging.basicConfig(
-    filename='logs/audit.log',
-    level=logging.INFO,
-    format='%(message)s'
-)
-audit_logger = logging.getLogger("audit")
-
-def log_access(db: Session, username: str, role: str, ip: str,
-               resource: str, action: str, status: str, endpoint: str):
-    log_entry = AuditLog(
-        username=username, role=role, ip=ip,
-        resource=resource, action=action,
-        status=status, endpoint=endpoint
-    )
-    db.add(log_entry)
-    db.commit()
-
-    audit_logger.info(json.dumps({
-        "timestamp": datetime.utcnow().isoformat(),
-        "username":  username,
-        "role":      role,
-        "ip":        ip,
-        "resource":  resource,
-        "action":    action,
-        "status":    status,
-        "endpoint":  endpoint
-    }))
+from app.models.database import User, SessionLocal
+from app.middleware.policy import PolicyManager
+from app.middleware.audit import log_access
+
+def _user_roles():
+    """Affectations g issues de la table users (comptes actifs uniquement)."""
+    db = SessionLocal()
+    try:
+        rows = db.query(User.username, User.role, User.active).all()
+    except SQLAlchemyError:
+        return None          # table pas encore créée : policy.csv seul
+    finally:
+        db.close()
+    return [(name, role if active else None) for name, role, active in rows]
+
+policy = PolicyManager('config/model.conf', 'config/policy.csv',
+                       user_source=_user_roles, stamp_path='config/users.stamp')
+
+def reload_policy() -> float:
+    """Relit policy.csv + les comptes et remplace la table de décision d'un bloc."""
+    return policy.reload()
 
 def require_permission(resource: str, action: str):
     def dependency(
         request: Request,
-        token_data: dict = Depends(decode_token),
-        db: Session = Depends(get_db)
+        token_data: dict = Depends(decode_token)
     ):
         username = token_data["username"]
         role     = token_data["role"]
         ip       = request.client.host if request.client else "unknown"
         endpoint = str(request.url.path)
 
-        allowed = enforcer.enforce(username, resource, action)
+        allowed = policy.enforce(username, resource, action)
 
-        log_access(db, username, role, ip, resource, action,
+        log_access(username, role, ip, resource, action,
                    "ALLOWED" if allowed else "DENIED", endpoint)
 
         if not allowed:
@@ -0,0 +1,251 @@
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+DATA_DIR      = 'data/timeseries'
+CHUNK_SECONDS = 3600            # un chunk = un capteur × une heure
+FLUSH_SAMPLES = 65536           # lectures tamponnées par capteur avant écriture
+ROLLUPS       = (1, 60)         # agrégats min/max/somme stockés (secondes)
+
+US = 1_000_000
+TS_DTYPE     = np.dtype("<i8")  # horodatage epoch en microsecondes
+VAL_DTYPE    = np.dtype("<f4")
+ROLLUP_DTYPE = np.dtype([("t", "<i8"), ("min", "<f4"), ("max", "<f4"),
+                         ("sum", "<f8"), ("n", "<i8")])
+
+_SENSOR_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+def now_us() -> int:
+    return time.time_ns() // 1000
+
+def _check_sensor(sensor: str) -> str:
+    if not _SENSOR_ID.match(sensor):
+        raise ValueError(f"Identifiant de capteur invalide : {sensor!r}")
+    return sensor
+
+def _aggregate(ts: np.ndarray, values: np.ndarray, step: int, origin: int = 0) -> np.ndarray:
+    """Regroupe des lectures triées en seaux de `step` µs (min, max, somme, nombre)."""
+    buckets = (ts - origin) // step
+    starts  = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    out = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    out["t"]   = buckets[starts] * step + origin
+    out["min"] = np.minimum.reduceat(values, starts)
+    out["max"] = np.maximum.reduceat(values, starts)
+    out["sum"] = np.add.reduceat(values, starts, dtype=np.float64)
+    out["n"]   = np.diff(np.r_[starts, len(ts)])
+    return out
+
+def _merge(rows: np.ndarray, step: int, origin: int) -> np.ndarray:
+    """Fusionne des agrégats fins en seaux de `step` µs."""
+    buckets = (rows["t"] - origin) // step
+    starts  = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    out = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    out["t"]   = buckets[starts] * step + origin
+    out["min"] = np.minimum.reduceat(rows["min"], starts)
+    out["max"] = np.maximum.reduceat(rows["max"], starts)
+    out["sum"] = np.add.reduceat(rows["sum"], starts)
+    out["n"]   = np.add.reduceat(rows["n"], starts)
+    return out
+
+
+class TimeSeriesStore:
+    """
+    Stockage colonne, en ajout seul, des lectures capteurs.
+
+    DATA_DIR/<capteur>/<debut_chunk>.ts    int64  horodatages (µs, croissants)
+                                   .val   float32 valeurs
+                                   .r1    agrégats 1 s  (t, min, max, somme, n)
+                                   .r60   agrégats 60 s
+    Le nom du chunk (epoch en secondes) sert d'index temporel ; dans un
+    chunk, searchsorted sur le fichier .ts mappé en mémoire délimite la
+    plage. Les requêtes sous-échantillonnées lisent l'agrégat le plus
+    grossier compatible avec le pas demandé au lieu des lectures brutes.
+    """
+
+    def __init__(self, root: str = DATA_DIR, chunk_seconds: int = CHUNK_SECONDS,
+                 flush_samples: int = FLUSH_SAMPLES):
+        self.root          = root
+        self.chunk_us      = chunk_seconds * US
+        self.flush_samples = flush_samples
+        self._lock    = threading.RLock()
+        self._pending: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._counts:  Dict[str, int] = {}
+        self._last_ts: Dict[str, int] = {}
+        self._chunks:  Dict[str, List[int]] = {}
+        self.listeners: List[Callable[[str], None]] = []   # appelés à chaque ajout (capteur)
+
+    # ── Écriture ─────────────────────────────────────────────────
+    def append(self, sensor: str, ts, values):
+        """Ajoute des lectures (horodatages µs croissants, postérieurs aux précédents)."""
+        ts     = np.asarray(ts, dtype=TS_DTYPE)
+        values = np.asarray(values, dtype=VAL_DTYPE)
+        if ts.shape != values.shape or ts.ndim != 1:
+            raise ValueError("Horodatages et valeurs de tailles différentes")
+        if not len(ts):
+            return
+        with self._lock:
+            last = self._last_ts.get(sensor)
+            if last is None:
+                last = self._load_last_ts(_check_sensor(sensor))
+            if ts[0] < last or (len(ts) > 1 and np.any(ts[1:] < ts[:-1])):
+                raise ValueError(f"{sensor} : lectures hors ordre (ajout seul)")
+            self._pending.setdefault(sensor, []).append((ts, values))
+            self._counts[sensor]  = self._counts.get(sensor, 0) + len(ts)
+            self._last_ts[sensor] = int(ts[-1])
+            if self._counts[sensor] >= self.flush_samples:
+                self._flush_sensor(sensor)
+        for listener in self.listeners:
+            listener(sensor)
+
+    def flush(self):
+        with self._lock:
+            for sensor in list(self._pending):
+                self._flush_sensor(sensor)
+
+    def _flush_sensor(self, sensor: str):
+        parts = self._pending.pop(sensor, None)
+        self._counts.pop(sensor, None)
+        if not parts:
+            return
+        ts     = np.concatenate([p[0] for p in parts])
+        values = np.concatenate([p[1] for p in parts])
+        folder = os.path.join(self.root, sensor)
+        os.makedirs(folder, exist_ok=True)
+        chunk_ids = ts // self.chunk_us
+        cuts = np.flatnonzero(chunk_ids[1:] != chunk_ids[:-1]) + 1
+        for a, b in zip(np.r_[0, cuts], np.r_[cuts, len(ts)]):
+            start = int(chunk_ids[a] * self.chunk_us // US)
+            base  = os.path.join(folder, str(start))
+            with open(base + ".ts", "ab") as f:
+                ts[a:b].tofile(f)
+            with open(base + ".val", "ab") as f:
+                values[a:b].tofile(f)
+            # Seau partiel en fin de lot : une ligne de plus, fusionnée à la lecture
+            for seconds in ROLLUPS:
+                with open(f"{base}.r{seconds}", "ab") as f:
+                    _aggregate(ts[a:b], values[a:b], seconds * US).tofile(f)
+            chunks = self._chunk_list(sensor)
+            if not chunks or chunks[-1] != start:
+                chunks.append(start)
+                chunks.sort()
+
+    # ── Index ────────────────────────────────────────────────────
+    def _chunk_list(self, sensor: str, refresh: bool = False) -> List[int]:
+        if refresh or sensor not in self._chunks:
+            try:
+                names = os.listdir(os.path.join(self.root, sensor))
+            except FileNotFoundError:
+                names = []
+            self._chunks[sensor] = sorted(int(n[:-3]) for n in names if n.endswith(".ts"))
+        return self._chunks[sensor]
+
+    def _load_last_ts(self, sensor: str) -> int:
+        chunks = self._chunk_list(sensor, refresh=True)
+        if not chunks:
+            return np.iinfo(TS_DTYPE).min
+        ts = self._map(sensor, chunks[-1], ".ts", TS_DTYPE)
+        return int(ts[-1]) if len(ts) else np.iinfo(TS_DTYPE).min
+
+    def _chunks_between(self, sensor: str, start: int, end: int) -> List[int]:
+        chunks = self._chunk_list(sensor)
+        # Un autre processus a pu ouvrir un chunk plus récent
+        if not chunks or (chunks[-1] + self.chunk_us // US) * US <= end:
+            chunks = self._chunk_list(sensor, refresh=True)
+        first = start // self.chunk_us * self.chunk_us // US
+        return [c for c in chunks if first <= c and c * US < end]
+
+    def _map(self, sensor: str, chunk: int, ext: str, dtype) -> np.ndarray:
+        path = os.path.join(self.root, sensor, f"{chunk}{ext}")
+        size = os.path.getsize(path) // dtype.itemsize
+        if size == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(size,))
+
+    # ── Lecture ──────────────────────────────────────────────────
+    def sensors(self) -> List[str]:
+        with self._lock:
+            on_disk = os.listdir(self.root) if os.path.isdir(self.root) else []
+            return sorted(set(on_disk) | set(self._pending))
+
+    def exists(self, sensor: str) -> bool:
+        return _SENSOR_ID.match(sensor) is not None and sensor in self.sensors()
+
+    def read(self, sensor: str, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Lectures brutes dans [start, end) (µs)."""
+        _check_sensor(sensor)
+        with self._lock:
+            self._flush_sensor(sensor)
+            ts_parts, val_parts = [], []
+            for chunk in self._chunks_between(sensor, start, end):
+                ts  = self._map(sensor, chunk, ".ts", TS_DTYPE)
+                val = self._map(sensor, chunk, ".val", VAL_DTYPE)
+                n   = min(len(ts), len(val))      # écriture concurrente en cours
+                a, b = np.searchsorted(ts[:n], [start, end])
+                if b > a:
+                    ts_parts.append(np.array(ts[a:b]))
+                    val_parts.append(np.array(val[a:b]))
+        if not ts_parts:
+            return np.empty(0, dtype=TS_DTYPE), np.empty(0, dtype=VAL_DTYPE)
+        return np.concatenate(ts_parts), np.concatenate(val_parts)
+
+    def _read_rollup(self, sensor: str, seconds: int, start: int, end: int) -> np.ndarray:
+        parts = []
+        for chunk in self._chunks_between(sensor, start, end):
+            path = os.path.join(self.root, sensor, f"{chunk}.r{seconds}")
+            rows = np.fromfile(path, dtype=ROLLUP_DTYPE)
+            parts.append(rows[(rows["t"] >= start) & (rows["t"] < end)])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=ROLLUP_DTYPE)
+
+    def downsample(self, sensor: str, start: int, end: int, points: int = 500) -> dict:
+        """
+        min / max / moyenne par seau sur [start, end), au plus `points` seaux.
+        Pas ≥ 1 s : calculé depuis les agrégats, aligné sur la seconde
+        (début arrondi à la seconde inférieure).
+        """
+        _check_sensor(sensor)
+        points = max(1, points)
+        step   = max(1, -(-(end - start) // points))
+        level  = max((s for s in ROLLUPS if s * US <= step), default=None)
+        with self._lock:
+            if level is None:
+                ts, values = self.read(sensor, start, end)
+                rows = _aggregate(ts, values, step, start) if len(ts) else np.empty(0, dtype=ROLLUP_DTYPE)
+            else:
+                self._flush_sensor(sensor)
+                unit  = level * US
+                start = start // unit * unit
+                step  = -(-(end - start) // points)
+                step  = -(-step // unit) * unit
+                rows  = self._read_rollup(sensor, level, start, end)
+                rows  = _merge(rows, step, start) if len(rows) else rows
+        return {
+            "step_us": int(step),
+            "t":       rows["t"],
+            "min":     rows["min"],
+            "max":     rows["max"],
+            "mean":    rows["sum"] / np.maximum(rows["n"], 1),
+            "count":   rows["n"],
+        }
+
+    def latest(self, sensor: str) -> Optional[Tuple[int, float]]:
+        """Dernière lecture (horodatage µs, valeur), ou None."""
+        _check_sensor(sensor)
+        with self._lock:
+            parts = self._pending.get(sensor)
+            if parts:
+                return int(parts[-1][0][-1]), float(parts[-1][1][-1])
+            chunks = self._chunk_list(sensor)
+            if not chunks or (chunks[-1] * US + self.chunk_us) <= now_us():
+                chunks = self._chunk_list(sensor, refresh=True)
+            for chunk in reversed(chunks):
+                ts  = self._map(sensor, chunk, ".ts", TS_DTYPE)
+                val = self._map(sensor, chunk, ".val", VAL_DTYPE)
+                n   = min(len(ts), len(val))
+                if n:
+                    return int(ts[n - 1]), float(val[n - 1])
+        return None
+
+store = TimeSeriesStore()
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import HTMLResponse
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from app.models.database import User, AuditLog, get_db
+from app.models.database import User, AuditLog, SessionLocal, get_db
 from app.utils.auth import hash_password, decode_token
+from app.middleware.audit import audit_sink
+from app.middleware.rbac import policy
+from app.middleware.cache import response_cache
+from app.utils import retention
 
 router = APIRouter(prefix="/admin", tags=["Administration"])
 
+PAGE_DEFAULT = 100
+PAGE_MAX     = 1000
+EXPORT_BATCH = 1000
+LOG_FIELDS   = ["id", "timestamp", "username", "role", "ip", "resource", "action", "status", "endpoint", "hits"]
+
 class UserCreate(BaseModel):
     username: str
     password: str
@@ -41,6 +57,7 @@ def add_user(data: UserCreate, db: Session = Depends(get_db), _=Depends(admin_on
     user = User(username=data.username, password=hash_password(data.password), role=data.role)
     db.add(user)
     db.commit()
+    policy.users_changed()
     return {"message": f"Utilisateur {data.username} créé"}
 
 @router.put("/users-update/{user_id}")
@@ -50,6 +67,7 @@ def update_user(user_id: int, data: UserUpdate, db: Session = Depends(get_db), _
         raise HTTPException(status_code=404, detail="Utilisateur introuvable")
     user.role = data.role
     db.commit()
+    policy.users_changed()
     return {"message": "Rôle mis à jour"}
 
 @router.delete("/users-delete/{user_id}")
@@ -59,13 +77,156 @@ def delete_user(user_id: int, db: Session = Depends(get_db), _=Depends(admin_onl
         raise HTTPException(status_code=404, detail="Utilisateur introuvable")
     db.delete(user)
     db.commit()
+    policy.users_changed()
     return {"message": "Utilisateur supprimé"}
 
+# ── Journaux d'audit ─────────────────────────────────────────────
+
+class LogFilters:
+    """Filtres communs à la pagination, à l'export et aux statistiques."""
+    def __init__(self,
+                 username: Optional[str] = None,
+                 status:   Optional[str] = None,
+                 resource: Optional[str] = None,
+                 since:    Optional[datetime] = None,
+                 until:    Optional[datetime] = None):
+        self.username = username
+        self.status   = status
+        self.resource = resource
+        self.since    = since
+        self.until    = until
+
+    def matches(self, row: dict) -> bool:
+        """Même filtre, appliqué à une ligne lue dans une archive."""
+        ts = datetime.fromisoformat(row["timestamp"])
+        return ((not self.username or row["username"] == self.username)
+                and (not self.status or row["status"] == self.status)
+                and (not self.resource or row["resource"] == self.resource)
+                and (not self.since or ts >= self.since)
+                and (not self.until or ts < self.until))
+
+    def apply(self, query):
+        if self.username:
+            query = query.filter(AuditLog.username == self.username)
+        if self.status:
+            query = query.filter(AuditLog.status == self.status)
+        if self.resource:
+            query = query.filter(AuditLog.resource == self.resource)
+        if self.since:
+            query = query.filter(AuditLog.timestamp >= self.since)
+        if self.until:
+            query = query.filter(AuditLog.timestamp < self.until)
+        return query
+
+def _encode_cursor(log: AuditLog) -> str:
+    raw = f"{log.timestamp.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        ts, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), int(log_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
 @router.get("/logs")
-def get_logs(db: Session = Depends(get_db), _=Depends(admin_only)):
-    logs = db.query(AuditLog).order_by(AuditLog.timestamp).all()
-    return {"logs": [
-        {"timestamp": str(l.timestamp), "username": l.username, "role": l.role,
-         "ip": l.ip, "resource": l.resource, "action": l.action, "status": l.status}
-        for l in logs
-    ]}
+def get_logs(limit: int = Query(PAGE_DEFAULT, ge=1, le=PAGE_MAX),
+             cursor: Optional[str] = None,
+             order: Literal["asc", "desc"] = "asc",
+             filters: LogFilters = Depends(),
+             db: Session = Depends(get_db), _=Depends(admin_only)):
+    """Page de journaux triée sur (timestamp, id) ; `next_cursor` donne la page suivante."""
+    query = filters.apply(db.query(AuditLog))
+    if order == "asc":
+        if cursor:
+            ts, log_id = _decode_cursor(cursor)
+            query = query.filter(or_(AuditLog.timestamp > ts,
+                                     and_(AuditLog.timestamp == ts, AuditLog.id > log_id)))
+        query = query.order_by(AuditLog.timestamp, AuditLog.id)
+    else:
+        if cursor:
+            ts, log_id = _decode_cursor(cursor)
+            query = query.filter(or_(AuditLog.timestamp < ts,
+                                     and_(AuditLog.timestamp == ts, AuditLog.id < log_id)))
+        query = query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+
+    logs = query.limit(limit + 1).all()
+    next_cursor = _encode_cursor(logs[limit - 1]) if len(logs) > limit else None
+    return {"logs": [l.to_dict() for l in logs[:limit]], "next_cursor": next_cursor}
+
+@router.get("/logs/export")
+def export_logs(format: Literal["ndjson", "csv"] = "ndjson",
+                include_archives: bool = False,
+                filters: LogFilters = Depends(), _=Depends(admin_only)):
+    """
+    Export complet en flux (mémoire constante, curseur yield_per).
+    include_archives=true : rejoue d'abord les archives compressées
+    qui recoupent la période, puis la table chaude.
+    """
+    def rows(db):
+        if include_archives:
+            yield from retention.iter_archived(filters.since, filters.until, filters.matches)
+        query = filters.apply(db.query(AuditLog)) \
+            .order_by(AuditLog.timestamp, AuditLog.id) \
+            .yield_per(EXPORT_BATCH)
+        for log in query:
+            yield log.to_dict()
+
+    def generate():
+        db = SessionLocal()   # session propre au flux : vit jusqu'au dernier octet
+        try:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=LOG_FIELDS) if format == "csv" else None
+            if writer:
+                writer.writeheader()
+            for n, row in enumerate(rows(db), 1):
+                if writer:
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(row) + "\n")
+                if n % EXPORT_BATCH == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            db.close()
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(generate(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="audit_logs.{format}"'
+    })
+
+@router.get("/logs/archives")
+def list_archives(_=Depends(admin_only)):
+    manifest = retention.load_manifest()
+    return {"retention_days": retention.RETENTION_DAYS,
+            "archives": manifest,
+            "rows": sum(e["rows"] for e in manifest)}
+
+@router.get("/logs-stats")
+def logs_stats(filters: LogFilters = Depends(), db: Session = Depends(get_db), _=Depends(admin_only)):
+    # hits : un accès servi par le cache est journalisé groupé (n accès par ligne)
+    rows = filters.apply(db.query(AuditLog.status, func.sum(AuditLog.hits))) \
+        .group_by(AuditLog.status).all()
+    counts = {status: n for status, n in rows}
+    return {"allowed": counts.get("ALLOWED", 0), "denied": counts.get("DENIED", 0),
+            "total": sum(counts.values())}
+
+@router.get("/audit-stats")
+def audit_stats(_=Depends(admin_only)):
+    return audit_sink.stats()
+
+@router.get("/cache-stats")
+def cache_stats(_=Depends(admin_only)):
+    return response_cache.stats()
+
+# ── Politique RBAC ───────────────────────────────────────────────
+
+@router.get("/policy-stats")
+def policy_stats(_=Depends(admin_only)):
+    return policy.stats()
+
+@router.post("/policy-reload")
+def policy_reload(_=Depends(admin_only)):
+    return {"message": "Politique rechargée", "reload_ms": round(policy.reload(), 2)}
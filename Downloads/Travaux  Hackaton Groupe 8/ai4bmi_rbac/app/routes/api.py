@@ -1,17 +1,76 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.middleware.rbac import require_permission
+from app.models.timeseries import US, now_us, store
 
 router = APIRouter(prefix="/api", tags=["API BMI"])
 
+POINTS_MAX = 5000
+
+# Parc instrumenté : grandeur mesurée et seuil d'alerte par capteur
+CAPTEURS = {
+    "IFM-VTV122-01":      {"machine": "KUKA-KR210-1", "grandeur": "vibration_hz",  "seuil": 60.0},
+    "OMEGA-OS-MINI-03":   {"machine": "CNC-FANUC-3",  "grandeur": "temperature_c", "seuil": 75.0},
+    "SIEMENS-SITRANS-02": {"machine": "PRESSE-SCH-2", "grandeur": "courant_A",     "seuil": 15.0},
+}
+
+def _to_us(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * US)
+
+def _iso(ts_us: int) -> str:
+    return datetime.fromtimestamp(ts_us / US, tz=timezone.utc).isoformat()
+
+def _serie(capteur: str, since: Optional[datetime], until: Optional[datetime],
+           points: int, window: timedelta) -> dict:
+    if not store.exists(capteur):
+        raise HTTPException(status_code=404, detail=f"Capteur {capteur} inconnu")
+    end   = _to_us(until) if until else now_us()
+    start = _to_us(since) if since else end - int(window.total_seconds() * US)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Période vide (since >= until)")
+    d = store.downsample(capteur, start, end, points)
+    return {
+        "capteur": capteur,
+        **CAPTEURS.get(capteur, {}),
+        "since":   _iso(start),
+        "until":   _iso(end),
+        "pas_ms":  d["step_us"] / 1000,
+        "t_ms":    (d["t"] // 1000).tolist(),
+        "min":     d["min"].round(3).tolist(),
+        "max":     d["max"].round(3).tolist(),
+        "moyenne": d["mean"].round(3).tolist(),
+        "mesures": d["count"].tolist(),
+    }
+
 @router.get("/capteurs",
     dependencies=[Depends(require_permission("capteurs", "read"))],
     summary="Lire les données capteurs IFM/OMEGA")
 def get_capteurs():
-    return {"data": [
-        {"capteur": "IFM-VTV122-01",     "machine": "KUKA-KR210-1",  "vibration_hz": 45.2, "statut": "normal"},
-        {"capteur": "OMEGA-OS-MINI-03",  "machine": "CNC-FANUC-3",   "temperature_c": 78.5, "statut": "elevee"},
-        {"capteur": "SIEMENS-SITRANS-02","machine": "PRESSE-SCH-2",  "courant_A": 12.3,    "statut": "normal"},
-    ]}
+    data = []
+    for capteur, info in CAPTEURS.items():
+        last = store.latest(capteur)
+        if last is None:
+            data.append({"capteur": capteur, "machine": info["machine"],
+                         info["grandeur"]: None, "statut": "sans_donnees"})
+            continue
+        ts, value = last
+        data.append({"capteur": capteur, "machine": info["machine"],
+                     info["grandeur"]: round(value, 2),
+                     "statut": "elevee" if value > info["seuil"] else "normal",
+                     "horodatage": _iso(ts)})
+    return {"data": data}
+
+@router.get("/capteurs/{capteur}",
+    dependencies=[Depends(require_permission("capteurs", "read"))],
+    summary="Série d'un capteur (min/max/moyenne par pas, dernière heure par défaut)")
+def get_capteur_serie(capteur: str,
+                      since:  Optional[datetime] = None,
+                      until:  Optional[datetime] = None,
+                      points: int = Query(500, ge=1, le=POINTS_MAX)):
+    return _serie(capteur, since, until, points, timedelta(hours=1))
 
 @router.get("/historiques",
     dependencies=[Depends(require_permission("historiques", "read"))],
@@ -22,14 +81,35 @@ def get_historiques():
         {"id": 2, "machine": "CNC-FANUC-7",  "panne": "surchauffe broche", "date": "2025-12-03", "piece": "roulement NTN"},
     ]}
 
+@router.get("/historiques/{capteur}",
+    dependencies=[Depends(require_permission("historiques", "read"))],
+    summary="Historique long d'un capteur (30 jours par défaut, sensible - S3)")
+def get_historique_capteur(capteur: str,
+                           since:  Optional[datetime] = None,
+                           until:  Optional[datetime] = None,
+                           points: int = Query(720, ge=1, le=POINTS_MAX)):
+    return _serie(capteur, since, until, points, timedelta(days=30))
+
 @router.get("/predictions",
     dependencies=[Depends(require_permission("predictions", "read"))],
     summary="Predictions de pannes (modele LSTM)")
 def get_predictions():
-    return {"data": [
+    predictions = [
         {"machine": "KUKA-KR210-1", "probabilite_panne": 0.87, "horizon": "72h", "action": "intervention urgente"},
         {"machine": "PRESSE-SCH-3", "probabilite_panne": 0.34, "horizon": "15j", "action": "surveillance"},
-    ]}
+    ]
+    # Contexte de la dernière heure pour les machines instrumentées
+    end = now_us()
+    for p in predictions:
+        for capteur, info in CAPTEURS.items():
+            if info["machine"] != p["machine"] or not store.exists(capteur):
+                continue
+            d = store.downsample(capteur, end - 3600 * US, end, points=1)
+            if len(d["t"]):
+                p["mesures_1h"] = {"capteur": capteur, "grandeur": info["grandeur"],
+                                   "moyenne": round(float(d["mean"][0]), 2),
+                                   "max": round(float(d["max"][0]), 2)}
+    return {"data": predictions}
 
 @router.get("/admin/users",
     dependencies=[Depends(require_permission("admin_panel", "read"))],
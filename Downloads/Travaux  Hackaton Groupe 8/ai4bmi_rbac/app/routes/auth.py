@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.models.database import User, get_db
-from app.utils.auth import verify_password, create_token
+from app.models.database import get_user_async
+from app.utils.auth import verify_password_async, create_token
 
 router = APIRouter(prefix="/auth", tags=["Authentification"])
 
 @router.post("/login")
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form.username).first()
+async def login(form: OAuth2PasswordRequestForm = Depends()):
+    # Route async : le lookup et bcrypt ne bloquent ni la boucle
+    # ni le threadpool partagé avec les routes synchrones
+    user = await get_user_async(form.username)
 
-    if not user or not verify_password(form.password, user.password):
+    if not user or not await verify_password_async(form.password, user.password):
         raise HTTPException(status_code=401, detail="Identifiants incorrects")
 
     if not user.active:
@@ -0,0 +1,68 @@
+import gzip
+import json
+import os
+from typing import Iterable, Iterator, Tuple
+
+# Archives NDJSON compressées + manifeste JSON de la rétention des
+# audit_logs (app/utils/retention.py). MFA+JWT (archivage.py) écrit le
+# même format avec sa propre copie de ces fonctions.
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION = "zst" if zstandard else "gz"
+
+def open_write(path: str, compression: str = COMPRESSION):
+    if compression == "zst":
+        return zstandard.open(path, "wt", encoding="utf-8")
+    return gzip.open(path, "wt", encoding="utf-8")
+
+def open_read(path: str):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard requis pour lire {path}")
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return gzip.open(path, "rt", encoding="utf-8")
+
+def load_manifest(path: str) -> list:
+    """Index des archives : une entrée par partition archivée."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+def save_manifest(path: str, entries: list):
+    """Écriture atomique (fichier temporaire + fsync + rename)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def write_archive(path: str, rows: Iterable[dict], compression: str = COMPRESSION) -> Tuple[int, int, int]:
+    """
+    Écrit les lignes (dicts avec un "id" croissant) dans `path`, via un
+    fichier temporaire renommé à la fin ; rien n'est créé si aucune ligne.
+    Retourne (nombre, premier id, dernier id) — ids à None si vide.
+    """
+    count, first_id, last_id = 0, None, None
+    with open_write(path + ".tmp", compression) as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+            count   += 1
+            first_id = first_id or row["id"]
+            last_id  = row["id"]
+    if count:
+        os.replace(path + ".tmp", path)
+    else:
+        os.remove(path + ".tmp")
+    return count, first_id, last_id
+
+def read_archive(path: str) -> Iterator[dict]:
+    with open_read(path) as f:
+        for line in f:
+            yield json.loads(line)
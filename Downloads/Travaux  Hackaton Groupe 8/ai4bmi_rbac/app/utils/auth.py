@@ -1,13 +1,31 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
 import bcrypt
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
+try:
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
+
 SECRET_KEY   = "bmi_hackathon_secret_clé_très_longue_2026"
 ALGORITHM    = "HS256"
 TOKEN_EXPIRE = 60
 
+JWT_BACKEND      = os.getenv("JWT_BACKEND", "jose")   # "pyjwt" : décodage PyJWT (plus rapide)
+TOKEN_CACHE_SIZE = 10000                              # jetons validés gardés en mémoire
+
+BCRYPT_WORKERS     = min(4, os.cpu_count() or 1)   # hachages bcrypt simultanés
+BCRYPT_MAX_PENDING = 64                            # au-delà : 503 plutôt qu'une file sans fin
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 def hash_password(password: str) -> str:
@@ -16,22 +34,118 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
+# ── bcrypt hors boucle d'événements ─────────────────────────────────
+# Pool dédié : un afflux de connexions occupe au plus BCRYPT_WORKERS
+# threads et ne consomme plus le threadpool anyio des routes synchrones.
+
+_bcrypt_pool    = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_pending = 0
+
+async def _run_bcrypt(fn, *args):
+    global _bcrypt_pending
+    if _bcrypt_pending >= BCRYPT_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Trop de connexions simultanées, réessayez",
+            headers={"Retry-After": "1"}
+        )
+    _bcrypt_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_bcrypt_pool, fn, *args)
+    finally:
+        _bcrypt_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_bcrypt(hash_password, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_bcrypt(verify_password, plain, hashed)
+
+def bcrypt_stats() -> dict:
+    return {"workers": BCRYPT_WORKERS, "pending": _bcrypt_pending, "max_pending": BCRYPT_MAX_PENDING}
+
 def create_token(username: str, role: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=TOKEN_EXPIRE)
     payload = {"sub": username, "role": role, "exp": expire}
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
+# ── Vérification des jetons ─────────────────────────────────────────
+
+def _decode_jose(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+def _decode_pyjwt(token: str) -> dict:
+    return pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+# DECODE_BACKEND : backend effectivement retenu (JWT_BACKEND n'est qu'une demande)
+if JWT_BACKEND == "pyjwt" and pyjwt is not None:
+    _decode, _DecodeError, DECODE_BACKEND = _decode_pyjwt, pyjwt.PyJWTError, "pyjwt"
+else:
+    if JWT_BACKEND == "pyjwt":
+        print("\n JWT  |  PyJWT absent, décodage via python-jose")
+    _decode, _DecodeError, DECODE_BACKEND = _decode_jose, JWTError, "jose"
+
+class TokenCache:
+    """
+    Jetons déjà validés : sha256(token) → claims, jusqu'à leur exp.
+    Un tableau de bord envoie le même bearer sur plusieurs routes :
+    seul le premier appel paie la vérification HMAC + claims.
+    Borné à maxsize entrées (les plus anciennes sortent en premier).
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize  = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock    = threading.Lock()
+        self.hits     = 0
+        self.misses   = 0
+
+    def get(self, key: bytes):
+        entry = self._entries.get(key)
+        if entry is not None:
+            claims, exp = entry
+            if exp > time.time():
+                self.hits += 1
+                return claims
+            with self._lock:
+                self._entries.pop(key, None)
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, claims: dict, exp: float):
+        with self._lock:
+            self._entries[key] = (claims, exp)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize,
+                "hits": self.hits, "misses": self.misses, "backend": DECODE_BACKEND}
+
+token_cache = TokenCache()
+
 def decode_token(token: str = Depends(oauth2_scheme)) -> dict:
+    key    = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return dict(claims)
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        role     = payload.get("role")
-        if not username or not role:
-            raise HTTPException(status_code=401, detail="Token invalide")
-        return {"username": username, "role": role}
-    except JWTError:
+        payload = _decode(token)
+    except _DecodeError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expiré ou invalide",
             headers={"WWW-Authenticate": "Bearer"}
         )
+    username = payload.get("sub")
+    role     = payload.get("role")
+    if not username or not role:
+        raise HTTPException(status_code=401, detail="Token invalide")
+    claims = {"username": username, "role": role}
+    if isinstance(payload.get("exp"), (int, float)):
+        token_cache.put(key, claims, payload["exp"])
+    return dict(claims)
@@ -0,0 +1,148 @@
+import os
+import threading
+from datetime import datetime, date, timedelta
+from typing import Callable, Iterator, Optional
+from sqlalchemy import func, select
+from app.models.database import AuditLog, SessionLocal
+from app.utils import archives
+
+try:
+    import fcntl
+except ImportError:          # Windows : pas de verrou inter-processus
+    fcntl = None
+
+RETENTION_DAYS = 30                  # jours gardés dans la table chaude
+ARCHIVE_DIR    = 'logs/archives'
+MANIFEST       = os.path.join(ARCHIVE_DIR, 'manifest.json')
+ARCHIVE_HOUR   = 3                   # heure du job nocturne
+DELETE_BATCH   = 5000
+COMPRESSION    = archives.COMPRESSION
+
+# ── Manifeste (fichiers d'archive : app/utils/archives.py) ──────────
+
+def load_manifest() -> list:
+    """Index des archives : une entrée par partition journalière archivée."""
+    return archives.load_manifest(MANIFEST)
+
+# ── Archivage ───────────────────────────────────────────────────────
+
+def _archive_day(db, day: date, manifest: list) -> int:
+    """
+    Écrit la partition `day` dans une archive, l'ajoute au manifeste
+    puis la supprime de la table chaude par lots.
+    Le manifeste garde le dernier id archivé : une reprise après crash
+    ne réarchive pas les lignes déjà écrites.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    end   = start + timedelta(days=1)
+    parts = [e for e in manifest if e["day"] == day.isoformat()]
+    done  = max((e["last_id"] for e in parts), default=0)
+
+    rows = db.query(AuditLog) \
+        .filter(AuditLog.timestamp >= start, AuditLog.timestamp < end, AuditLog.id > done) \
+        .order_by(AuditLog.id).yield_per(1000)
+
+    name = f"audit_logs-{day.isoformat()}" + (f"-{len(parts) + 1}" if parts else "")
+    path = os.path.join(ARCHIVE_DIR, f"{name}.ndjson.{COMPRESSION}")
+    count, first_id, last_id = archives.write_archive(path, (log.to_dict() for log in rows), COMPRESSION)
+    last_id = last_id or done
+
+    if count:
+        manifest.append({"day": day.isoformat(), "file": os.path.basename(path), "rows": count,
+                         "first_id": first_id, "last_id": last_id,
+                         "min_ts": start.isoformat(), "max_ts": end.isoformat(),
+                         "archived_at": datetime.utcnow().isoformat()})
+        archives.save_manifest(MANIFEST, manifest)
+
+    while True:
+        ids = select(AuditLog.id) \
+            .where(AuditLog.timestamp >= start, AuditLog.timestamp < end, AuditLog.id <= last_id) \
+            .limit(DELETE_BATCH)
+        n = db.query(AuditLog).filter(AuditLog.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        if n < DELETE_BATCH:
+            break
+    return count
+
+def _try_lock():
+    """Un seul worker archive à la fois (verrou fichier non bloquant)."""
+    f = open(os.path.join(ARCHIVE_DIR, ".lock"), "w")
+    if fcntl:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return None
+    return f
+
+def archive_expired(retention_days: int = RETENTION_DAYS, now: Optional[datetime] = None) -> int:
+    """Archive toutes les journées entièrement hors rétention. Retourne le nombre de lignes."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    cutoff = ((now or datetime.utcnow()) - timedelta(days=retention_days)).date()
+    lock = _try_lock()
+    if lock is None:
+        return 0
+    db = SessionLocal()
+    try:
+        oldest = db.query(func.min(AuditLog.timestamp)).scalar()
+        if oldest is None:
+            return 0
+        manifest = load_manifest()
+        total, day = 0, oldest.date()
+        while day < cutoff:
+            total += _archive_day(db, day, manifest)
+            day   += timedelta(days=1)
+    finally:
+        db.close()
+        lock.close()
+    if total:
+        print(f"\n ARCHIVAGE     |  {total} entrées d'audit archivées (avant {cutoff})")
+    return total
+
+# ── Lecture (fan-out archives + table chaude) ───────────────────────
+
+def iter_archived(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  match: Callable[[dict], bool] = lambda row: True) -> Iterator[dict]:
+    """Rejoue les archives qui recoupent [since, until), dans l'ordre chronologique."""
+    for entry in sorted(load_manifest(), key=lambda e: (e["day"], e["first_id"])):
+        if since and datetime.fromisoformat(entry["max_ts"]) <= since:
+            continue
+        if until and datetime.fromisoformat(entry["min_ts"]) >= until:
+            continue
+        for row in archives.read_archive(os.path.join(ARCHIVE_DIR, entry["file"])):
+            if match(row):
+                yield row
+
+# ── Job nocturne ────────────────────────────────────────────────────
+
+class NightlyArchiver:
+    def __init__(self, hour: int = ARCHIVE_HOUR):
+        self.hour   = hour
+        self._stop  = threading.Event()
+        self._thread = None
+
+    def _seconds_to_next_run(self) -> float:
+        now  = datetime.now()
+        run  = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if run <= now:
+            run += timedelta(days=1)
+        return (run - now).total_seconds()
+
+    def _run(self):
+        while not self._stop.wait(self._seconds_to_next_run()):
+            try:
+                archive_expired()
+            except Exception as e:
+                print(f"\n ERREUR ARCHIVAGE  |  {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+archiver = NightlyArchiver()
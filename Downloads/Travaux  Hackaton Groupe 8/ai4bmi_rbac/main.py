@@ -1,30 +1,93 @@
+import asyncio
+import os
+import time
+import numpy as np
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.models.database import init_db, SessionLocal, User
-from app.utils.auth import hash_password
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from app.models.database import init_db, engine, SessionLocal, User
+from app.utils.auth import hash_password_async
 from app.routes import auth, api, admin
+from app.middleware.audit import audit_sink
+from app.middleware.rbac import policy
+from app.middleware.cache import cache_middleware, response_cache
+from app.utils.retention import archiver
+from app.models.timeseries import US, now_us, store
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
-    seed_users()
+    # serve.py prépare la base une seule fois avant de lancer les workers
+    if not os.getenv("AI4BMI_PREPARED"):
+        await prepare()
+    warm_up()
+    policy.start()
+    audit_sink.start()
+    archiver.start()
     yield
+    archiver.stop()
+    policy.stop()
+    store.flush()
+    audit_sink.stop()
+
+async def prepare():
+    """Schéma + données de démonstration (une fois, avant les workers)."""
+    init_db()
+    await seed_users()
+    seed_sensor_data()
+
+def warm_up():
+    """Préchauffage du worker avant sa première requête : pool SQL, politique RBAC, index capteurs."""
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    reload_ms = policy.reload()          # prend en compte les comptes de la base
+    for sensor, _, _ in DEMO_SENSORS:
+        store.latest(sensor)
+    print(f"\n WORKER {os.getpid()}  |  prêt en {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"(politique {reload_ms:.1f} ms)")
+
+DEMO_USERS = [
+    ("alice",   "Admin2026", "admin"),
+    ("bob",     "Maint2026", "ingenieur_maintenance"),
+    ("charlie", "Oper2026",  "operateur"),
+    ("diana",   "Audit2026", "auditeur"),
+]
 
-def seed_users():
-    """Créer les 4 utilisateurs de démonstration."""
+async def seed_users():
+    """Créer les 4 utilisateurs de démonstration (hachages en parallèle dans le pool bcrypt)."""
     db = SessionLocal()
     if db.query(User).count() == 0:
-        users = [
-            User(username="alice",   password=hash_password("Admin2026"),  role="admin"),
-            User(username="bob",     password=hash_password("Maint2026"),  role="ingenieur_maintenance"),
-            User(username="charlie", password=hash_password("Oper2026"),   role="operateur"),
-            User(username="diana",   password=hash_password("Audit2026"),  role="auditeur"),
-        ]
+        hashes = await asyncio.gather(*(hash_password_async(pwd) for _, pwd, _ in DEMO_USERS))
+        users = [User(username=name, password=h, role=role)
+                 for (name, _, role), h in zip(DEMO_USERS, hashes)]
         db.add_all(users)
-        db.commit()
-        print("\n Utilisateurs créés : alice (admin) | bob (ingénieur) | charlie (opérateur) | diana (auditeur)")
+        try:
+            db.commit()
+            print("\n Utilisateurs créés : alice (admin) | bob (ingénieur) | charlie (opérateur) | diana (auditeur)")
+        except IntegrityError:
+            db.rollback()        # un autre worker les a créés entre-temps
     db.close()
 
+DEMO_SENSORS = [
+    # capteur, niveau moyen, amplitude du bruit
+    ("IFM-VTV122-01",      45.2, 2.0),
+    ("OMEGA-OS-MINI-03",   78.5, 1.5),
+    ("SIEMENS-SITRANS-02", 12.3, 0.5),
+]
+
+def seed_sensor_data(hours: int = 24):
+    """Créer un historique de démonstration (1 lecture/s) pour les 3 capteurs."""
+    if store.sensors():
+        return
+    rng = np.random.default_rng(2026)
+    end = now_us() // US * US
+    ts  = np.arange(end - hours * 3600 * US, end, US)
+    for sensor, level, noise in DEMO_SENSORS:
+        store.append(sensor, ts, level + noise * rng.standard_normal(len(ts)))
+    store.flush()
+    print(f"\n Historique capteurs créé : {len(DEMO_SENSORS)} capteurs × {hours} h à 1 Hz")
+
 app = FastAPI(
     title="AI4BMI — Système RBAC",
     description="Contrôle d'accès basé sur les rôles pour la plateforme de maintenance prédictive BMI",
@@ -32,6 +95,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.middleware("http")(cache_middleware)
+
+def _sensor_data_changed(sensor: str):
+    for resource in ("capteurs", "historiques", "predictions"):
+        response_cache.invalidate(resource)
+
+store.listeners.append(_sensor_data_changed)
+
 app.include_router(auth.router)
 app.include_router(api.router)
 app.include_router(admin.router)
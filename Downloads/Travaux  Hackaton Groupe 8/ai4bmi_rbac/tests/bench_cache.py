@@ -0,0 +1,42 @@
+"""
+Coût d'un poll de tableau de bord : route complète vs cache (200) vs 304.
+Serveur lancé à part : uvicorn main:app --port 8000
+Puis depuis ai4bmi_rbac/ : python tests/bench_cache.py [url] [polls]
+"""
+import sys
+import time
+import httpx
+
+URL   = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+POLLS = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+ROUTES = ["/api/capteurs", "/api/predictions", "/api/historiques/IFM-VTV122-01"]
+
+def bench():
+    with httpx.Client(base_url=URL) as client:
+        r = client.post("/auth/login", data={"username": "bob", "password": "Maint2026"})
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        etags = {}
+
+        modes = [
+            # URL unique par poll → jamais en cache : décodage, RBAC, route, JSON
+            ("sans cache (route)", lambda route, i: client.get(f"{route}?_={i}", headers=headers)),
+            ("cache, 200",         lambda route, i: client.get(route, headers=headers)),
+            ("cache, 304",         lambda route, i: client.get(route, headers={**headers, "If-None-Match": etags[route]})),
+        ]
+        print("\n" + "=" * 70)
+        print(f"{'Route':<32} {'Mode':<20} {'µs / poll':>10} {'octets':>6}")
+        print("=" * 70)
+        for route in ROUTES:
+            for nom, poll in modes:
+                # ETag courant (les séries dépendent de l'heure de la requête)
+                etags[route] = client.get(route, headers=headers).headers["etag"]
+                t = time.perf_counter()
+                for i in range(POLLS):
+                    r = poll(route, i)
+                us = (time.perf_counter() - t) / POLLS * 1e6
+                print(f"{route:<32} {nom:<20} {us:>10.0f} {len(r.content):>6}")
+        print("=" * 70)
+
+if __name__ == "__main__":
+    bench()
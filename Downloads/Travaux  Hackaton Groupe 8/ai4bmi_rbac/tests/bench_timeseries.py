@@ -0,0 +1,92 @@
+"""
+Benchmark du stockage capteurs : 150 capteurs × 1 kHz, requêtes sur 30 jours.
+Lancer depuis ai4bmi_rbac/ : PYTHONPATH=. python tests/bench_timeseries.py [durée_s] [capteurs_30j]
+
+30 jours à 1 kHz pour 150 capteurs représentent ~4,7 To bruts : on mesure
+l'ingestion à pleine cadence sur `durée_s` secondes, puis les requêtes
+30 jours sur des capteurs à 1 Hz. Les agrégats 1 s / 60 s ont alors
+exactement la même taille qu'à 1 kHz, et ce sont eux que lisent les
+requêtes sous-échantillonnées.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from app.models.timeseries import TimeSeriesStore, US, ROLLUP_DTYPE, ROLLUPS
+
+CAPTEURS = 150
+FREQ     = 1000
+DUREE    = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+N_30J    = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+JOURS    = 30
+T0       = 1_767_225_600 * US          # 2026-01-01
+
+def _taille(dossier):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(dossier) for f in fs)
+
+def _chrono(fn, n=20):
+    fn()
+    t = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t) / n * 1e3
+
+def bench():
+    racine = tempfile.mkdtemp(prefix="bench_ts_")
+    rng    = np.random.default_rng(0)
+    try:
+        # ── 1. Ingestion pleine cadence ───────────────────────────────
+        store  = TimeSeriesStore(os.path.join(racine, "1khz"))
+        bruit  = rng.standard_normal(FREQ).astype("f4")
+        offset = np.arange(FREQ) * (US // FREQ)
+        t = time.perf_counter()
+        for s in range(DUREE):                     # un lot d'une seconde par capteur
+            ts = T0 + s * US + offset
+            for c in range(CAPTEURS):
+                store.append(f"S{c:03d}", ts, bruit + c)
+        store.flush()
+        ecoule = time.perf_counter() - t
+        total  = CAPTEURS * FREQ * DUREE
+        print("\n" + "=" * 64)
+        print(f"Ingestion {CAPTEURS} capteurs × {FREQ} Hz × {DUREE} s = {total / 1e6:.1f} M lectures")
+        print("=" * 64)
+        print(f"Débit                  : {total / ecoule / 1e6:8.2f} M lectures/s "
+              f"(besoin : {CAPTEURS * FREQ / 1e6:.2f} M/s → marge ×{total / ecoule / (CAPTEURS * FREQ):.0f})")
+        octets = _taille(store.root)
+        print(f"Disque                 : {octets / total:8.2f} octets/lecture (brut + agrégats)")
+        proj = octets / total * CAPTEURS * FREQ * 86400 * JOURS
+        print(f"Projection 30 jours    : {proj / 1e12:8.2f} To")
+
+        fin = T0 + DUREE * US
+        print(f"Lecture brute 10 s     : {_chrono(lambda: store.read('S042', fin - 10 * US, fin)):8.2f} ms (10 000 lectures)")
+        print(f"Sous-échant. 60 s→500  : {_chrono(lambda: store.downsample('S042', fin - 60 * US, fin, 500)):8.2f} ms (brut)")
+        print(f"Dernière valeur ×150   : {_chrono(lambda: [store.latest(f'S{c:03d}') for c in range(CAPTEURS)]):8.2f} ms")
+
+        # ── 2. Requêtes sur 30 jours (agrégats) ───────────────────────
+        store = TimeSeriesStore(os.path.join(racine, "30j"))
+        heure = np.arange(3600) * US
+        t = time.perf_counter()
+        for h in range(JOURS * 24):
+            ts = T0 + h * 3600 * US + heure
+            for c in range(N_30J):
+                store.append(f"S{c:03d}", ts, rng.standard_normal(3600))
+        store.flush()
+        print("=" * 64)
+        print(f"30 jours × {N_30J} capteurs (1 Hz, {JOURS * 24} chunks/capteur) écrits en {time.perf_counter() - t:.1f} s")
+        par_capteur = sum(JOURS * 86400 // s * ROLLUP_DTYPE.itemsize for s in ROLLUPS)
+        print(f"Agrégats / capteur     : {par_capteur / 1e6:8.1f} Mo (identique à 1 kHz)")
+        fin = T0 + JOURS * 86400 * US
+        for nom, debut, points in [("30 jours → 720 pts", fin - JOURS * 86400 * US, 720),
+                                   ("7 jours → 1000 pts", fin - 7 * 86400 * US, 1000),
+                                   ("1 jour → 1440 pts",  fin - 86400 * US, 1440),
+                                   ("1 heure → 3600 pts", fin - 3600 * US, 3600)]:
+            ms = _chrono(lambda: store.downsample("S001", debut, fin, points), n=5)
+            print(f"{nom:<23}: {ms:8.2f} ms")
+        print("=" * 64)
+    finally:
+        shutil.rmtree(racine, ignore_errors=True)
+
+if __name__ == "__main__":
+    bench()
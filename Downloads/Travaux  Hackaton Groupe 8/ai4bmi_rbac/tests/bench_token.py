@@ -0,0 +1,28 @@
+"""
+Benchmark : coût de decode_token par requête (python-jose, PyJWT, cache).
+Lancer depuis ai4bmi_rbac/ : PYTHONPATH=. python tests/bench_token.py
+"""
+import timeit
+from app.utils import auth
+
+N = 20000
+
+def bench():
+    token = auth.create_token("charlie", "operateur")
+    chemins = [("python-jose (décodage)", lambda: auth._decode_jose(token))]
+    if auth.pyjwt is not None:
+        chemins.append(("PyJWT (décodage)", lambda: auth._decode_pyjwt(token)))
+    chemins.append(("decode_token (cache)", lambda: auth.decode_token(token)))
+
+    print("\n" + "=" * 55)
+    print(f"{'Chemin':<28} {'µs / requête':>15}")
+    print("=" * 55)
+    for nom, fn in chemins:
+        fn()
+        t = timeit.timeit(fn, number=N)
+        print(f"{nom:<28} {t / N * 1e6:>15.2f}")
+    print("=" * 55)
+    print(auth.token_cache.stats())
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,77 @@
+"""
+Montée en charge de 1 à N workers (serve.py), requêtes RBAC réelles.
+Lancer depuis ai4bmi_rbac/ : python tests/bench_workers.py [max_workers] [durée_s] [clients]
+
+Pour chaque nombre de workers : démarrage de serve.py, puis `clients`
+clients en parallèle pendant `durée_s` secondes sur /api/capteurs avec
+une URL unique par requête (pas de cache de réponse : jeton, RBAC,
+audit en base, lecture du stockage capteurs).
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+MAX_WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else max(2, os.cpu_count() or 1)
+DUREE       = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+CLIENTS     = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+PORT        = 8765
+URL         = f"http://127.0.0.1:{PORT}"
+
+async def _charge():
+    async with httpx.AsyncClient(base_url=URL, timeout=30,
+                                 limits=httpx.Limits(max_connections=CLIENTS)) as client:
+        r = await client.post("/auth/login", data={"username": "charlie", "password": "Oper2026"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        compteur = {"ok": 0, "erreurs": 0}
+        fin = time.perf_counter() + DUREE
+
+        async def client_loop(c):
+            i = 0
+            while time.perf_counter() < fin:
+                i += 1
+                r = await client.get(f"/api/capteurs?c={c}&i={i}", headers=headers)
+                compteur["ok" if r.status_code == 200 else "erreurs"] += 1
+
+        await asyncio.gather(*(client_loop(c) for c in range(CLIENTS)))
+        stats = (await client.get("/admin/audit-stats", headers={"Authorization": "Bearer " + (
+            await client.post("/auth/login", data={"username": "alice", "password": "Admin2026"})
+        ).json()["access_token"]})).json()
+    return compteur, stats
+
+def _attendre_serveur():
+    for _ in range(120):
+        try:
+            if httpx.get(URL + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("serveur non démarré")
+
+def bench():
+    print("\n" + "=" * 66)
+    print(f"{'Workers':>7} {'req/s':>10} {'gain':>7} {'erreurs':>8}   audit (worker échantillonné)")
+    print("=" * 66)
+    base = None
+    for n in range(1, MAX_WORKERS + 1):
+        proc = subprocess.Popen([sys.executable, "serve.py", "--workers", str(n), "--port", str(PORT)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _attendre_serveur()
+            time.sleep(1 + n)          # tous les workers prêts
+            compteur, stats = asyncio.run(_charge())
+        finally:
+            proc.terminate()
+            proc.wait(30)
+        rps  = compteur["ok"] / DUREE
+        base = base or rps
+        print(f"{n:>7} {rps:>10.0f} {rps / base:>6.2f}x {compteur['erreurs']:>8}   "
+              f"errors={stats['errors']} dropped={stats['dropped']}")
+    print("=" * 66)
+    print(f"{os.cpu_count()} cœur(s) disponible(s)")
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,22 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import Base
+
+@pytest.fixture
+def session_factory():
+    """Base SQLite en mémoire, partagée par toutes les sessions du test."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def make_entry():
+    """Fabrique de lignes d'audit : make_entry(i) → accès de user{i}."""
+    def entry(i):
+        return {"timestamp": datetime.utcnow(), "username": f"user{i}", "role": "operateur",
+                "ip": "127.0.0.1", "resource": "capteurs", "action": "read",
+                "status": "ALLOWED", "endpoint": "/api/capteurs"}
+    return entry
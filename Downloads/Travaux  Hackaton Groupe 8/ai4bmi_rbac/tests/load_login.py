@@ -0,0 +1,60 @@
+"""
+Charge mixte : connexions (/auth/login, bcrypt) + lectures /api/capteurs.
+Mesure la latence de /api/capteurs pendant un afflux de connexions.
+Serveur lancé à part : uvicorn main:app --port 8000
+Puis depuis ai4bmi_rbac/ : python tests/load_login.py [url] [durée_s] [logins] [lecteurs]
+"""
+import asyncio
+import statistics
+import sys
+import time
+import httpx
+
+URL      = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+DUREE    = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+LOGINS   = int(sys.argv[3]) if len(sys.argv) > 3 else 50    # clients qui se connectent en boucle
+LECTEURS = int(sys.argv[4]) if len(sys.argv) > 4 else 20    # clients qui lisent /api/capteurs
+COMPTE   = {"username": "charlie", "password": "Oper2026"}
+
+async def _boucle(client, fin, requete, latences, statuts):
+    while time.perf_counter() < fin:
+        t0 = time.perf_counter()
+        r  = await requete(client)
+        latences.append(time.perf_counter() - t0)
+        statuts[r.status_code] = statuts.get(r.status_code, 0) + 1
+
+def _resume(nom, latences, statuts):
+    if not latences:
+        print(f"{nom:<16} aucune requête")
+        return
+    q = statistics.quantiles(latences, n=100)
+    print(f"{nom:<16} {len(latences):>7} {len(latences) / DUREE:>8.1f} "
+          f"{q[49] * 1e3:>9.1f} {q[94] * 1e3:>9.1f} {q[98] * 1e3:>9.1f}   {statuts}")
+
+async def main():
+    limits = httpx.Limits(max_connections=LOGINS + LECTEURS + 1)
+    async with httpx.AsyncClient(base_url=URL, limits=limits, timeout=60) as client:
+        r = await client.post("/auth/login", data=COMPTE)
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        login    = lambda c: c.post("/auth/login", data=COMPTE)
+        capteurs = lambda c: c.get("/api/capteurs", headers=headers)
+
+        res = {"login": ([], {}), "capteurs": ([], {})}
+        fin = time.perf_counter() + DUREE
+        await asyncio.gather(
+            *(_boucle(client, fin, login, *res["login"]) for _ in range(LOGINS)),
+            *(_boucle(client, fin, capteurs, *res["capteurs"]) for _ in range(LECTEURS)),
+        )
+
+    print("\n" + "=" * 78)
+    print(f"{URL} — {DUREE:.0f} s, {LOGINS} clients login + {LECTEURS} clients /api/capteurs")
+    print(f"{'Route':<16} {'requêtes':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}   statuts")
+    print("=" * 78)
+    for nom, (latences, statuts) in res.items():
+        _resume(nom, latences, statuts)
+    print("=" * 78)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.models.database import AuditLog, get_db
+from app.routes import admin
+
+T0 = datetime(2026, 3, 1, 8, 0)
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    """/admin seul, sur une base en mémoire : 30 lignes, 3 par horodatage (égalités)."""
+    db = session_factory()
+    db.bulk_insert_mappings(AuditLog, [dict(
+        timestamp=T0 + timedelta(minutes=i // 3), username=("alice", "bob", "charlie")[i % 3],
+        role="operateur", ip="127.0.0.1", resource=("capteurs", "rapports")[i % 2], action="read",
+        status="DENIED" if i % 5 == 0 else "ALLOWED", endpoint="/api/capteurs") for i in range(30)])
+    db.commit()
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(admin.router)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[admin.admin_only] = lambda: {"sub": "alice", "role": "admin"}
+    monkeypatch.setattr(admin, "SessionLocal", session_factory)   # session propre à l'export
+    return TestClient(app)
+
+def _all_pages(client, limit, **params):
+    ids, cursor = [], None
+    while True:
+        page = client.get("/admin/logs", params={"limit": limit, **params,
+                                                 **({"cursor": cursor} if cursor else {})}).json()
+        ids += [log["id"] for log in page["logs"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+def test_cursor_round_trip():
+    log = AuditLog(id=42, timestamp=datetime(2026, 3, 1, 8, 0, 0, 123456))
+    assert admin._decode_cursor(admin._encode_cursor(log)) == (log.timestamp, 42)
+
+def test_keyset_pages_cover_ties_on_timestamp(client):
+    # Pages de 2 sur des groupes de 3 lignes au même horodatage : aucune perdue ni répétée
+    assert _all_pages(client, 2) == list(range(1, 31))
+    assert _all_pages(client, 2, order="desc") == list(range(30, 0, -1))
+    assert _all_pages(client, 7) == list(range(1, 31))
+
+def test_filters_combine(client):
+    logs = client.get("/admin/logs", params={"username": "alice", "resource": "capteurs",
+                                             "limit": 1000}).json()["logs"]
+    assert logs and all(l["username"] == "alice" and l["resource"] == "capteurs" for l in logs)
+    assert len(logs) == 5
+
+    window = {"since": (T0 + timedelta(minutes=1)).isoformat(), "until": (T0 + timedelta(minutes=7)).isoformat()}
+    logs = client.get("/admin/logs", params={**window, "status": "DENIED", "limit": 1000}).json()["logs"]
+    assert [l["id"] for l in logs] == [6, 11, 16, 21]
+    assert _all_pages(client, 2, username="bob", status="ALLOWED") == [2, 5, 8, 14, 17, 20, 23, 29]
+
+def test_invalid_cursor_is_400(client):
+    for cursor in ("pas-un-curseur", "bm9uLWhvcm9kYXRhZ2V8MQ==", "MjAyNi0wMy0wMVQwODowMDowMHx4"):
+        response = client.get("/admin/logs", params={"cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Curseur invalide"
+
+def test_export_ndjson_and_csv(client):
+    response = client.get("/admin/logs/export", params={"status": "DENIED"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["id"] for r in rows] == [1, 6, 11, 16, 21, 26]
+    assert set(rows[0]) == set(admin.LOG_FIELDS) and rows[0]["status"] == "DENIED"
+
+    response = client.get("/admin/logs/export", params={"format": "csv", "username": "charlie"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="audit_logs.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(r["id"]) for r in rows] == list(range(3, 31, 3))
+    assert list(rows[0]) == admin.LOG_FIELDS
+
+def test_export_streams_in_batches(client, monkeypatch):
+    # Un morceau par lot de EXPORT_BATCH lignes, pas tout le corps d'un coup
+    monkeypatch.setattr(admin, "EXPORT_BATCH", 4)
+    response = admin.export_logs(format="ndjson", include_archives=False, filters=admin.LogFilters(), _=None)
+
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = [c for c in asyncio.run(collect()) if c]
+    assert [c.count("\n") for c in chunks] == [4] * 7 + [2]
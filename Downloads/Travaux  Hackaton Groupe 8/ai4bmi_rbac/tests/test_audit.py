@@ -0,0 +1,23 @@
+import logging
+from app.models.database import AuditLog
+from app.middleware.audit import AuditSink
+
+def test_audit_sink_batches_inserts(session_factory, make_entry):
+    sink = AuditSink(session_factory=session_factory, logger=logging.getLogger("audit-test"), batch_size=50)
+    for i in range(120):
+        assert sink.submit(make_entry(i))
+    sink.stop()
+
+    db = session_factory()
+    assert db.query(AuditLog).count() == 120
+    db.close()
+    stats = sink.stats()
+    assert stats["written"] == 120 and stats["dropped"] == 0
+    assert stats["batches"] >= 3
+
+def test_audit_sink_counts_drops_when_full(session_factory, make_entry):
+    sink = AuditSink(session_factory=session_factory, logger=logging.getLogger("audit-test"), queue_size=2)
+    sink._thread = type("Occupe", (), {"is_alive": lambda self: True})()   # worker bloqué
+    results = [sink.submit(make_entry(i)) for i in range(5)]
+    assert results == [True, True, False, False, False]
+    assert sink.stats()["dropped"] == 3 and sink.stats()["queue_depth"] == 2
@@ -0,0 +1,18 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.utils import auth
+
+def test_bcrypt_pool_roundtrip():
+    async def run():
+        hashed = await auth.hash_password_async("Oper2026")
+        return (await auth.verify_password_async("Oper2026", hashed),
+                await auth.verify_password_async("mauvais", hashed))
+    assert asyncio.run(run()) == (True, False)
+    assert auth.bcrypt_stats()["pending"] == 0
+
+def test_bcrypt_pool_rejects_when_saturated(monkeypatch):
+    monkeypatch.setattr(auth, "_bcrypt_pending", auth.BCRYPT_MAX_PENDING)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.verify_password_async("x", "y"))
+    assert exc.value.status_code == 503
@@ -0,0 +1,36 @@
+import logging
+import time
+from app.middleware.cache import ResponseCache, _etag_matches
+from app.middleware.audit import AuditSink
+from app.models.database import AuditLog
+
+def test_response_cache_etag_and_invalidation():
+    cache = ResponseCache(max_age={"capteurs": 0.05})
+    key   = ("capteurs", "operateur", "/api/capteurs", "")
+    etag  = cache.put(key, b'{"data": []}', cache.version("capteurs"))
+    assert cache.get(key, "capteurs") == (etag, b'{"data": []}')
+    assert _etag_matches(f'W/{etag}, "autre"', etag) and not _etag_matches('"autre"', etag)
+
+    cache.invalidate("capteurs")
+    assert cache.get(key, "capteurs") is None
+
+def test_response_cache_expires_without_invalidation():
+    # Écriture d'un autre processus : aucun invalidate() ici, seul le TTL la rend visible
+    cache = ResponseCache(max_age={"capteurs": 0.05})
+    key   = ("capteurs", "operateur", "/api/capteurs", "")
+    cache.put(key, b'{"valeur": 45.01}', cache.version("capteurs"))
+    assert cache.get(key, "capteurs") is not None
+    time.sleep(0.06)
+    assert cache.get(key, "capteurs") is None
+
+def test_cached_hits_are_grouped_in_audit(session_factory, make_entry):
+    sink    = AuditSink(session_factory=session_factory, logger=logging.getLogger("audit-test"))
+    for _ in range(50):
+        sink.record_hit(make_entry(1))
+    sink.record_hit(make_entry(2))
+    sink.stop()
+
+    db   = session_factory()
+    rows = sorted((log.username, log.hits) for log in db.query(AuditLog))
+    db.close()
+    assert rows == [("user1", 50), ("user2", 1)]
@@ -0,0 +1,97 @@
+import itertools
+import threading
+import time
+import casbin
+from app.middleware.policy import DecisionTable, PolicyManager
+
+def _enforcer():
+    return casbin.Enforcer('config/model.conf', 'config/policy.csv')
+
+def test_decision_table_matches_enforcer():
+    enforcer = _enforcer()
+    table    = DecisionTable(enforcer)
+    assert table.compiled
+
+    subjects  = enforcer.get_all_subjects() + ["alice", "bob", "charlie", "diana", "inconnu"]
+    resources = enforcer.get_all_objects() + ["inexistant"]
+    actions   = enforcer.get_all_actions() + ["inexistante"]
+
+    for sub, obj, act in itertools.product(subjects, resources, actions):
+        assert table.enforce(sub, obj, act) == enforcer.enforce(sub, obj, act), (sub, obj, act)
+
+def test_decision_table_reload():
+    enforcer = _enforcer()
+    table    = DecisionTable(enforcer)
+    assert not table.enforce("eve", "capteurs", "read")
+
+    enforcer.add_grouping_policy("eve", "operateur")
+    assert DecisionTable(enforcer).enforce("eve", "capteurs", "read")
+    assert not table.enforce("eve", "capteurs", "read")   # ancienne table inchangée
+
+def test_decision_table_fallback_lru():
+    enforcer = _enforcer()
+    table    = DecisionTable(enforcer)
+    table.compiled = False
+    assert table.enforce("alice", "users", "delete")
+    assert table.enforce("alice", "users", "delete")
+    assert table._cached_enforce.cache_info().hits == 1
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def _manager(tmp_path, users):
+    policy_csv = tmp_path / "policy.csv"
+    policy_csv.write_text(open('config/policy.csv', encoding='utf-8').read(), encoding='utf-8')
+    return PolicyManager('config/model.conf', str(policy_csv), user_source=lambda: users,
+                         stamp_path=str(tmp_path / "users.stamp"), interval=0.05), policy_csv
+
+def test_policy_manager_users_override_csv(tmp_path):
+    users = [("eve", "operateur"), ("bob", "operateur"), ("diana", None)]
+    manager, _ = _manager(tmp_path, users)
+    assert manager.enforce("eve", "capteurs", "read")
+    assert not manager.enforce("bob", "historiques", "write")    # rôle de la base, pas du CSV
+    assert not manager.enforce("diana", "audit_logs", "read")    # compte désactivé
+    assert manager.enforce("alice", "users", "delete")           # absente de la base : CSV
+
+    users.append(("frank", "auditeur"))
+    old = manager.table
+    manager.users_changed()
+    assert _wait_for(lambda: manager.enforce("frank", "audit_logs", "read"))
+    assert not old.enforce("frank", "audit_logs", "read")        # ancienne table inchangée
+
+def test_users_changed_does_not_rebuild_on_request_path(tmp_path):
+    users = [("eve", "operateur")]
+    manager, _ = _manager(tmp_path, users)
+    release, build = threading.Event(), manager._build
+
+    def slow_build():
+        release.wait(5)
+        return build()
+
+    manager._build = slow_build
+    manager.start()
+    try:
+        users.append(("frank", "auditeur"))
+        start = time.perf_counter()
+        manager.users_changed()                                   # reconstruction bloquée : retour immédiat
+        assert time.perf_counter() - start < 0.5
+        assert not manager.enforce("frank", "audit_logs", "read")
+        release.set()
+        assert _wait_for(lambda: manager.enforce("frank", "audit_logs", "read"))
+        assert manager.stats()["reloads"] == 1
+    finally:
+        manager.stop()
+
+def test_policy_manager_watches_csv(tmp_path):
+    manager, policy_csv = _manager(tmp_path, [])
+    manager.start()
+    try:
+        with open(policy_csv, "a", encoding="utf-8") as f:
+            f.write("p, operateur, export, read\n")
+        assert _wait_for(lambda: manager.enforce("charlie", "export", "read"))
+        assert manager.stats()["reloads"] == 1
+    finally:
+        manager.stop()
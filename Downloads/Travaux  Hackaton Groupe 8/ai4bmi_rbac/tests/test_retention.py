@@ -0,0 +1,46 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import Base, AuditLog
+from app.utils import retention
+
+def _setup(monkeypatch, tmp_path):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(retention, "SessionLocal", factory)
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(retention, "MANIFEST", os.path.join(str(tmp_path), "manifest.json"))
+    return factory
+
+def _add(db, ts, n):
+    db.bulk_insert_mappings(AuditLog, [dict(timestamp=ts + timedelta(minutes=i), username="bob", role="r",
+                                            ip="i", resource="capteurs", action="read",
+                                            status="ALLOWED", endpoint="/api/capteurs") for i in range(n)])
+    db.commit()
+
+def test_archive_expired_keeps_hot_table_bounded(monkeypatch, tmp_path):
+    factory = _setup(monkeypatch, tmp_path)
+    now = datetime(2026, 3, 31, 12, 0)
+    db  = factory()
+    _add(db, datetime(2026, 1, 10), 30)     # hors rétention
+    _add(db, datetime(2026, 1, 11), 20)     # hors rétention
+    _add(db, datetime(2026, 3, 30), 10)     # table chaude
+
+    assert retention.archive_expired(retention_days=30, now=now) == 50
+    assert db.query(AuditLog).count() == 10
+
+    manifest = retention.load_manifest()
+    assert [e["rows"] for e in manifest] == [30, 20]
+
+    # Reprise : rien à réarchiver, les lignes arrivées en retard forment une partie 2
+    _add(db, datetime(2026, 1, 10, 20), 5)
+    assert retention.archive_expired(retention_days=30, now=now) == 5
+    assert len(retention.load_manifest()) == 3
+
+    rows = list(retention.iter_archived(since=datetime(2026, 1, 11)))
+    assert len(rows) == 20
+    assert len(list(retention.iter_archived())) == 55
+    db.close()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from app.models.timeseries import TimeSeriesStore, US
+
+T0 = 1_700_000_000 * US
+
+def _store(tmp_path, n=35_000):
+    store  = TimeSeriesStore(str(tmp_path / "ts"), chunk_seconds=10, flush_samples=1000)
+    ts     = T0 + np.arange(n) * 1000                 # 1 kHz
+    values = np.sin(np.arange(n) / 100).astype("f4")
+    for i in range(0, n, 700):
+        store.append("IFM-VTV122-01", ts[i:i + 700], values[i:i + 700])
+    return store, ts, values
+
+def test_range_read_across_chunks(tmp_path):
+    store, ts, values = _store(tmp_path)
+    rt, rv = store.read("IFM-VTV122-01", T0 + 5 * US, T0 + 25 * US)
+    assert len(rt) == 20_000 and rt[0] == T0 + 5 * US
+    assert np.array_equal(rv, values[5_000:25_000])
+    assert store.latest("IFM-VTV122-01") == (int(ts[-1]), float(values[-1]))
+
+@pytest.mark.parametrize("points", [7, 35, 3500])
+def test_downsample_matches_raw(tmp_path, points):
+    store, ts, values = _store(tmp_path)
+    d = store.downsample("IFM-VTV122-01", T0, T0 + 35 * US, points)
+    buckets = (ts - T0) // d["step_us"]
+    keys    = np.unique(buckets)
+    assert len(d["t"]) == len(keys) <= points
+    assert np.allclose(d["min"],  [values[buckets == k].min() for k in keys])
+    assert np.allclose(d["max"],  [values[buckets == k].max() for k in keys])
+    assert np.allclose(d["mean"], [values[buckets == k].astype("f8").mean() for k in keys])
+    assert d["count"].sum() == len(ts)
+
+def test_reopen_and_append_only(tmp_path):
+    store, ts, _ = _store(tmp_path)
+    store.flush()
+    reopened = TimeSeriesStore(str(tmp_path / "ts"), chunk_seconds=10)
+    assert len(reopened.read("IFM-VTV122-01", 0, 2**62)[0]) == len(ts)
+    with pytest.raises(ValueError):
+        reopened.append("IFM-VTV122-01", [ts[0]], [1.0])
+    with pytest.raises(ValueError):
+        reopened.read("../policy", 0, 1)
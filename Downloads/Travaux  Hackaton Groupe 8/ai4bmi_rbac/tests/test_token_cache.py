@@ -0,0 +1,37 @@
+import time
+import pytest
+from fastapi import HTTPException
+from app.utils import auth
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    auth.token_cache.clear()
+    yield
+    auth.token_cache.clear()
+
+def test_decode_token_served_from_cache():
+    token = auth.create_token("bob", "ingenieur_maintenance")
+    first = auth.decode_token(token)
+    hits  = auth.token_cache.hits
+    assert auth.decode_token(token) == first == {"username": "bob", "role": "ingenieur_maintenance"}
+    assert auth.token_cache.hits == hits + 1
+
+def test_expired_cache_entry_is_not_served():
+    cache = auth.TokenCache(maxsize=2)
+    cache.put(b"a", {"username": "x", "role": "y"}, time.time() - 1)
+    assert cache.get(b"a") is None and cache.stats()["size"] == 0
+    for key in (b"1", b"2", b"3"):
+        cache.put(key, {}, time.time() + 60)
+    assert cache.get(b"1") is None and cache.stats()["size"] == 2
+
+def test_tampered_token_rejected():
+    token = auth.create_token("charlie", "operateur")
+    auth.decode_token(token)
+    with pytest.raises(HTTPException) as exc:
+        auth.decode_token(token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))
+    assert exc.value.status_code == 401
+
+@pytest.mark.skipif(auth.pyjwt is None, reason="PyJWT non installé")
+def test_pyjwt_backend_matches_jose():
+    token = auth.create_token("diana", "auditeur")
+    assert auth._decode_pyjwt(token) == auth._decode_jose(token)